@@ -9,9 +9,9 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 from core.config import settings
-from core.database import Base
+from db.base import Base
 # Importar todos los modelos para que estén disponibles para Alembic
-from models import user, contact, page_content, plans
+from models import user, contact, page_content, plans, media
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
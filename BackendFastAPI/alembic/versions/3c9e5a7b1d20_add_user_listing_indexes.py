@@ -0,0 +1,45 @@
+"""Add user listing indexes
+
+Revision ID: 3c9e5a7b1d20
+Revises: 07323e137424
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e5a7b1d20'
+down_revision = '07323e137424'
+branch_labels = None
+depends_on = None
+
+# Búsqueda por prefijo sin distinguir mayúsculas: lower(col) LIKE 'term%'
+LOWER_PATTERN_INDEXES = {
+    'ix_auth_user_username_lower': 'username',
+    'ix_auth_user_email_lower': 'email',
+    'ix_auth_user_first_name_lower': 'first_name',
+    'ix_auth_user_last_name_lower': 'last_name',
+}
+
+
+def upgrade() -> None:
+    op.create_index('ix_auth_user_date_joined_id', 'auth_user', ['date_joined', 'id'], unique=False)
+    op.create_index(op.f('ix_auth_user_role'), 'auth_user', ['role'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for index_name, column in LOWER_PATTERN_INDEXES.items():
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS {index_name} '
+                f'ON auth_user (lower({column}) varchar_pattern_ops)'
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for index_name in LOWER_PATTERN_INDEXES:
+            op.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+    op.drop_index(op.f('ix_auth_user_role'), table_name='auth_user')
+    op.drop_index('ix_auth_user_date_joined_id', table_name='auth_user')
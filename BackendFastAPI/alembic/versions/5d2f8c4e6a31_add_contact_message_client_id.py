@@ -0,0 +1,30 @@
+"""Add client_id to contact messages
+
+Revision ID: 5d2f8c4e6a31
+Revises: 3c9e5a7b1d20
+Create Date: 2026-10-17 16:05:12.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8c4e6a31'
+down_revision = '3c9e5a7b1d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('website_content_contactmessage', sa.Column('client_id', sa.String(length=36), nullable=True))
+    op.create_unique_constraint(
+        'uq_website_content_contactmessage_client_id', 'website_content_contactmessage', ['client_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_website_content_contactmessage_client_id', 'website_content_contactmessage', type_='unique'
+    )
+    op.drop_column('website_content_contactmessage', 'client_id')
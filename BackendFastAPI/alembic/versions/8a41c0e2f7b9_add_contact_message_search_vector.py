@@ -0,0 +1,46 @@
+"""Add full-text search vector to contact messages
+
+Revision ID: 8a41c0e2f7b9
+Revises: 5d2f8c4e6a31
+Create Date: 2026-10-17 17:42:08.551730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41c0e2f7b9'
+down_revision = '5d2f8c4e6a31'
+branch_labels = None
+depends_on = None
+
+# Debe coincidir con crud.crud_contact.SEARCH_CONFIG / SEARCH_WEIGHTS
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('spanish', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(company, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(subject, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(message, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    # Solo Postgres: en SQLite la búsqueda usa el índice invertido en memoria
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        'ALTER TABLE website_content_contactmessage ADD COLUMN search_vector tsvector '
+        f'GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED'
+    )
+    op.execute(
+        'CREATE INDEX ix_website_content_contactmessage_search_vector '
+        'ON website_content_contactmessage USING GIN (search_vector)'
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_website_content_contactmessage_search_vector')
+    op.execute('ALTER TABLE website_content_contactmessage DROP COLUMN IF EXISTS search_vector')
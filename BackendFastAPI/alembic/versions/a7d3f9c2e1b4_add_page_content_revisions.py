@@ -0,0 +1,68 @@
+"""Add page content revision history
+
+Revision ID: a7d3f9c2e1b4
+Revises: f1c8a3e5b9d7
+Create Date: 2026-10-18 00:12:37.254109
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f9c2e1b4'
+down_revision = 'f1c8a3e5b9d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'website_page_content_revision',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('page_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('data', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['page_id'], ['website_page_content.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['author_id'], ['auth_user.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('page_id', 'version', name='uq_page_content_revision_page_version')
+    )
+
+    # Historial inicial: un snapshot de cada página en su versión actual
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            INSERT INTO website_page_content_revision (page_id, version, kind, data, size)
+            SELECT id, version, 'snapshot', state, octet_length(state::text)
+            FROM (
+                SELECT id, version, jsonb_build_object(
+                    'title', title, 'content_json', content_json, 'meta_title', meta_title,
+                    'meta_description', meta_description, 'meta_keywords', meta_keywords,
+                    'is_active', is_active
+                ) AS state
+                FROM website_page_content
+            ) AS pages
+        """)
+    else:
+        op.execute("""
+            INSERT INTO website_page_content_revision (page_id, version, kind, data, size)
+            SELECT id, version, 'snapshot', state, length(CAST(state AS BLOB))
+            FROM (
+                SELECT id, version, json_object(
+                    'title', title, 'content_json', json(coalesce(content_json, '{}')),
+                    'meta_title', meta_title, 'meta_description', meta_description,
+                    'meta_keywords', meta_keywords,
+                    'is_active', json(CASE WHEN is_active THEN 'true' ELSE 'false' END)
+                ) AS state
+                FROM website_page_content
+            ) AS pages
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('website_page_content_revision')
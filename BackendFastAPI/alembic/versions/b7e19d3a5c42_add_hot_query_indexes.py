@@ -0,0 +1,55 @@
+"""Add composite and partial indexes for hot queries
+
+Revision ID: b7e19d3a5c42
+Revises: 8a41c0e2f7b9
+Create Date: 2026-10-17 19:20:37.106482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e19d3a5c42'
+down_revision = '8a41c0e2f7b9'
+branch_labels = None
+depends_on = None
+
+PENDING_STATUSES = "status IN ('new', 'in_progress')"
+
+
+def upgrade() -> None:
+    # Login por username O email (get_user_for_login): email no tenía índice
+    op.create_index(op.f('ix_auth_user_email'), 'auth_user', ['email'], unique=False)
+
+    # Mensajes de contacto: listado admin, por estado y bandeja de pendientes
+    op.create_index(
+        'ix_contactmessage_created_at_id', 'website_content_contactmessage',
+        ['created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_contactmessage_status_created_at_id', 'website_content_contactmessage',
+        ['status', 'created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_contactmessage_pending_created_at_id', 'website_content_contactmessage',
+        ['created_at', 'id'], unique=False,
+        postgresql_where=sa.text(PENDING_STATUSES),
+        sqlite_where=sa.text(PENDING_STATUSES)
+    )
+
+    # Planes activos en orden de visualización
+    op.create_index(
+        'ix_serviceplan_active_display_order_id', 'website_content_serviceplan',
+        ['display_order', 'id'], unique=False,
+        postgresql_where=sa.text('is_active = true'),
+        sqlite_where=sa.text('is_active = 1')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_serviceplan_active_display_order_id', table_name='website_content_serviceplan')
+    op.drop_index('ix_contactmessage_pending_created_at_id', table_name='website_content_contactmessage')
+    op.drop_index('ix_contactmessage_status_created_at_id', table_name='website_content_contactmessage')
+    op.drop_index('ix_contactmessage_created_at_id', table_name='website_content_contactmessage')
+    op.drop_index(op.f('ix_auth_user_email'), table_name='auth_user')
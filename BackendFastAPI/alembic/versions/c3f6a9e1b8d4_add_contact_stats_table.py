@@ -0,0 +1,40 @@
+"""Add contact stats summary table
+
+Revision ID: c3f6a9e1b8d4
+Revises: b7e19d3a5c42
+Create Date: 2026-10-17 21:03:55.270918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f6a9e1b8d4'
+down_revision = 'b7e19d3a5c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('website_content_contactstats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+
+    # Carga inicial desde los mensajes existentes (días en UTC)
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "date(timezone('UTC', created_at))"
+    else:
+        day = 'date(created_at)'
+    op.execute(
+        'INSERT INTO website_content_contactstats (day, status, count) '
+        f"SELECT {day}, coalesce(status, 'new'), count(*) FROM website_content_contactmessage "
+        f'WHERE created_at IS NOT NULL GROUP BY {day}, coalesce(status, \'new\')'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('website_content_contactstats')
@@ -0,0 +1,41 @@
+"""Add media files table
+
+Revision ID: d8a2c5f0e7b3
+Revises: c3f6a9e1b8d4
+Create Date: 2026-10-17 22:48:19.633052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2c5f0e7b3'
+down_revision = 'c3f6a9e1b8d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('website_media_file',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('derivatives', sa.JSON(), nullable=True),
+    sa.Column('uploaded_by_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['uploaded_by_id'], ['auth_user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    op.create_index(op.f('ix_website_media_file_id'), 'website_media_file', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_website_media_file_id'), table_name='website_media_file')
+    op.drop_table('website_media_file')
@@ -0,0 +1,24 @@
+"""Add page content version for optimistic concurrency
+
+Revision ID: e4b7d1a9c6f2
+Revises: d8a2c5f0e7b3
+Create Date: 2026-10-17 23:20:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7d1a9c6f2'
+down_revision = 'd8a2c5f0e7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('website_page_content', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('website_page_content', 'version')
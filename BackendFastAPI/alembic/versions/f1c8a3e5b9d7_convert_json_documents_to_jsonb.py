@@ -0,0 +1,44 @@
+"""Convert content_json and features to JSONB with GIN indexes
+
+Revision ID: f1c8a3e5b9d7
+Revises: e4b7d1a9c6f2
+Create Date: 2026-10-17 23:41:12.406518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8a3e5b9d7'
+down_revision = 'e4b7d1a9c6f2'
+branch_labels = None
+depends_on = None
+
+# (tabla, columna, índice GIN, opclass)
+JSON_DOCUMENTS = [
+    ('website_page_content', 'content_json', 'ix_website_page_content_content_json', 'jsonb_path_ops'),
+    ('website_content_serviceplan', 'features', 'ix_serviceplan_features', ''),
+]
+
+
+def upgrade() -> None:
+    # Solo Postgres: en SQLite las columnas siguen siendo JSON (texto)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, index, opclass in JSON_DOCUMENTS:
+        # Reescribe la tabla (ACCESS EXCLUSIVE); son tablas pequeñas del CMS
+        op.execute(
+            f'ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb'
+        )
+        op.execute(f'CREATE INDEX {index} ON {table} USING GIN ({column} {opclass})')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column, index, opclass in JSON_DOCUMENTS:
+        op.execute(f'DROP INDEX IF EXISTS {index}')
+        op.execute(
+            f'ALTER TABLE {table} ALTER COLUMN {column} TYPE JSON USING {column}::json'
+        )
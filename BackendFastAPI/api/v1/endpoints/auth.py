@@ -4,27 +4,42 @@ Endpoints de autenticación
 
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from db.session import get_db
 from core.config import settings
-from security.core import authenticate_user, create_access_token
+from crud import user as crud_user
+from security.core import create_access_token, get_user_for_login
 from security.deps import get_current_user
+from security.hashing import PasswordHasherBusy, password_hasher
 from schemas.auth import LoginRequest, Token
 from schemas.user import UserResponse
 
 router = APIRouter()
 
 @router.post("/login/", response_model=Token)
-def login(
+async def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """Endpoint de login que retorna JWT token"""
     print(f"🔐 Login attempt: {login_data.username}")
-    user = authenticate_user(db, login_data.username, login_data.password)
+    user = await run_in_threadpool(get_user_for_login, db, login_data.username)
     
-    if not user:
+    # bcrypt se verifica en el executor dedicado, no en el threadpool
+    try:
+        valid = user is not None and await password_hasher.verify(
+            login_data.password, user.password_hash
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -37,6 +52,16 @@ def login(
             detail="Inactive user"
         )
     
+    # Rehash transparente si cambió el coste de bcrypt configurado
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            new_hash = await password_hasher.hash(login_data.password)
+            await run_in_threadpool(
+                crud_user.update, db, db_obj=user, obj_in={"password_hash": new_hash}
+            )
+        except PasswordHasherBusy:
+            pass  # Se reintentará en el próximo login
+    
     # Crear token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -2,42 +2,144 @@
 Endpoints de gestión de mensajes de contacto
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from uuid import uuid4
 
-from db.session import get_db
+from api.v1.listing import NEXT_CURSOR_HEADER, list_or_400
+from core.config import settings
+from core.query_guard import query_budget
+from db.session import SessionLocal, get_db
 from security.deps import get_current_admin_user
-from crud import contact_message as crud_contact
-from schemas.contact import ContactMessageCreate, ContactMessageUpdate, ContactMessageResponse
+from crud import contact_message as crud_contact, contact_stats
+from crud.pagination import InvalidListQuery
+from services.contact_ingestion import contact_ingestor
+from services.contact_spool import contact_spool
+from schemas.contact import (
+    ContactMessageCreate, ContactMessageUpdate, ContactMessageResponse, ContactMessageSearchResult
+)
 
 router = APIRouter()
 
 # API pública para enviar mensajes de contacto
-@router.post("/public/", response_model=ContactMessageResponse)
-def create_contact_message(
-    message_data: ContactMessageCreate,
-    db: Session = Depends(get_db)
-):
-    """Crear nuevo mensaje de contacto"""
-    message = crud_contact.create(db, obj_in=message_data)
-    return message
+if settings.CONTACT_INGEST_MODE == "spool":
+    @router.post("/public/", status_code=status.HTTP_202_ACCEPTED)
+    async def create_contact_message(message_data: ContactMessageCreate):
+        """Aceptar mensaje de contacto (spool local durable, replay a la DB)"""
+        message_data.client_id = message_data.client_id or uuid4()
+        try:
+            await run_in_threadpool(contact_spool.append, message_data.model_dump(mode="json"))
+        except (OSError, RuntimeError) as e:
+            # Spool no disponible (disco lleno, no arrancado): escritura síncrona
+            print(f"⚠️ Contact spool append failed: {e}")
+            await run_in_threadpool(_create_message_sync, message_data)
+        return {"message": "Contact message accepted", "client_id": str(message_data.client_id)}
+elif settings.CONTACT_INGEST_MODE == "buffered":
+    @router.post("/public/", status_code=status.HTTP_202_ACCEPTED)
+    async def create_contact_message(message_data: ContactMessageCreate):
+        """Aceptar mensaje de contacto (se guarda en segundo plano, por lotes)"""
+        message_data.client_id = message_data.client_id or uuid4()
+        if not contact_ingestor.submit(message_data):
+            # Cola llena o servicio parado: escritura síncrona
+            await run_in_threadpool(_create_message_sync, message_data)
+        return {"message": "Contact message accepted", "client_id": str(message_data.client_id)}
+else:
+    @router.post("/public/", response_model=ContactMessageResponse)
+    def create_contact_message(
+        message_data: ContactMessageCreate,
+        db: Session = Depends(get_db)
+    ):
+        """Crear nuevo mensaje de contacto"""
+        message = crud_contact.create(db, obj_in=message_data)
+        return message
+
+def _create_message_sync(message_data: ContactMessageCreate) -> None:
+    db = SessionLocal()
+    try:
+        crud_contact.create(db, obj_in=message_data)
+    finally:
+        db.close()
 
 # APIs de Administración
 @router.get("/admin/", response_model=List[ContactMessageResponse])
+@query_budget(2)
 def get_contact_messages(
+    response: Response,
     status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
+    sort: str = Query("-created_at", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(settings.LIST_MAX_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     """Obtener mensajes de contacto (admin)"""
-    if status_filter:
-        messages = crud_contact.get_by_status(db, status=status_filter)
-    else:
-        messages = crud_contact.get_multi(db)
-    
+    messages = list_or_400(
+        crud_contact, db, response,
+        filters={"status": status_filter}, sort=sort, cursor=cursor, limit=limit
+    )
     return messages
 
+@router.get("/admin/search/", response_model=List[ContactMessageSearchResult])
+@query_budget(4)
+def search_contact_messages(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar"),
+    status_filter: Optional[str] = Query(None, description="Filtrar por estado"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(20, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Buscar mensajes por relevancia en nombre, email, empresa, asunto y mensaje (admin)"""
+    try:
+        result = crud_contact.search(db, q=q, status=status_filter, cursor=cursor, limit=limit)
+    except InvalidListQuery as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if result.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = result.next_cursor
+    return [
+        ContactMessageSearchResult(
+            **ContactMessageResponse.model_validate(hit.message).model_dump(),
+            rank=hit.rank,
+            snippet=hit.snippet
+        )
+        for hit in result.items
+    ]
+
+@router.get("/admin/stats/")
+def get_contact_stats(
+    days: int = Query(30, ge=1, le=366, description="Días de la serie diaria"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Mensajes por estado, pendientes y por día, desde la tabla resumen (admin)"""
+    return contact_stats.summary(db, days=days)
+
+@router.post("/admin/stats/rebuild/")
+def rebuild_contact_stats(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Recalcular la tabla resumen desde los mensajes (admin)"""
+    rows = contact_stats.rebuild(db)
+    return {"message": "Contact stats rebuilt successfully", "rows": rows}
+
+@router.get("/admin/ingestion-stats/")
+def get_ingestion_stats(
+    current_user = Depends(get_current_admin_user)
+):
+    """Estado de la ingesta de mensajes: cola en memoria y spool local (admin)"""
+    return {
+        "mode": settings.CONTACT_INGEST_MODE,
+        "buffer": contact_ingestor.stats(),
+        "spool": contact_spool.stats(),
+    }
+
 @router.get("/admin/{message_id}/", response_model=ContactMessageResponse)
 def get_contact_message(
     message_id: int,
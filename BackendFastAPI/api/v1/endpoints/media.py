@@ -0,0 +1,232 @@
+"""
+Endpoints de media (montados en /api/media, la ruta que usa el frontend)
+"""
+
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from api.v1.listing import list_or_400
+from core.config import settings
+from core.query_guard import query_budget
+from db.session import get_db
+from security.deps import get_current_admin_user
+from crud import media_file as crud_media
+from models.media import MediaFile
+from schemas.media import MediaFileCreate, MediaFileResponse, MediaFromUrl
+from services.media.storage import LocalStorage, get_media_storage, original_key
+from services.media.uploads import (
+    MULTIPART_OVERHEAD_BYTES, SNIFF_BYTES, InvalidMultipart, MultipartFile, ReceivedUpload,
+    UnsupportedMediaType, UploadTooLarge, generate_derivatives, iter_url, receive_stream,
+    sniff_content_type, store_original
+)
+
+router = APIRouter()
+
+# Los objetos son inmutables (clave = hash del contenido)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _to_response(media: MediaFile, *, deduplicated: bool = False) -> MediaFileResponse:
+    storage = get_media_storage()
+    return MediaFileResponse(
+        id=media.id,
+        sha256=media.sha256,
+        filename=media.filename or "",
+        content_type=media.content_type,
+        size=media.size,
+        width=media.width,
+        height=media.height,
+        url=storage.url(original_key(media.sha256)),
+        thumbnails={
+            name: storage.url(info["key"]) for name, info in (media.derivatives or {}).items()
+        },
+        created_at=media.created_at,
+        deduplicated=deduplicated
+    )
+
+async def _register_upload(
+    upload: ReceivedUpload,
+    filename: str,
+    user_id: int,
+    db: Session,
+    response: Response,
+    background_tasks: BackgroundTasks
+) -> MediaFileResponse:
+    """Guarda el original (si es nuevo), crea el registro y programa derivados"""
+    existing = await run_in_threadpool(crud_media.get_by_sha256, db, sha256=upload.sha256)
+    if existing:
+        os.unlink(upload.path)
+        return _to_response(existing, deduplicated=True)
+
+    try:
+        await run_in_threadpool(store_original, upload)
+        media, created = await run_in_threadpool(
+            crud_media.get_or_create, db,
+            obj_in=MediaFileCreate(
+                sha256=upload.sha256,
+                filename=os.path.basename(filename or "")[:255],
+                content_type=upload.content_type,
+                size=upload.size,
+                uploaded_by_id=user_id
+            )
+        )
+    except Exception:
+        os.unlink(upload.path)
+        raise
+
+    if not created:
+        os.unlink(upload.path)
+        return _to_response(media, deduplicated=True)
+
+    # Miniaturas en el pool de procesos, después de responder
+    background_tasks.add_task(generate_derivatives, media.id, upload)
+    response.status_code = status.HTTP_201_CREATED
+    return _to_response(media)
+
+def _upload_error(error: Exception) -> HTTPException:
+    if isinstance(error, UploadTooLarge):
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {settings.MEDIA_MAX_UPLOAD_BYTES} bytes"
+        )
+    if isinstance(error, UnsupportedMediaType):
+        return HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported media type (png, jpeg, gif, webp)"
+        )
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+@router.get("/", response_model=List[MediaFileResponse])
+@query_budget(2)
+def get_media_files(
+    response: Response,
+    content_type: Optional[str] = Query(None, description="Filtrar por tipo (image/png...)"),
+    sort: str = Query("-created_at", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(settings.LIST_MAX_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Listar ficheros de media (admin)"""
+    media_files = list_or_400(
+        crud_media, db, response,
+        filters={"content_type": content_type}, sort=sort, cursor=cursor, limit=limit
+    )
+    return [_to_response(media) for media in media_files]
+
+@router.post("/upload", response_model=MediaFileResponse)
+async def upload_media(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    filename: str = Query("", description="Nombre original (subidas con cuerpo binario)"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Subir imagen (admin). Acepta multipart/form-data (campo `file`) o el
+    fichero como cuerpo binario; en ambos casos se procesa en streaming y el
+    límite de tamaño se aplica según llegan los bytes.
+    """
+    content_type = request.headers.get("content-type", "")
+    multipart = content_type.startswith("multipart/form-data")
+    try:
+        # Content-Length declarado por encima del límite: rechazo sin leer el cuerpo
+        limit = settings.MEDIA_MAX_UPLOAD_BYTES + (MULTIPART_OVERHEAD_BYTES if multipart else 0)
+        declared = request.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > limit:
+            raise UploadTooLarge()
+        if multipart:
+            form_file = MultipartFile(content_type, request.stream())
+            upload = await receive_stream(form_file.chunks())
+            filename = form_file.filename or filename
+        else:
+            upload = await receive_stream(request.stream())
+    except (UploadTooLarge, UnsupportedMediaType, InvalidMultipart) as e:
+        raise _upload_error(e)
+
+    return await _register_upload(upload, filename, current_user.id, db, response, background_tasks)
+
+@router.post("/url", response_model=MediaFileResponse)
+async def upload_media_from_url(
+    data: MediaFromUrl,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Importar imagen desde una URL pública (admin)"""
+    url = str(data.url)
+    try:
+        upload = await receive_stream(iter_url(url))
+    except (UploadTooLarge, UnsupportedMediaType, ValueError) as e:
+        raise _upload_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Could not fetch URL: {e}"
+        )
+
+    filename = data.filename or url.rstrip("/").rsplit("/", 1)[-1]
+    return await _register_upload(upload, filename, current_user.id, db, response, background_tasks)
+
+@router.get("/files/{key:path}")
+def get_media_file_content(key: str):
+    """Servir un objeto de media (público, cacheable como inmutable)"""
+    storage = get_media_storage()
+    if not isinstance(storage, LocalStorage):
+        return RedirectResponse(storage.url(key))
+    try:
+        path = storage.path(key)
+    except ValueError:
+        path = None
+    if path is None or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media file not found"
+        )
+    # Los originales no llevan extensión: el tipo sale de la firma del fichero
+    with open(path, "rb") as f:
+        media_type = sniff_content_type(f.read(SNIFF_BYTES))
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@router.get("/{media_id}", response_model=MediaFileResponse)
+def get_media_file(
+    media_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Obtener fichero de media (admin)"""
+    media = crud_media.get(db, id=media_id)
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media file not found"
+        )
+    return _to_response(media)
+
+@router.delete("/{media_id}")
+def delete_media_file(
+    media_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Eliminar fichero de media y sus derivados (admin)"""
+    media = crud_media.get(db, id=media_id)
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media file not found"
+        )
+
+    storage = get_media_storage()
+    keys = [original_key(media.sha256)] + [info["key"] for info in (media.derivatives or {}).values()]
+    crud_media.remove(db, id=media_id)
+    for key in keys:
+        storage.delete(key)
+
+    return {"message": "Media file deleted successfully"}
@@ -2,51 +2,242 @@
 Endpoints de gestión de contenido de páginas
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+from api.v1.listing import list_or_400
+from core.cache import caches
+from core.compression import strip_encoded_etag
+from core.config import settings
+from core.http_cache import cached_response, is_not_modified, not_modified
+from core.query_guard import query_budget
+from db.async_session import get_async_db
 from db.session import get_db
 from security.deps import get_current_admin_user
+from services.static_export import static_exporter
 from crud import page_content as crud_page_content
-from schemas.page_content import PageContentCreate, PageContentUpdate, PageContentResponse
+from crud import page_revision
+from crud.crud_page_content import VersionConflict
+from crud.json_patch import (
+    InvalidPatch, PatchConflict, compile_json_patch, compile_merge_patch, parse_pointer
+)
+from schemas.page_content import (
+    ALLOWED_PAGE_KEYS, PageContentCreate, PageContentUpdate, PageContentResponse,
+    PageContentPatchResult, PageContentRevisionResponse, PageContentRevisionState
+)
 
 router = APIRouter()
 
-# APIs Públicas
-@router.get("/public/{page_key}/", response_model=PageContentResponse)
-def get_public_page_content(
-    page_key: str,
-    db: Session = Depends(get_db)
-):
-    """Obtener contenido público de una página"""
-    content = crud_page_content.get_active_by_page_key(db, page_key=page_key)
-    
-    if not content:
+def _parse_bundle_keys(keys: str) -> List[str]:
+    page_keys = list(dict.fromkeys(key.strip() for key in keys.split(",") if key.strip()))
+    invalid = [key for key in page_keys if key not in ALLOWED_PAGE_KEYS]
+    if invalid:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Page content not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid page_key(s): {invalid}"
         )
-    
-    return content
+    return page_keys
+
+MAX_PROJECTION_FIELDS = 20
+
+def _parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """`hero,features` -> ("features", "hero"); None si no se pide proyección"""
+    if fields is None:
+        return None
+    names = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()}))
+    if not names:
+        return None
+    if len(names) > MAX_PROJECTION_FIELDS or any(len(name) > 100 for name in names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_PROJECTION_FIELDS} fields of up to 100 characters"
+        )
+    return names
+
+def _is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def _version_etag(version: int) -> str:
+    return f'"{version}"'
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Versión esperada a partir de If-Match (`"3"`, `3` o `*` = cualquiera).
+    Acepta el ETag de un GET comprimido (`"3-br"`, `"3-gzip"`).
+    """
+    if if_match is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header with the page version is required"
+        )
+    value = if_match.strip()
+    if value == "*":
+        return None
+    value = strip_encoded_etag(value.removeprefix("W/")).strip('"')
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match version"
+        )
+    return int(value)
+
+def _page_not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Page content not found"
+    )
+
+def _revision_not_found():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Revision not found"
+    )
+
+# APIs Públicas (async o sync según DB_ASYNC_MODE)
+# Nota: /public/bundle/ debe declararse antes de /public/{page_key}/
+if settings.DB_ASYNC_MODE:
+    @router.get("/public/bundle/")
+    @query_budget(2)
+    async def get_public_bundle(
+        request: Request,
+        keys: str = Query("navigation,footer", description="page_keys separados por comas"),
+        plans: bool = Query(False, description="Incluir planes activos"),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Obtener varias páginas públicas (y opcionalmente los planes) en una sola respuesta"""
+        page_keys = _parse_bundle_keys(keys)
+        entry = await crud_page_content.aget_public_bundle(db, page_keys=page_keys, include_plans=plans)
+        return cached_response(request, entry)
+
+    @router.get("/public/{page_key}/", response_model=PageContentResponse)
+    async def get_public_page_content(
+        page_key: str,
+        request: Request,
+        fields: Optional[str] = Query(None, description="Secciones de content_json separadas por comas"),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Obtener contenido público de una página (soporta ETag / If-Modified-Since)"""
+        section_fields = _parse_fields(fields)
+        if section_fields:
+            entry = await crud_page_content.aget_public_projection(
+                db, page_key=page_key, fields=section_fields
+            )
+            if entry is None:
+                raise _page_not_found()
+            return cached_response(request, entry)
+        
+        entry = crud_page_content.get_public_cached(page_key=page_key)
+        
+        if entry is None and _is_conditional(request):
+            version = await crud_page_content.aget_public_version(db, page_key=page_key)
+            if version is not None and is_not_modified(request, *version):
+                return not_modified(*version)
+        
+        if entry is None:
+            entry = await crud_page_content.aget_public_serialized(db, page_key=page_key)
+        
+        if entry is None:
+            raise _page_not_found()
+        
+        return cached_response(request, entry)
+else:
+    @router.get("/public/bundle/")
+    @query_budget(2)
+    def get_public_bundle(
+        request: Request,
+        keys: str = Query("navigation,footer", description="page_keys separados por comas"),
+        plans: bool = Query(False, description="Incluir planes activos"),
+        db: Session = Depends(get_db)
+    ):
+        """Obtener varias páginas públicas (y opcionalmente los planes) en una sola respuesta"""
+        page_keys = _parse_bundle_keys(keys)
+        entry = crud_page_content.get_public_bundle(db, page_keys=page_keys, include_plans=plans)
+        return cached_response(request, entry)
+
+    @router.get("/public/{page_key}/", response_model=PageContentResponse)
+    def get_public_page_content(
+        page_key: str,
+        request: Request,
+        fields: Optional[str] = Query(None, description="Secciones de content_json separadas por comas"),
+        db: Session = Depends(get_db)
+    ):
+        """Obtener contenido público de una página (soporta ETag / If-Modified-Since)"""
+        section_fields = _parse_fields(fields)
+        if section_fields:
+            # Solo las secciones pedidas (proyectadas en la DB en Postgres)
+            entry = crud_page_content.get_public_projection(db, page_key=page_key, fields=section_fields)
+            if entry is None:
+                raise _page_not_found()
+            return cached_response(request, entry)
+        
+        entry = crud_page_content.get_public_cached(page_key=page_key)
+        
+        if entry is None and _is_conditional(request):
+            # Revalidación con caché fría: basta con consultar la versión
+            version = crud_page_content.get_public_version(db, page_key=page_key)
+            if version is not None and is_not_modified(request, *version):
+                return not_modified(*version)
+        
+        if entry is None:
+            entry = crud_page_content.get_public_serialized(db, page_key=page_key)
+        
+        if entry is None:
+            raise _page_not_found()
+        
+        return cached_response(request, entry)
 
 # APIs de Administración
 @router.get("/admin/", response_model=List[PageContentResponse])
+@query_budget(2)
 def get_all_page_contents(
+    response: Response,
+    is_active: Optional[bool] = Query(None, description="Filtrar por estado"),
+    sort: str = Query("page_key", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(settings.LIST_MAX_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     """Obtener todo el contenido de páginas (admin)"""
-    contents = crud_page_content.get_multi(db)
+    contents = list_or_400(
+        crud_page_content, db, response,
+        filters={"is_active": is_active}, sort=sort, cursor=cursor, limit=limit
+    )
     return contents
 
+@router.get("/admin/cache-stats/")
+def get_cache_stats(
+    current_user = Depends(get_current_admin_user)
+):
+    """Estadísticas de las cachés en memoria de este worker (admin)"""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@router.get("/admin/static-export/")
+def get_static_export_status(
+    current_user = Depends(get_current_admin_user)
+):
+    """Estado de la exportación estática (release publicada, último resultado)"""
+    return static_exporter.status()
+
+@router.post("/admin/static-export/", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_static_export(
+    force: bool = Query(False, description="Reescribir todos los ficheros, no solo los que cambiaron"),
+    current_user = Depends(get_current_admin_user)
+):
+    """Lanza en segundo plano la exportación estática del contenido público"""
+    return {"status": static_exporter.trigger(force=force)}
+
 @router.get("/admin/{page_key}/", response_model=PageContentResponse)
 def get_page_content_admin(
     page_key: str,
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
-    """Obtener contenido específico de página (admin)"""
+    """Obtener contenido específico de página (admin); el ETag es la versión"""
     content = crud_page_content.get_by_page_key(db, page_key=page_key)
     
     if not content:
@@ -55,6 +246,7 @@ def get_page_content_admin(
             detail="Page content not found"
         )
     
+    response.headers["ETag"] = _version_etag(content.version)
     return content
 
 @router.post("/admin/", response_model=PageContentResponse)
@@ -72,7 +264,7 @@ def create_page_content(
             detail="Page content already exists for this page_key"
         )
     
-    content = crud_page_content.create(db, obj_in=content_data)
+    content = crud_page_content.create(db, obj_in=content_data, author_id=current_user.id)
     return content
 
 @router.put("/admin/{page_key}/", response_model=PageContentResponse)
@@ -91,7 +283,134 @@ def update_page_content(
             detail="Page content not found"
         )
     
-    content = crud_page_content.update(db, db_obj=content, obj_in=content_data)
+    try:
+        content = crud_page_content.update(
+            db, db_obj=content, obj_in=content_data, author_id=current_user.id
+        )
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Page content was modified concurrently, reload and retry"
+        )
+    return content
+
+@router.patch("/admin/{page_key}/", response_model=PageContentPatchResult)
+def patch_page_content(
+    page_key: str,
+    request: Request,
+    response: Response,
+    patch: Union[List[Dict[str, Any]], Dict[str, Any]] = Body(...),
+    path: str = Query("", description="Sección de content_json (JSON Pointer, p. ej. /hero)"),
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Actualización parcial de content_json. El cuerpo es un JSON Patch
+    (RFC 6902, `application/json-patch+json`, un array de operaciones) o un
+    merge patch (RFC 7396, `application/merge-patch+json`, un objeto) que se
+    aplica en la sección `path`. Requiere If-Match con la versión actual.
+    """
+    expected_version = _parse_if_match(if_match)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        base = parse_pointer(path)
+        if content_type == "application/json-patch+json" or isinstance(patch, list):
+            ops = compile_json_patch(patch, base)
+        else:
+            ops = compile_merge_patch(patch, base)
+        result = crud_page_content.patch_content(
+            db, page_key=page_key, ops=ops, expected_version=expected_version,
+            author_id=current_user.id
+        )
+    except InvalidPatch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except PatchConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"Page content was modified (current version {e.current_version})",
+            headers={"ETag": _version_etag(e.current_version)}
+        )
+
+    if result is None:
+        raise _page_not_found()
+    response.headers["ETag"] = _version_etag(result.version)
+    return result
+
+# Historial de versiones
+@router.post("/admin/revisions/compact/")
+def compact_page_revisions(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Aplica ahora la retención del historial (lo mismo que la tarea periódica)"""
+    return page_revision.compact_all(db)
+
+@router.get("/admin/{page_key}/revisions/", response_model=List[PageContentRevisionResponse])
+@query_budget(3)
+def list_page_revisions(
+    page_key: str,
+    response: Response,
+    kind: Optional[str] = Query(None, description="snapshot | delta"),
+    sort: str = Query("-version", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(settings.LIST_MAX_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Historial de versiones de una página (sin contenido)"""
+    content = crud_page_content.get_by_page_key(db, page_key=page_key)
+    if not content:
+        raise _page_not_found()
+    return list_or_400(
+        page_revision, db, response,
+        filters={"page_id": content.id, "kind": kind}, sort=sort, cursor=cursor, limit=limit
+    )
+
+@router.get("/admin/{page_key}/revisions/{version}/", response_model=PageContentRevisionState)
+def get_page_revision(
+    page_key: str,
+    version: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Estado de la página en una versión (snapshot + deltas)"""
+    content = crud_page_content.get_by_page_key(db, page_key=page_key)
+    if not content:
+        raise _page_not_found()
+    state = page_revision.get_state(db, page_id=content.id, version=version)
+    if state is None:
+        raise _revision_not_found()
+    return PageContentRevisionState(page_key=page_key, version=version, **state)
+
+@router.post("/admin/{page_key}/revisions/{version}/restore/", response_model=PageContentResponse)
+def restore_page_revision(
+    page_key: str,
+    version: int,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Restaura una versión anterior; se guarda como una versión nueva"""
+    content = crud_page_content.get_by_page_key(db, page_key=page_key)
+    if not content:
+        raise _page_not_found()
+    try:
+        content = crud_page_content.restore_revision(
+            db, db_obj=content, version=version, author_id=current_user.id
+        )
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Page content was modified concurrently, reload and retry"
+        )
+    if content is None:
+        raise _revision_not_found()
+    response.headers["ETag"] = _version_etag(content.version)
     return content
 
 @router.post("/admin/seed-missing/")
@@ -291,7 +610,8 @@ def seed_missing_pages(
                 meta_description=page_data.get('meta_description', ''),
                 meta_keywords=page_data.get('meta_keywords', ''),
                 is_active=True
-            )
+            ),
+            author_id=current_user.id
         )
         created_pages.append({
             'page_key': page_key,
@@ -2,10 +2,16 @@
 Endpoints de gestión de planes de servicio
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from api.v1.listing import list_or_400
+from core.config import settings
+from core.http_cache import cached_response
+from core.query_guard import query_budget
+from db.async_session import get_async_db
 from db.session import get_db
 from security.deps import get_current_admin_user
 from crud import service_plan as crud_plans
@@ -13,21 +19,39 @@ from schemas.plans import ServicePlanCreate, ServicePlanUpdate, ServicePlanRespo
 
 router = APIRouter()
 
-# APIs Públicas
-@router.get("/public/", response_model=List[ServicePlanResponse])
-def get_public_plans(db: Session = Depends(get_db)):
-    """Obtener planes públicos activos"""
-    plans = crud_plans.get_active_plans(db)
-    return plans
+# APIs Públicas (async o sync según DB_ASYNC_MODE)
+if settings.DB_ASYNC_MODE:
+    @router.get("/public/", response_model=List[ServicePlanResponse])
+    @query_budget(1)
+    async def get_public_plans(request: Request, db: AsyncSession = Depends(get_async_db)):
+        """Obtener planes públicos activos (soporta ETag / If-None-Match)"""
+        entry = await crud_plans.aget_public_serialized(db)
+        return cached_response(request, entry)
+else:
+    @router.get("/public/", response_model=List[ServicePlanResponse])
+    @query_budget(1)
+    def get_public_plans(request: Request, db: Session = Depends(get_db)):
+        """Obtener planes públicos activos (soporta ETag / If-None-Match)"""
+        entry = crud_plans.get_public_serialized(db)
+        return cached_response(request, entry)
 
 # APIs de Administración
 @router.get("/admin/", response_model=List[ServicePlanResponse])
+@query_budget(2)
 def get_admin_plans(
+    response: Response,
+    is_active: Optional[bool] = Query(None, description="Filtrar por estado"),
+    sort: str = Query("display_order", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor)"),
+    limit: int = Query(settings.LIST_MAX_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin_user)
 ):
     """Obtener todos los planes (admin)"""
-    plans = crud_plans.get_multi(db)
+    plans = list_or_400(
+        crud_plans, db, response,
+        filters={"is_active": is_active}, sort=sort, cursor=cursor, limit=limit
+    )
     return plans
 
 @router.post("/admin/", response_model=ServicePlanResponse)
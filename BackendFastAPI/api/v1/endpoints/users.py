@@ -4,36 +4,64 @@ Endpoints de gestión de usuarios
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from core.config import settings
+from core.query_guard import query_budget
 from db.session import get_db
 from security.deps import get_current_admin_user
 from crud import user as crud_user
+from crud.pagination import InvalidListQuery
 from schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
 from models.user import UserRole
 
 router = APIRouter()
 
 @router.get("/", response_model=UserListResponse)
+@query_budget(4)
 def get_users(
     page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=100),
+    per_page: int = Query(10, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
     search: str = Query("", description="Buscar por username, email o nombre"),
     role: UserRole = Query(None, description="Filtrar por rol"),
+    sort: str = Query("-date_joined", description="Campo de orden (prefijo '-' = descendente)"),
+    cursor: Optional[str] = Query(None, description="Cursor keyset (next_cursor de la página anterior)"),
     current_user = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Obtener lista de usuarios (solo admins)"""
-    # Por simplicidad, implementamos paginación básica
-    # En producción, usarías una implementación más robusta
-    users = crud_user.get_multi(db, skip=(page - 1) * per_page, limit=per_page)
-    total = len(crud_user.get_multi(db, skip=0, limit=1000))  # Simplificado
+    """Obtener lista de usuarios (solo admins), más recientes primero"""
+    query = crud_user.apply_filters(
+        crud_user.search_query(db, search=search), {"role": role}
+    )
+    
+    try:
+        result = crud_user.list(
+            db,
+            query=query,
+            sort=sort,
+            cursor=cursor,
+            limit=per_page,
+            offset=(page - 1) * per_page
+        )
+    except InvalidListQuery as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # Sin filtros el total puede salir de la estimación del planner (tablas grandes)
+    if search or role is not None:
+        total, total_is_estimate = crud_user.count(db, query=query), False
+    else:
+        total, total_is_estimate = crud_user.estimate_count(db)
     
     return UserListResponse(
-        users=users,
+        users=result.items,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        total_is_estimate=total_is_estimate,
+        next_cursor=result.next_cursor
     )
 
 @router.post("/", response_model=UserResponse)
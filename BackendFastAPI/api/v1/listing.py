@@ -0,0 +1,30 @@
+"""
+Helpers compartidos por los listados de administración
+
+Los listados conservan su forma (una lista JSON) y exponen el cursor de la
+página siguiente en la cabecera X-Next-Cursor.
+"""
+
+from typing import Any, List
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from crud.base import CRUDBase
+from crud.pagination import InvalidListQuery
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def list_or_400(crud: CRUDBase, db: Session, response: Response, **params: Any) -> List[Any]:
+    """Ejecuta `crud.list(**params)`; parámetros inválidos -> 400"""
+    try:
+        result = crud.list(db, **params)
+    except InvalidListQuery as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if result.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = result.next_cursor
+    return result.items
@@ -0,0 +1,87 @@
+"""
+Benchmark de compresión de respuestas: CPU frente a bytes ahorrados
+
+Para los cuerpos públicos típicos (una página con content_json grande, la
+lista de planes y el bundle de navegación + footer + planes) mide, por
+codificación y nivel, el tiempo de compresión, el tamaño resultante y los
+bytes ahorrados por milisegundo de CPU. Sirve para elegir
+COMPRESSION_*_LEVEL (por petición) y COMPRESSION_PRECOMPRESS_* (una vez
+por cambio, en la caché).
+
+Uso:
+    python bench_compression.py
+    python bench_compression.py --content-kb 64 --number 50
+"""
+
+import argparse
+import sys
+import timeit
+from typing import Dict, List, Tuple
+
+from pydantic import TypeAdapter
+
+from bench_json_rendering import build_page, build_plans
+from core.compression import AVAILABLE_ENCODINGS, compress
+from core.config import settings
+from core.responses import render_json
+from schemas.page_content import PageContentResponse
+from schemas.plans import ServicePlanResponse
+
+LEVELS: Dict[str, Tuple[int, ...]] = {
+    "gzip": (1, 6, 9),
+    "br": (1, 4, 6, 9, 11),
+}
+
+
+def sample_bodies(content_kb: int, plans: int) -> List[Tuple[str, bytes]]:
+    page = render_json(TypeAdapter(PageContentResponse).validate_python(build_page(content_kb), from_attributes=True))
+    nav = render_json(TypeAdapter(PageContentResponse).validate_python(build_page(4), from_attributes=True))
+    plan_list = render_json(
+        TypeAdapter(List[ServicePlanResponse]).validate_python(build_plans(plans), from_attributes=True)
+    )
+    bundle = b'{"pages":{"navigation":' + nav + b',"footer":' + nav + b'},"plans":' + plan_list + b'}'
+    return [
+        ("page-content/public/homepage", page),
+        ("plans/public", plan_list),
+        ("page-content/public/bundle?plans=true", bundle),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de compresión gzip/brotli")
+    parser.add_argument("--content-kb", type=int, default=32, help="Tamaño aproximado de content_json")
+    parser.add_argument("--plans", type=int, default=20, help="Número de planes")
+    parser.add_argument("--number", type=int, default=20, help="Iteraciones por medición")
+    args = parser.parse_args()
+
+    if "br" not in AVAILABLE_ENCODINGS:
+        print("⚠️ brotli no está instalado: solo se mide gzip")
+
+    configured = {
+        ("gzip", settings.COMPRESSION_GZIP_LEVEL): "dynamic",
+        ("br", settings.COMPRESSION_BROTLI_QUALITY): "dynamic",
+        ("gzip", settings.COMPRESSION_PRECOMPRESS_GZIP_LEVEL): "precompress",
+        ("br", settings.COMPRESSION_PRECOMPRESS_BROTLI_QUALITY): "precompress",
+    }
+
+    for name, body in sample_bodies(args.content_kb, args.plans):
+        print(f"\n📊 {name} ({len(body) / 1024:.1f} KB sin comprimir)")
+        print(f"   {'encoding':<8} {'nivel':>5} {'ms':>8} {'KB':>8} {'ratio':>6} {'KB ahorrados/ms':>16}")
+        for encoding in AVAILABLE_ENCODINGS:
+            for level in LEVELS[encoding]:
+                compressed = compress(body, encoding, level=level)
+                seconds = min(timeit.repeat(
+                    lambda: compress(body, encoding, level=level), number=args.number, repeat=3
+                )) / args.number
+                ms = seconds * 1000
+                saved_kb = (len(body) - len(compressed)) / 1024
+                note = configured.get((encoding, level), "")
+                print(
+                    f"   {encoding:<8} {level:>5} {ms:8.2f} {len(compressed) / 1024:8.1f} "
+                    f"{len(body) / len(compressed):6.1f} {saved_kb / ms:16.1f}  {note}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
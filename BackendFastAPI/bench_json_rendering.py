@@ -0,0 +1,139 @@
+"""
+Micro-benchmark del coste de serialización de las respuestas de lectura
+
+Para cada endpoint compara, con los mismos datos:
+
+* fastapi:  el camino por defecto (validación con response_model +
+            jsonable_encoder + json.dumps), lo que pagaría cada petición
+            sin caché.
+* stdlib:   `dumps_stdlib` sobre el modelo ya validado.
+* orjson:   `dumps_orjson` sobre el modelo ya validado (si está instalado).
+* cached:   respuesta desde bytes precomputados (CachedBody), el camino de
+            los endpoints públicos con la caché caliente.
+
+Comprueba además que todos los caminos producen exactamente los mismos bytes.
+No toca la base de datos: construye objetos ORM transitorios.
+
+Uso:
+    python bench_json_rendering.py
+    python bench_json_rendering.py --content-kb 64 --plans 50 --number 500
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+from core.http_cache import CachedBody, etag_for_body
+from core.responses import dumps_orjson, dumps_stdlib, orjson
+from models.page_content import PageContent
+from models.plans import ServicePlan
+from schemas.page_content import PageContentResponse
+from schemas.plans import ServicePlanResponse
+
+
+def build_page(content_kb: int) -> PageContent:
+    """Página con un content_json de ~content_kb KB (secciones anidadas)"""
+    sections = []
+    size = 0
+    i = 0
+    while size < content_kb * 1024:
+        section = {
+            "id": f"section-{i}",
+            "title": f"Sección {i}: servicios para tu empresa",
+            "body": "Texto de ejemplo con acentos — áéíóú ñ " * 4,
+            "items": [{"label": f"Elemento {j}", "href": f"/servicios/{i}/{j}", "visible": True} for j in range(5)],
+            "order": i,
+        }
+        size += len(json.dumps(section, ensure_ascii=False))
+        sections.append(section)
+        i += 1
+    now = datetime.now(timezone.utc)
+    return PageContent(
+        id=1, page_key="homepage", title="Inicio", content_json={"sections": sections},
+        meta_title="Inicio", meta_description="", meta_keywords="", is_active=True, version=1,
+        created_at=now, updated_at=now
+    )
+
+
+def build_plans(count: int) -> List[ServicePlan]:
+    now = datetime.now(timezone.utc)
+    return [
+        ServicePlan(
+            id=i, name=f"Plan {i}", slug=f"plan-{i}", description="Plan de ejemplo " * 10,
+            price_monthly=Decimal("29.99") + i, price_yearly=Decimal("299.90") + i * 10,
+            monthly_savings=Decimal("16.67"), max_users=5, max_courses=10, storage_gb=10,
+            api_requests_limit=10000, features=[f"Característica {j}" for j in range(8)],
+            color_primary="#3B82F6", color_secondary="#1E40AF", is_active=True,
+            is_popular=i == 1, display_order=i, created_at=now, updated_at=now
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def fastapi_path(adapter: TypeAdapter, objects) -> Callable[[], bytes]:
+    """Lo que hace FastAPI por petición con response_model y JSONResponse"""
+    def render() -> bytes:
+        value = adapter.validate_python(objects, from_attributes=True)
+        content = adapter.dump_python(value, mode="json")
+        return JSONResponse(content=jsonable_encoder(content)).body
+    return render
+
+
+def run_endpoint(name: str, adapter: TypeAdapter, objects, number: int) -> bool:
+    validated = adapter.validate_python(objects, from_attributes=True)
+    body = dumps_stdlib(validated)
+    entry = CachedBody(body=body, etag=etag_for_body(body))
+
+    candidates: Dict[str, Callable[[], bytes]] = {
+        "fastapi": fastapi_path(adapter, objects),
+        "stdlib": lambda: dumps_stdlib(validated),
+    }
+    if orjson is not None:
+        candidates["orjson"] = lambda: dumps_orjson(validated)
+    candidates["cached"] = lambda: Response(content=entry.body, media_type="application/json").body
+
+    print(f"\n📊 {name} ({len(body) / 1024:.1f} KB)")
+    ok = True
+    baseline = None
+    for label, render in candidates.items():
+        if render() != body:
+            print(f"   ❌ {label}: output differs from the stdlib encoding")
+            ok = False
+            continue
+        seconds = min(timeit.repeat(render, number=number, repeat=3)) / number
+        baseline = baseline or seconds
+        print(f"   {label:<8} {seconds * 1e6:10.1f} µs/req   x{baseline / seconds:6.1f}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON por endpoint")
+    parser.add_argument("--content-kb", type=int, default=32, help="Tamaño aproximado de content_json")
+    parser.add_argument("--plans", type=int, default=20, help="Número de planes en la lista pública")
+    parser.add_argument("--number", type=int, default=200, help="Iteraciones por medición")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("⚠️ orjson no está instalado: solo se miden los caminos stdlib")
+
+    ok = run_endpoint(
+        "GET /api/v1/page-content/public/{page_key}/",
+        TypeAdapter(PageContentResponse), build_page(args.content_kb), args.number
+    )
+    ok = run_endpoint(
+        "GET /api/v1/plans/public/",
+        TypeAdapter(List[ServicePlanResponse]), build_plans(args.plans), args.number
+    ) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark de arranque en frío de un worker
+
+Lanza N intérpretes nuevos por modo de arranque (STARTUP_MODE) que importan
+`main` y ejecutan el lifespan completo, y mide el tiempo hasta READY desde
+fuera del proceso (incluye el arranque del intérprete) junto con las fases
+que registra core.startup (imports, schema_check / create_all, prewarm...).
+Es el tiempo que tarda en servir un worker nuevo al escalar.
+
+El modo production necesita una DB migrada (`alembic upgrade head`).
+
+Uso:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --modes production
+    python bench_startup.py --imports 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+CHILD = """
+import asyncio, json
+import main
+from core.startup import startup_timings
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        print("BENCH " + json.dumps(startup_timings), flush=True)
+
+asyncio.run(boot())
+"""
+
+
+def boot_once(mode: str) -> Optional[Dict[str, Any]]:
+    """Un arranque en un proceso nuevo; None si el worker no llega a READY"""
+    env = dict(os.environ, STARTUP_MODE=mode, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", CHILD], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8"
+    )
+    timings = None
+    output = []
+    for line in process.stdout:
+        if line.startswith("BENCH "):
+            timings = json.loads(line[6:])
+            timings["ready"] = round((time.perf_counter() - start) * 1000, 2)
+        else:
+            output.append(line.rstrip())
+    process.wait()
+    if timings is None:
+        print(f"❌ {mode}: el worker no arrancó")
+        print("\n".join("   " + line for line in output[-5:]))
+    return timings
+
+
+def slowest_imports(limit: int) -> List[str]:
+    """Módulos con más tiempo acumulado en `import main` (-X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, encoding="utf-8"
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            rows.append((int(parts[1]), len(name) - len(name.lstrip()), name.strip()))
+    # Solo los imports directos de main (un nivel más de sangría que main)
+    depth = next((indent for _, indent, name in rows if name == "main"), 1) + 2
+    top = sorted(((us, name) for us, indent, name in rows if indent == depth), reverse=True)
+    return [f"{us / 1000:8.1f} ms  {name}" for us, name in top[:limit]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío por worker")
+    parser.add_argument("--runs", type=int, default=5, help="Arranques por modo")
+    parser.add_argument("--modes", default="development,production", help="Modos separados por comas")
+    parser.add_argument("--imports", type=int, default=0, help="Mostrar los N imports más lentos")
+    args = parser.parse_args()
+
+    for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+        runs = []
+        for _ in range(args.runs):
+            timings = boot_once(mode)
+            if timings is None:
+                break
+            runs.append(timings)
+        if not runs:
+            continue
+
+        print(f"\n📊 {mode} ({len(runs)} arranques)")
+        print(f"   {'fase':<16} {'mediana ms':>11} {'min':>9} {'max':>9}")
+        phases = ["ready", "imports", "lifespan"] + sorted(
+            {phase for run in runs for phase in run} - {"ready", "imports", "lifespan"}
+        )
+        for phase in phases:
+            values = [run[phase] for run in runs if phase in run]
+            print(f"   {phase:<16} {statistics.median(values):11.1f} {min(values):9.1f} {max(values):9.1f}")
+
+    if args.imports:
+        print("\n📦 Imports más lentos de main")
+        for line in slowest_imports(args.imports):
+            print(f"   {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Script para comprobar el PATCH de contenido de páginas de punta a punta
+
+Recorre la API (TestClient) contra DATABASE_URL, así que en Postgres prueba
+la ruta SQL (jsonb) y en SQLite la de lectura + aplicación en Python:
+
+* GET de admin comprimido (Accept-Encoding: br, gzip) -> PATCH con el ETag
+  recibido como If-Match, como hace un navegador.
+* Parches cuyas operaciones leen lo que escribió una anterior (RFC 6902 las
+  aplica en orden): el documento guardado tiene que ser el mismo que da
+  `apply_ops` sobre el documento previo.
+* Escrituras en arrays y claves numéricas: un índice fuera del array tiene
+  que dar 409, y una clave numérica en un objeto se crea o sustituye, como
+  en `apply_ops` (en Postgres jsonb_insert añadiría al final o fallaría).
+* Historial: reconstruir cada versión (snapshot + deltas) da exactamente el
+  documento que quedó guardado en ella.
+* El ETag público cambia con cada PATCH aunque caiga en el mismo segundo: el
+  If-None-Match anterior no puede recibir un 304.
+
+Usa una página de ALLOWED_PAGE_KEYS que no exista en la DB y la borra al
+terminar; si todas existen, hay que lanzarlo contra una base de pruebas.
+
+Uso:
+    python check_page_patch.py
+"""
+
+import json
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+
+from crud import page_content as crud_page_content
+from crud.json_patch import PatchConflict, apply_ops, compile_json_patch, compile_merge_patch
+from db.base import Base
+from db.session import SessionLocal, engine
+from models.page_content import PageContent
+from schemas.page_content import ALLOWED_PAGE_KEYS, PageContentCreate
+from security.deps import get_current_admin_user
+import main
+
+API = "/api/v1/page-content/admin"
+PUBLIC_API = "/api/v1/page-content/public"
+JSON_PATCH = {"Content-Type": "application/json-patch+json"}
+MERGE_PATCH = {"Content-Type": "application/merge-patch+json"}
+
+# Más grande que COMPRESSION_MIN_SIZE para que el GET salga comprimido
+BASE_CONTENT = {"hero": {"title": "Inicio", "text": "lorem ipsum " * 200}, "items": [1, 2, 3]}
+
+
+# (nombre, parche): lista = JSON Patch, objeto = merge patch
+SEQUENTIAL_PATCHES = [
+    ("add + add dentro", [
+        {"op": "add", "path": "/n", "value": {}},
+        {"op": "add", "path": "/n/x", "value": 1},
+    ]),
+    ("replace + copy del valor nuevo", [
+        {"op": "replace", "path": "/hero/title", "value": "y"},
+        {"op": "copy", "from": "/hero/title", "path": "/e"},
+    ]),
+    ("insert + test del elemento desplazado", [
+        {"op": "add", "path": "/items/0", "value": 0},
+        {"op": "test", "path": "/items/1", "value": 1},
+    ]),
+    ("move encadenado", [
+        {"op": "move", "from": "/e", "path": "/f"},
+        {"op": "move", "from": "/f", "path": "/g"},
+    ]),
+    ("test + replace (camino SQL)", [
+        {"op": "test", "path": "/g", "value": "y"},
+        {"op": "replace", "path": "/g", "value": "z"},
+    ]),
+    ("merge patch", {"hero": {"subtitle": "s", "title": None}, "n": None}),
+]
+
+# (nombre, parche) aplicados uno a uno; el resultado esperado sale de apply_ops
+CONTAINER_PATCHES = [
+    ("add fuera del array", [{"op": "add", "path": "/items/99", "value": 9}]),
+    ("add de clave no numérica en array", [{"op": "add", "path": "/items/x", "value": 9}]),
+    ("replace fuera del array", [{"op": "replace", "path": "/items/99", "value": 9}]),
+    ("add de clave numérica en objeto", [{"op": "add", "path": "/hero/0", "value": "a"}]),
+    ("add de clave numérica existente", [{"op": "add", "path": "/hero/0", "value": "b"}]),
+    ("add al final del array", [{"op": "add", "path": "/items/-", "value": 4}]),
+    ("copy al final del array", [{"op": "copy", "from": "/hero/0", "path": "/items/-"}]),
+    ("add en el índice len", [{"op": "add", "path": "/items/6", "value": 6}]),
+    ("add bajo un escalar", [{"op": "add", "path": "/items/0/x", "value": 1}]),
+]
+
+
+def _free_page_key(db) -> Optional[str]:
+    used = {page_key for (page_key,) in db.query(PageContent.page_key)}
+    return next((key for key in ALLOWED_PAGE_KEYS if key not in used), None)
+
+
+def check_compressed_etag(client: TestClient, page_key: str) -> List[str]:
+    """El ETag de un GET comprimido sirve como If-Match del PATCH"""
+    response = client.get(f"{API}/{page_key}/", headers={"Accept-Encoding": "br, gzip"})
+    etag = response.headers.get("etag")
+    print(f"[INFO] GET comprimido: {response.status_code} ETag {etag} ({response.headers.get('content-encoding')})")
+    if response.headers.get("content-encoding") is None:
+        return ["the admin GET was not compressed, COMPRESSION_ENABLED/COMPRESSION_MIN_SIZE?"]
+    patch = [{"op": "replace", "path": "/hero/title", "value": "Inicio (etag)"}]
+    response = client.patch(
+        f"{API}/{page_key}/", content=json.dumps(patch), headers={**JSON_PATCH, "If-Match": etag}
+    )
+    if response.status_code != 200:
+        return [f"PATCH with If-Match {etag}: {response.status_code} {response.text}"]
+    return []
+
+
+def check_sequential_patches(client: TestClient, page_key: str, stored: Dict[int, Any]) -> List[str]:
+    """
+    Cada parche deja el mismo documento que aplicarlo en Python, en orden.
+    Anota en `stored` el documento guardado en cada versión.
+    """
+    failures = []
+    for name, patch in SEQUENTIAL_PATCHES:
+        before = client.get(f"{API}/{page_key}/").json()["content_json"]
+        if isinstance(patch, list):
+            expected, headers = apply_ops(before, compile_json_patch(patch)), JSON_PATCH
+        else:
+            expected, headers = apply_ops(before, compile_merge_patch(patch)), MERGE_PATCH
+        response = client.patch(
+            f"{API}/{page_key}/", content=json.dumps(patch), headers={**headers, "If-Match": "*"}
+        )
+        current = client.get(f"{API}/{page_key}/").json()
+        after = current["content_json"]
+        stored[current["version"]] = after
+        if response.status_code != 200:
+            failures.append(f"{name}: {response.status_code} {response.text}")
+        elif after != expected:
+            failures.append(f"{name}: stored {json.dumps(after)[:200]} != expected {json.dumps(expected)[:200]}")
+        else:
+            print(f"[INFO] {name}: OK")
+    return failures
+
+
+def check_container_writes(client: TestClient, page_key: str) -> List[str]:
+    """Mismo resultado (409 o documento) que apply_ops al escribir en arrays y objetos"""
+    failures = []
+    for name, patch in CONTAINER_PATCHES:
+        before = client.get(f"{API}/{page_key}/").json()["content_json"]
+        try:
+            expected = apply_ops(before, compile_json_patch(patch))
+        except PatchConflict:
+            expected = None
+        response = client.patch(
+            f"{API}/{page_key}/", content=json.dumps(patch), headers={**JSON_PATCH, "If-Match": "*"}
+        )
+        after = client.get(f"{API}/{page_key}/").json()["content_json"]
+        if expected is None and response.status_code != 409:
+            failures.append(f"{name}: {response.status_code} {response.text}, expected 409")
+        elif expected is not None and (response.status_code != 200 or after != expected):
+            failures.append(f"{name}: {response.status_code}, stored {json.dumps(after)[:200]}")
+        else:
+            print(f"[INFO] {name}: {response.status_code}")
+    return failures
+
+
+def check_revisions(client: TestClient, page_key: str, stored: Dict[int, Any]) -> List[str]:
+    """El historial reconstruye el documento guardado en cada versión"""
+    failures = []
+    for version, document in sorted(stored.items()):
+        response = client.get(f"{API}/{page_key}/revisions/{version}/")
+        if response.status_code != 200:
+            failures.append(f"revision {version}: {response.status_code} {response.text}")
+        elif response.json()["content_json"] != document:
+            failures.append(f"revision {version}: replayed content differs from the stored row")
+    if not failures:
+        print(f"[INFO] Historial: {len(stored)} versiones reconstruidas correctamente")
+    return failures
+
+
+def check_public_etag(client: TestClient, page_key: str) -> List[str]:
+    """Tras un PATCH, el If-None-Match anterior recibe el contenido nuevo (200)"""
+    etag = client.get(f"{PUBLIC_API}/{page_key}/").headers.get("etag")
+    patch = [{"op": "add", "path": "/hero/title", "value": "Inicio (revalidación)"}]
+    response = client.patch(
+        f"{API}/{page_key}/", content=json.dumps(patch), headers={**JSON_PATCH, "If-Match": "*"}
+    )
+    if response.status_code != 200:
+        return [f"PATCH before revalidation: {response.status_code} {response.text}"]
+    response = client.get(f"{PUBLIC_API}/{page_key}/", headers={"If-None-Match": etag})
+    if response.status_code != 200:
+        return [f"If-None-Match {etag} after a PATCH: {response.status_code}, expected 200"]
+    print(f"[INFO] ETag público tras el PATCH: {etag} -> {response.headers.get('etag')}")
+    return []
+
+
+def main_check() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    page_key = _free_page_key(db)
+    if page_key is None:
+        db.close()
+        print("[ERROR] Todas las páginas existen; usar una base de datos de pruebas")
+        return 1
+
+    print(f"[INFO] Página temporal '{page_key}' ({engine.dialect.name})")
+    page = crud_page_content.create(
+        db, obj_in=PageContentCreate(page_key=page_key, title="check", content_json=BASE_CONTENT)
+    )
+    main.app.dependency_overrides[get_current_admin_user] = lambda: SimpleNamespace(id=None, is_active=True)
+    failures: List[str] = []
+    try:
+        with TestClient(main.app) as client:
+            failures += check_compressed_etag(client, page_key)
+            stored: Dict[int, Any] = {}
+            failures += check_sequential_patches(client, page_key, stored)
+            failures += check_container_writes(client, page_key)
+            failures += check_revisions(client, page_key, stored)
+            failures += check_public_etag(client, page_key)
+    finally:
+        main.app.dependency_overrides.pop(get_current_admin_user, None)
+        db.expire_all()  # La API la modificó en otra sesión
+        crud_page_content.remove(db, id=page.id)
+        db.close()
+
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    if failures:
+        return 1
+    print("[OK] PATCH de contenido correcto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,169 @@
+"""
+Script para comprobar los totales y la paginación de los listados
+
+Siembra filas marcadas (dominio @pagination-check.invalid) contra
+DATABASE_URL, las comprueba a través del CRUD y de la API (TestClient) y las
+borra al terminar:
+
+* COUNT de la tabla sin filtros y de una consulta filtrada: tiene que dar el
+  número real de filas (con más de una).
+* Paginación por cursor (keyset) de páginas de PAGE_SIZE filas ordenadas por
+  created_at / date_joined: las filas sembradas comparten segundo (mismo
+  INSERT con server_default), así que la frontera cae en un empate. Cada
+  fila tiene que salir exactamente una vez y el recorrido terminar.
+* Un cursor manipulado (valor de otro tipo) devuelve 400, no 500.
+
+Uso:
+    python check_pagination.py
+"""
+
+import base64
+import json
+import sys
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from crud import contact_message, user as crud_user
+from db.base import Base
+from db.session import SessionLocal, engine
+from models.contact import ContactMessage
+from models.user import User, UserRole
+from security.deps import get_current_admin_user
+import main
+
+SEED_DOMAIN = "pagination-check.invalid"
+SEED_PREFIX = "pagination-check-"
+SEED_ROWS = 7
+PAGE_SIZE = 3
+
+
+def seed(db: Session) -> None:
+    db.execute(insert(User), [
+        {
+            "username": f"{SEED_PREFIX}{i}@{SEED_DOMAIN}",
+            "email": f"{SEED_PREFIX}{i}@{SEED_DOMAIN}",
+            "password_hash": "!",
+            "role": UserRole.VIEWER,
+        }
+        for i in range(SEED_ROWS)
+    ])
+    db.execute(insert(ContactMessage), [
+        {
+            "name": f"Lead {i}",
+            "email": f"lead{i}@{SEED_DOMAIN}",
+            "subject": "Pagination check",
+            "message": "Synthetic message",
+        }
+        for i in range(SEED_ROWS)
+    ])
+    db.commit()
+
+
+def cleanup(db: Session) -> None:
+    db.query(ContactMessage).filter(ContactMessage.email.like(f"%@{SEED_DOMAIN}")).delete(synchronize_session=False)
+    db.query(User).filter(User.email.like(f"%@{SEED_DOMAIN}")).delete(synchronize_session=False)
+    db.commit()
+
+
+def check_counts(client: TestClient, db: Session) -> List[str]:
+    """COUNT sin filtros y filtrado == filas reales"""
+    failures = []
+    expected = {
+        "users": len(db.query(User.id).all()),
+        "contact": len(db.query(ContactMessage.id).all()),
+        "users filtered": SEED_ROWS,
+    }
+    counted = {
+        "users": crud_user.count(db),
+        "contact": contact_message.count(db),
+        "users filtered": crud_user.count(db, query=crud_user.search_query(db, search=SEED_PREFIX)),
+    }
+    response = client.get("/api/v1/users/", params={"per_page": 1})
+    expected["GET /users total"], counted["GET /users total"] = expected["users"], response.json().get("total")
+    response = client.get("/api/v1/users/", params={"per_page": 1, "search": SEED_PREFIX})
+    expected["GET /users?search total"], counted["GET /users?search total"] = SEED_ROWS, response.json().get("total")
+
+    for name, total in counted.items():
+        if total != expected[name]:
+            failures.append(f"count {name}: {total} != {expected[name]}")
+    if not failures:
+        print(f"[INFO] Totales: {counted}")
+    return failures
+
+
+def _walk_pages(fetch: Callable[[Optional[str]], Tuple[List[int], Optional[str]]], max_pages: int) -> List[int]:
+    """Ids de todas las páginas siguiendo el cursor (como mucho `max_pages`)"""
+    ids, cursor = [], None
+    for _ in range(max_pages):
+        page, cursor = fetch(cursor)
+        ids += page
+        if not cursor:
+            break
+    return ids
+
+
+def check_keyset(client: TestClient, db: Session) -> List[str]:
+    """Cada fila sale una vez al paginar por cursor, con empates en la frontera"""
+    failures = []
+
+    def contact_page(cursor):
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/contact/admin/", params=params)
+        return [message["id"] for message in response.json()], response.headers.get("x-next-cursor")
+
+    def users_page(cursor):
+        params = {"per_page": PAGE_SIZE, "sort": "-date_joined", **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/v1/users/", params=params).json()
+        return [user["id"] for user in body["users"]], body["next_cursor"]
+
+    listings = [
+        ("contact admin", contact_page, ContactMessage),
+        ("users -date_joined", users_page, User),
+    ]
+    for name, fetch, model in listings:
+        expected = {id_ for (id_,) in db.query(model.id)}
+        ids = _walk_pages(fetch, len(expected) // PAGE_SIZE + 2)
+        if len(ids) != len(set(ids)) or set(ids) != expected:
+            failures.append(f"{name}: paged ids {ids}, expected each of {sorted(expected)} once")
+        else:
+            print(f"[INFO] {name}: {len(ids)} filas en páginas de {PAGE_SIZE}")
+
+    forged = [["-created_at", "yesterday", 1], ["-created_at", {"dt": "not a date"}, 1], ["-created_at", None, 1]]
+    for values in forged:
+        token = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+        response = client.get("/api/v1/contact/admin/", params={"cursor": token})
+        if response.status_code != 400:
+            failures.append(f"forged cursor {values}: {response.status_code}, expected 400")
+    return failures
+
+
+def main_check() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    print(f"[INFO] Sembrando {SEED_ROWS} usuarios y mensajes ({engine.dialect.name})")
+    seed(db)
+    main.app.dependency_overrides[get_current_admin_user] = lambda: SimpleNamespace(id=None, is_active=True)
+    failures: List[str] = []
+    try:
+        with TestClient(main.app) as client:
+            failures += check_counts(client, db)
+            failures += check_keyset(client, db)
+    finally:
+        main.app.dependency_overrides.pop(get_current_admin_user, None)
+        cleanup(db)
+        db.close()
+
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    if failures:
+        return 1
+    print("[OK] Totales y paginación correctos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,252 @@
+"""
+Script para comprobar los planes de ejecución de las consultas CRUD calientes
+
+Ejecuta cada consulta a través del propio código CRUD, captura el SQL emitido
+y lo pasa por EXPLAIN (Postgres) o EXPLAIN QUERY PLAN (SQLite). Falla (exit 1)
+si alguna cae en un recorrido secuencial de su tabla, o en una ordenación
+explícita cuando debería recorrer el índice en orden.
+
+Los planes solo son significativos con datos: cada consulta tiene un umbral
+de filas (`min_rows`) por debajo del cual el planner elige con razón un seq
+scan, y se marca como "skipped". Con --seed se insertan filas sintéticas
+(marcadas con el dominio @plan-check.invalid) que se borran al terminar.
+
+Uso:
+    python check_query_plans.py                # contra DATABASE_URL tal cual
+    python check_query_plans.py --seed 20000   # sembrar, comprobar y limpiar
+"""
+
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from db.base import Base
+from db.session import SessionLocal, engine
+import models.user
+import models.page_content
+import models.contact
+import models.plans
+from models.contact import ContactMessage
+from models.page_content import PageContent
+from models.plans import ServicePlan
+from models.user import User, UserRole
+
+SEED_DOMAIN = "plan-check.invalid"
+SEED_PREFIX = "plan-check-"
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    table: str
+    min_rows: int                    # Por debajo, el plan no se comprueba
+    run: Callable[[Session], object]
+    index_order: bool = False        # Debe leer en orden de índice (sin Sort)
+
+
+def _checks() -> List[PlanCheck]:
+    from crud import contact_message, page_content, service_plan, user
+    from security.core import get_user_for_login
+
+    contact_table = ContactMessage.__tablename__
+    return [
+        PlanCheck("contact.get_pending", contact_table, 1000,
+                  lambda db: contact_message.get_pending(db), index_order=True),
+        PlanCheck("contact.get_by_status", contact_table, 1000,
+                  lambda db: contact_message.get_by_status(db, status="responded"), index_order=True),
+        PlanCheck("contact.list (admin)", contact_table, 1000,
+                  lambda db: contact_message.list(db), index_order=True),
+        PlanCheck("contact.get_by_client_id", contact_table, 1000,
+                  lambda db: contact_message.get_by_client_id(db, client_id="00000000-0000-0000-0000-000000000000")),
+        PlanCheck("plans.get_active_plans", ServicePlan.__tablename__, 500,
+                  lambda db: service_plan.get_active_plans(db), index_order=True),
+        PlanCheck("page_content.get_active_by_page_key", PageContent.__tablename__, 200,
+                  lambda db: page_content.get_active_by_page_key(db, page_key="homepage")),
+        PlanCheck("auth.get_user_for_login", User.__tablename__, 1000,
+                  lambda db: get_user_for_login(db, f"nobody@{SEED_DOMAIN}")),
+        PlanCheck("users.list", User.__tablename__, 1000,
+                  lambda db: user.list(db), index_order=True),
+    ]
+
+
+@contextmanager
+def capture_statements():
+    """Captura (sql, parámetros) de todo lo que se ejecuta en el engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(db: Session, statement: str, parameters) -> List[str]:
+    """Plan como lista de líneas "Nodo [tabla/índice]" """
+    conn = db.connection()
+    if engine.dialect.name == "postgresql":
+        raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = raw if isinstance(raw, list) else json.loads(raw)
+        lines = []
+
+        def walk(node, depth=0):
+            target = node.get("Index Name") or node.get("Relation Name") or ""
+            lines.append(f"{'  ' * depth}{node['Node Type']} {target}".rstrip())
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(check: PlanCheck, plan: List[str]) -> List[str]:
+    problems = []
+    for line in plan:
+        node = line.strip()
+        if engine.dialect.name == "postgresql":
+            if node == f"Seq Scan {check.table}":
+                problems.append(f"sequential scan on {check.table}")
+            if check.index_order and node.startswith(("Sort", "Incremental Sort")):
+                problems.append("explicit sort instead of index order")
+        else:
+            if node.startswith(f"SCAN {check.table}") and "INDEX" not in node:
+                problems.append(f"sequential scan on {check.table}")
+            if check.index_order and "TEMP B-TREE FOR ORDER BY" in node:
+                problems.append("explicit sort instead of index order")
+    return problems
+
+
+def table_rows(db: Session, table: str) -> int:
+    return db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+
+def seed(db: Session, rows: int) -> None:
+    """Filas sintéticas para que los planes sean representativos"""
+    now = datetime.now(timezone.utc)
+    statuses = ["new", "in_progress", "responded", "closed"]
+    # Distribución realista: la mayoría de mensajes ya están cerrados
+    weights = [1, 1, 4, 14]
+    cycle = [status for status, weight in zip(statuses, weights) for _ in range(weight)]
+    db.execute(insert(ContactMessage), [
+        {
+            "name": f"{SEED_PREFIX}{i}",
+            "email": f"lead{i}@{SEED_DOMAIN}",
+            "subject": "Plan check",
+            "message": "Synthetic message",
+            "status": cycle[i % len(cycle)],
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ])
+    db.execute(insert(User), [
+        {
+            "username": f"{SEED_PREFIX}{i}@{SEED_DOMAIN}",
+            "email": f"{SEED_PREFIX}{i}@{SEED_DOMAIN}",
+            "password_hash": "!",
+            "role": UserRole.VIEWER,
+            "date_joined": now - timedelta(minutes=i),
+        }
+        for i in range(max(rows // 4, 1000))
+    ])
+    db.execute(insert(ServicePlan), [
+        {
+            "name": f"{SEED_PREFIX}{i}",
+            "slug": f"{SEED_PREFIX}{i}",
+            "description": "Synthetic plan",
+            "price_monthly": 1,
+            "is_active": i % 10 == 0,
+            "display_order": i,
+        }
+        for i in range(1000)
+    ])
+    db.execute(insert(PageContent), [
+        {"page_key": f"{SEED_PREFIX}{i}", "title": "Synthetic page", "content_json": {}, "is_active": i % 2 == 0}
+        for i in range(500)
+    ])
+    db.commit()
+    analyze(db)
+
+
+def cleanup(db: Session) -> None:
+    db.query(ContactMessage).filter(ContactMessage.email.like(f"%@{SEED_DOMAIN}")).delete(synchronize_session=False)
+    db.query(User).filter(User.email.like(f"%@{SEED_DOMAIN}")).delete(synchronize_session=False)
+    db.query(ServicePlan).filter(ServicePlan.slug.like(f"{SEED_PREFIX}%")).delete(synchronize_session=False)
+    db.query(PageContent).filter(PageContent.page_key.like(f"{SEED_PREFIX}%")).delete(synchronize_session=False)
+    db.commit()
+    analyze(db)
+
+
+def analyze(db: Session) -> None:
+    # Estadísticas al día para que el planner vea el volumen real
+    db.execute(text("ANALYZE"))
+    db.commit()
+
+
+def run_checks(db: Session) -> int:
+    failures = 0
+    for check in _checks():
+        rows = table_rows(db, check.table)
+        if rows < check.min_rows:
+            print(f"[SKIP] {check.name}: {rows} rows < {check.min_rows}")
+            continue
+
+        with capture_statements() as statements:
+            check.run(db)
+        if not statements:
+            print(f"[SKIP] {check.name}: no SQL executed")
+            continue
+
+        problems, plans = [], []
+        for statement, parameters in statements:
+            plan = explain(db, statement, parameters)
+            plans.append(plan)
+            problems.extend(plan_problems(check, plan))
+
+        if problems:
+            failures += 1
+            print(f"[FAIL] {check.name} ({rows} rows): {', '.join(sorted(set(problems)))}")
+            for plan in plans:
+                for line in plan:
+                    print(f"       {line}")
+        else:
+            print(f"[OK] {check.name} ({rows} rows)")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Mensajes sintéticos a insertar antes de comprobar")
+    parser.add_argument("--keep", action="store_true", help="No borrar las filas sintéticas al terminar")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.seed:
+            print(f"[INFO] Sembrando {args.seed} mensajes sintéticos ({engine.dialect.name})")
+            seed(db, args.seed)
+        failures = run_checks(db)
+    finally:
+        if args.seed and not args.keep:
+            cleanup(db)
+        db.close()
+
+    if failures:
+        print(f"[ERROR] {failures} consultas con planes degradados")
+        return 1
+    print("[OK] Todos los planes usan índices")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
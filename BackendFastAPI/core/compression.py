@@ -0,0 +1,197 @@
+"""
+Compresión de respuestas (gzip y brotli) con negociación por Accept-Encoding
+
+* `CompressionMiddleware`: comprime al vuelo las respuestas de texto/JSON
+  por encima de COMPRESSION_MIN_SIZE (niveles rápidos, se paga por petición).
+* `precompress`: variantes comprimidas de un cuerpo que se cachea (CachedBody);
+  se comprimen una vez por cambio con niveles altos y el middleware deja pasar
+  las respuestas que ya traen Content-Encoding.
+
+brotli es opcional: sin el paquete solo se ofrece gzip.
+"""
+
+import gzip
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Por orden de preferencia a igualdad de q
+AVAILABLE_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/javascript", "application/xml", "image/svg+xml", "text/",
+)
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str] = AVAILABLE_ENCODINGS) -> Optional[str]:
+    """Codificación preferida por el cliente entre las disponibles (None = identity)"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag de la variante comprimida: cada representación tiene el suyo"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+def strip_encoded_etag(etag: str) -> str:
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def compress(body: bytes, encoding: str, *, level: Optional[int] = None) -> bytes:
+    if encoding == "gzip":
+        level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br":
+        level = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+        return brotli.compress(body, quality=level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Variantes comprimidas (niveles altos) para un cuerpo cacheado; {} si no compensa"""
+    if not settings.COMPRESSION_ENABLED or len(body) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    levels = {
+        "gzip": settings.COMPRESSION_PRECOMPRESS_GZIP_LEVEL,
+        "br": settings.COMPRESSION_PRECOMPRESS_BROTLI_QUALITY,
+    }
+    variants = {}
+    for encoding in AVAILABLE_ENCODINGS:
+        compressed = compress(body, encoding, level=levels[encoding])
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    """Compresor incremental para respuestas en streaming"""
+
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.process, self.finish = compressor.compress, compressor.flush
+        else:
+            compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.process, self.finish = compressor.process, compressor.finish
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de compresión (gzip/brotli) para respuestas dinámicas"""
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int = settings.COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _set_encoded_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not is_compressible(Headers(raw=message["headers"]))
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body:
+                # Respuesta completa en un solo mensaje (el caso de JSONResponse)
+                if len(body) >= self.minimum_size:
+                    body = compress(body, self.encoding)
+                    self._set_encoded_headers(headers)
+                    headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming: se comprime por trozos y sin Content-Length
+            self.compressor = _StreamCompressor(self.encoding)
+            self._set_encoded_headers(headers)
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+            self.start_message = None
+
+        chunk = self.compressor.process(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
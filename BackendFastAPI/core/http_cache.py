@@ -0,0 +1,101 @@
+"""
+Utilidades de caché HTTP: ETag, Last-Modified y peticiones condicionales
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from core.compression import encoded_etag, negotiate_encoding, precompress, strip_encoded_etag
+from core.config import settings
+
+
+class CachedBody(NamedTuple):
+    """Respuesta pública ya serializada junto con sus validadores HTTP"""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+    # Variantes precomprimidas por Content-Encoding ("gzip", "br")
+    encoded: Optional[Dict[str, bytes]] = None
+
+
+def cached_body(body: bytes, etag: str, last_modified: Optional[datetime] = None) -> CachedBody:
+    """CachedBody con sus variantes comprimidas (se comprime una vez por cambio)"""
+    return CachedBody(body=body, etag=etag, last_modified=last_modified, encoded=precompress(body))
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fuerte a partir de identificadores de versión (p. ej. id + updated_at)"""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_for_body(body: bytes) -> str:
+    """ETag fuerte a partir del contenido (hash del cuerpo)"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evalúa If-None-Match / If-Modified-Since (RFC 9110: If-None-Match tiene prioridad)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Las variantes comprimidas (ETag con sufijo) validan la misma versión
+        candidates = [strip_encoded_etag(tag.strip()) for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """Cabeceras de validación y Cache-Control para respuestas públicas"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={settings.PUBLIC_CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+    """
+    304 si el cliente ya tiene la versión, si no el cuerpo cacheado (en la
+    variante precomprimida que acepte el cliente, si la hay)
+    """
+    encoding = None
+    if entry.encoded:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), entry.encoded)
+    etag = encoded_etag(entry.etag, encoding) if encoding else entry.etag
+
+    headers = cache_headers(etag, entry.last_modified)
+    if entry.encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=entry.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
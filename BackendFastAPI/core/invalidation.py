@@ -0,0 +1,160 @@
+"""
+Bus de invalidación de cachés entre workers
+
+Las escrituras CRUD publican eventos `(table, key, version)` y cada worker
+se suscribe en el arranque (`main.lifespan`) para invalidar sus cachés en
+memoria. Backends:
+
+* `local`: solo dentro del proceso (tests / un único worker)
+* `postgres`: `LISTEN/NOTIFY` sobre el engine compartido de `db.session`
+"""
+
+import json
+import os
+import select
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import text
+
+from core.config import settings
+
+# Tabla comodín: el suscriptor debe descartar todo lo que tenga cacheado
+ALL_TABLES = "*"
+
+
+class InvalidationEvent(NamedTuple):
+    table: str
+    key: Optional[Any] = None       # None = invalidar toda la tabla
+    version: Optional[str] = None
+
+
+Subscriber = Callable[[InvalidationEvent], None]
+
+
+class InvalidationBus:
+    """Interfaz común de los backends"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+
+    def subscribe(self, table: str, callback: Subscriber) -> None:
+        self._subscribers.setdefault(table, []).append(callback)
+
+    def publish(self, table: str, key: Any = None, version: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def _dispatch(self, event: InvalidationEvent) -> None:
+        if event.table == ALL_TABLES:
+            targets = [cb for callbacks in self._subscribers.values() for cb in callbacks]
+        else:
+            targets = self._subscribers.get(event.table, [])
+        for callback in targets:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"❌ Invalidation subscriber failed ({event.table}): {e}")
+
+
+class LocalInvalidationBus(InvalidationBus):
+    """Entrega síncrona dentro del proceso"""
+
+    def publish(self, table: str, key: Any = None, version: Optional[str] = None) -> None:
+        self._dispatch(InvalidationEvent(table, key, version))
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """Entrega a todos los workers vía Postgres LISTEN/NOTIFY"""
+
+    def __init__(self, engine, channel: str, reconnect_delay: float = 2.0):
+        super().__init__()
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, table: str, key: Any = None, version: Optional[str] = None) -> None:
+        # El worker que escribe invalida de inmediato (read-your-writes)
+        self._dispatch(InvalidationEvent(table, key, version))
+        payload = json.dumps({"o": self.origin, "t": table, "k": key, "v": version})
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": self.channel, "payload": payload}
+                )
+        except Exception as e:
+            print(f"❌ Invalidation NOTIFY failed: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen_forever, name="invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen_forever(self) -> None:
+        first = True
+        while not self._stop.is_set():
+            try:
+                self._listen(resync=not first)
+            except Exception as e:
+                print(f"❌ Invalidation listener error: {e}")
+            first = False
+            self._stop.wait(self.reconnect_delay)
+
+    def _listen(self, resync: bool) -> None:
+        raw = self.engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            if resync:
+                # Pudimos perder eventos mientras no escuchábamos
+                self._dispatch(InvalidationEvent(ALL_TABLES))
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._handle(conn.notifies.pop(0).payload)
+        finally:
+            raw.invalidate()
+
+    def _handle(self, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        if data.get("o") == self.origin:
+            return
+        self._dispatch(InvalidationEvent(data.get("t"), data.get("k"), data.get("v")))
+
+
+def create_invalidation_bus() -> InvalidationBus:
+    """Crea el backend configurado en INVALIDATION_BACKEND"""
+    if settings.INVALIDATION_BACKEND == "postgres":
+        from db.session import engine
+        return PostgresInvalidationBus(engine, settings.INVALIDATION_CHANNEL)
+    return LocalInvalidationBus()
+
+
+invalidation_bus = create_invalidation_bus()
@@ -0,0 +1,433 @@
+"""
+Métricas en formato de exposición de Prometheus (/metrics)
+
+Registro en memoria por proceso, pensado para dejarlo activo en producción:
+una petición cuesta un par de perf_counter, un lock y unas sumas; cada
+consulta SQL, dos callbacks del engine. Tipos:
+
+* `Counter` e `Histogram` (buckets fijos, acumulados al exponer).
+* Colectores por callback (`register_collector`) para valores que ya llevan
+  otros módulos: contadores de TTLCache, estado del pool de conexiones...
+
+Multiproceso (varios workers de uvicorn): con METRICS_MULTIPROC_DIR cada
+worker vuelca su registro a `<dir>/<pid>.json` cada METRICS_FLUSH_INTERVAL
+segundos, y /metrics suma los ficheros de todos. Los contadores e
+histogramas de workers que ya no existen se consolidan en `_archive.json`
+(no retroceden al reiniciar un worker); sus gauges se descartan.
+
+`MetricsMiddleware` registra por ruta (plantilla, no path concreto) el número
+de peticiones por estado, la latencia y el tiempo de DB de la petición, que
+suman los eventos `before/after_cursor_execute` de `instrument_engine`.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.cache import caches
+from core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos al consolidar
+    fcntl = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+
+ARCHIVE_NAME = "_archive.json"
+
+# Familia serializada: {"type", "help", "labelnames", "buckets"?, "samples": [[labels, value]]}
+Family = Dict[str, Any]
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [[list(labels), value] for labels, value in self._values.items()]
+        return {"type": self.type, "help": self.help, "labelnames": list(self.labelnames), "samples": samples}
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Por etiquetas: [conteo por bucket (sin acumular, el último es +Inf), suma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [[list(labels), [list(counts), total]] for labels, (counts, total) in self._values.items()]
+        return {
+            "type": self.type, "help": self.help, "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets), "samples": samples,
+        }
+
+
+class MetricsRegistry:
+    """Métricas del proceso + agregación entre workers (METRICS_MULTIPROC_DIR)"""
+
+    def __init__(self, *, directory: str = "", flush_interval: float = 5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], Dict[str, Family]]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, metric: Any) -> None:
+        self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Dict[str, Family]]) -> None:
+        """`collector()` devuelve familias ya construidas (ver `family`)"""
+        self._collectors.append(collector)
+
+    def collect(self) -> Dict[str, Family]:
+        families = {name: metric.collect() for name, metric in self._metrics.items()}
+        for collector in self._collectors:
+            try:
+                families.update(collector())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        return families
+
+    # Multiproceso
+
+    def start(self) -> None:
+        """Volcado periódico a METRICS_MULTIPROC_DIR (solo si está configurado)"""
+        if self.directory is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Metrics flush failed: {e}")
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _write_json(self.directory / f"{os.getpid()}.json", {"pid": os.getpid(), "families": self.collect()})
+
+    def aggregate(self) -> Dict[str, Family]:
+        """Familias de todos los workers (o solo las de este proceso sin directorio)"""
+        if self.directory is None:
+            return self.collect()
+        self.flush()
+        with _dir_lock(self.directory):
+            self._archive_dead()
+            merged: Dict[str, Family] = {}
+            archive = _read_json(self.directory / ARCHIVE_NAME)
+            if archive:
+                _merge(merged, archive["families"], include_gauges=False)
+            for path in self.directory.glob("[0-9]*.json"):
+                snapshot = _read_json(path)
+                if snapshot:
+                    _merge(merged, snapshot["families"], include_gauges=True)
+        return merged
+
+    def _archive_dead(self) -> None:
+        """Consolida en _archive.json los contadores de workers muertos"""
+        dead = [path for path in self.directory.glob("[0-9]*.json") if not _pid_alive(int(path.stem))]
+        if not dead:
+            return
+        archive = _read_json(self.directory / ARCHIVE_NAME) or {"families": {}}
+        for path in dead:
+            snapshot = _read_json(path)
+            if snapshot:
+                _merge(archive["families"], snapshot["families"], include_gauges=False)
+        _write_json(self.directory / ARCHIVE_NAME, archive)
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+    def render(self) -> bytes:
+        return render(self.aggregate())
+
+
+def family(kind: str, help: str, labelnames: Sequence[str], samples: Iterable[Tuple[Sequence[str], float]]) -> Family:
+    """Familia counter / gauge para colectores por callback"""
+    return {
+        "type": kind, "help": help, "labelnames": list(labelnames),
+        "samples": [[list(labels), value] for labels, value in samples],
+    }
+
+
+def _merge(target: Dict[str, Family], families: Dict[str, Family], *, include_gauges: bool) -> None:
+    for name, source in families.items():
+        if source["type"] == "gauge" and not include_gauges:
+            continue
+        existing = target.get(name)
+        if existing is None or existing.get("buckets") != source.get("buckets"):
+            existing = target[name] = {**source, "samples": []}
+        index = {tuple(sample[0]): sample for sample in existing["samples"]}
+        for labels, value in source["samples"]:
+            sample = index.get(tuple(labels))
+            if sample is None:
+                if source["type"] == "histogram":
+                    value = [list(value[0]), value[1]]
+                sample = [list(labels), value]
+                existing["samples"].append(sample)
+                index[tuple(labels)] = sample
+            elif source["type"] == "histogram":
+                sample[1][0] = [a + b for a, b in zip(sample[1][0], value[0])]
+                sample[1][1] += value[1]
+            else:
+                sample[1] += value
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class _dir_lock:
+    """flock sobre el directorio de métricas (dos /metrics a la vez no consolidan dos veces)"""
+
+    def __init__(self, directory: Path):
+        self.path = directory / ".lock"
+
+    def __enter__(self):
+        self.file = open(self.path, "w")
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+
+# Exposición
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(families: Dict[str, Family]) -> bytes:
+    lines = []
+    for name in sorted(families):
+        data = families[name]
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        names = data["labelnames"]
+        for labels, value in sorted(data["samples"], key=lambda sample: sample[0]):
+            if data["type"] == "histogram":
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(list(data["buckets"]) + ["+Inf"], counts):
+                    cumulative += count
+                    le = 'le="' + (bound if bound == "+Inf" else _number(bound)) + '"'
+                    lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = MetricsRegistry(
+    directory=settings.METRICS_MULTIPROC_DIR,
+    flush_interval=settings.METRICS_FLUSH_INTERVAL
+)
+
+# Métricas HTTP y de DB por petición
+http_requests_total = Counter(
+    "http_requests_total", "Peticiones HTTP por ruta, método y estado", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route")
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds", "Tiempo de DB por petición (suma de sus consultas)", ("route",), DB_BUCKETS
+)
+http_request_db_queries_total = Counter(
+    "http_request_db_queries_total", "Consultas SQL ejecutadas por las peticiones", ("route",)
+)
+db_query_duration_seconds = Histogram(
+    "db_query_duration_seconds", "Duración de cada consulta SQL", ("engine",), DB_BUCKETS
+)
+
+
+class RequestDBStats:
+    """Acumulador de consultas de la petición en curso"""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Se propaga al threadpool (endpoints síncronos) y a los greenlets de asyncio
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+
+def instrument_engine(engine, name: str = "sync") -> None:
+    """Mide cada consulta del engine y la suma a la petición en curso"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        db_query_duration_seconds.observe(elapsed, name)
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+
+def route_label(scope: Scope) -> str:
+    """Plantilla de la ruta (`/api/v1/page-content/public/{page_key}/`), no el path real"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: peticiones, latencia y tiempo de DB por ruta"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        stats = RequestDBStats()
+        token = current_db_stats.set(stats)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_db_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route = route_label(scope)
+            http_requests_total.inc(scope["method"], route, str(status))
+            http_request_duration_seconds.observe(elapsed, scope["method"], route)
+            if stats.queries:
+                http_request_db_seconds.observe(stats.seconds, route)
+                http_request_db_queries_total.inc(route, amount=stats.queries)
+
+
+def _cache_families() -> Dict[str, Family]:
+    stats = [cache.stats() for cache in caches.values()]
+    return {
+        "cache_hits_total": family(
+            "counter", "Aciertos de las cachés en memoria", ("cache",),
+            [((s["name"],), s["hits"]) for s in stats]
+        ),
+        "cache_misses_total": family(
+            "counter", "Fallos de las cachés en memoria", ("cache",),
+            [((s["name"],), s["misses"]) for s in stats]
+        ),
+        "cache_evictions_total": family(
+            "counter", "Entradas expulsadas por tamaño", ("cache",),
+            [((s["name"],), s["evictions"]) for s in stats]
+        ),
+        "cache_entries": family(
+            "gauge", "Entradas en caché", ("cache",),
+            [((s["name"],), s["size"]) for s in stats]
+        ),
+    }
+
+
+registry.register_collector(_cache_families)
@@ -0,0 +1,141 @@
+"""
+Presupuesto de sentencias SQL por petición y detector de N+1 (depuración / CI)
+
+Con QUERY_GUARD_MODE distinto de "off" se cuentan las sentencias que ejecuta
+cada petición y se agrupan por forma (la sentencia con los literales y
+parámetros sustituidos por `?`). Al terminar la respuesta se comprueba:
+
+* el presupuesto de la ruta, declarado en el endpoint con `@query_budget(n)`
+  (o QUERY_GUARD_DEFAULT_BUDGET para las rutas sin presupuesto propio);
+* que ninguna forma se repita QUERY_GUARD_REPEAT_THRESHOLD veces o más: una
+  consulta por fila del listado es el patrón N+1.
+
+En modo "log" se imprime un aviso; en modo "raise" se lanza
+QueryBudgetExceeded, que TestClient propaga y hace fallar el test. Todas las
+respuestas llevan la cabecera `X-DB-Queries` con el total de la petición.
+
+En producción debe quedar en "off": no se registran los eventos del engine
+ni se añade el middleware.
+"""
+
+import re
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.metrics import route_label
+
+HEADER = b"x-db-queries"
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """La petición superó su presupuesto de sentencias o repitió una consulta (N+1)"""
+
+
+def guard_enabled() -> bool:
+    return settings.QUERY_GUARD_MODE in ("log", "raise")
+
+
+def query_budget(statements: int, *, repeats: Optional[int] = None) -> Callable:
+    """
+    Presupuesto de sentencias SQL del endpoint. Va debajo de `@router.get`;
+    no envuelve la función (FastAPI sigue viendo la firma original).
+    `repeats` sube el umbral de N+1 para rutas que repiten a propósito.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = (statements, repeats)
+        return func
+    return decorator
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """Forma de la sentencia: sin literales ni parámetros y con las listas IN colapsadas"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _PARAMS.sub("?", _LITERALS.sub("?", shape))
+    return _IN_LIST.sub("(?)", shape)
+
+
+class RequestQueries:
+    """Sentencias de la petición en curso, agrupadas por forma"""
+
+    __slots__ = ("count", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.shapes: Counter = Counter()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+
+def guard_engine(engine) -> None:
+    """Cuenta las sentencias del engine en la petición en curso (executemany = 1)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = current_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.shapes[statement_shape(statement)] += 1
+
+
+class QueryGuardMiddleware:
+    """Middleware ASGI: cabecera X-DB-Queries y comprobación del presupuesto al terminar"""
+
+    def __init__(self, app: ASGIApp, *, mode: str, repeat_threshold: int, default_budget: int = 0):
+        self.app = app
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+        self.default_budget = default_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((HEADER, str(queries.count).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            current_queries.reset(token)
+        self.check(scope, queries)
+
+    def check(self, scope: Scope, queries: RequestQueries) -> None:
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        budget, repeats = getattr(endpoint, "__query_budget__", (self.default_budget or None, None))
+
+        problems = []
+        if budget is not None and queries.count > budget:
+            problems.append(f"{queries.count} statements, budget is {budget}")
+        for shape, n in queries.repeated(repeats or self.repeat_threshold):
+            problems.append(f"repeated {n}x (N+1?): {shape[:200]}")
+        if not problems:
+            return
+
+        message = f"{scope['method']} {route_label(scope)}: " + "; ".join(problems)
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        print(f"⚠️ Query guard: {message}")
@@ -0,0 +1,72 @@
+"""
+Utilidades de serialización de respuestas JSON
+
+Con orjson instalado (JSON_RENDERER=auto|orjson) la codificación se hace en
+C; si no, se usa el módulo json estándar. Ambos caminos producen la misma
+salida que FastAPI: los modelos pydantic se vuelcan en modo JSON (Decimal y
+datetime como los serializa pydantic) y los Decimal sueltos como número,
+igual que `jsonable_encoder`.
+"""
+
+import json
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import decimal_encoder, jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+if settings.JSON_RENDERER == "orjson" and orjson is None:
+    raise RuntimeError("JSON_RENDERER=orjson requires the orjson package")
+
+USE_ORJSON = orjson is not None and settings.JSON_RENDERER != "stdlib"
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Tipos que orjson no conoce (datetime, date, UUID y Enum los trata él)"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return decimal_encoder(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps_orjson(content: Any) -> bytes:
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_stdlib(content: Any) -> bytes:
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def render_json(content: Any) -> bytes:
+    """Serializa igual que JSONResponse de FastAPI (para respuestas cacheadas)"""
+    if USE_ORJSON:
+        return dumps_orjson(content)
+    return dumps_stdlib(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que codifica con `render_json`. Se usa como
+    default_response_class: FastAPI ya ha validado y convertido el contenido
+    con el response_model, así que aquí solo se evita json.dumps.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
@@ -0,0 +1,190 @@
+"""
+Arranque de los workers: modo desarrollo y modo producción
+
+* `development`: prueba de conexión + `Base.metadata.create_all` (cómodo en
+  local, pero cuesta un round-trip y una comprobación por tabla en cada boot).
+* `production`: el esquema lo gestiona Alembic, así que solo se comprueba con
+  una consulta que la revisión de la DB es el head esperado, y después se
+  precalientan el pool de conexiones y las cachés públicas en paralelo para
+  que las primeras peticiones no paguen la conexión ni la serialización.
+  Solo un esquema distinto (SchemaMismatch) o una DB inalcanzable
+  (DatabaseUnavailable) abortan el arranque; el precalentado es best-effort.
+
+Cada fase se cronometra en `startup_timings` (ver /health/startup y
+bench_startup.py).
+"""
+
+import ast
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.config import settings
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Identificadores de los ficheros de migración (`revision = '...'`)
+REVISION_RE = re.compile(r"^revision\s*(?::\s*str\s*)?=\s*(.+)$", re.MULTILINE)
+DOWN_REVISION_RE = re.compile(r"^down_revision\s*(?::[^=]+)?=\s*(.+)$", re.MULTILINE)
+
+# Duración de cada fase del arranque de este worker (ms)
+startup_timings: Dict[str, float] = {}
+
+
+class SchemaMismatch(RuntimeError):
+    """La revisión de Alembic de la DB no es la que espera el código"""
+
+
+class DatabaseUnavailable(RuntimeError):
+    """No se pudo conectar con la DB al arrancar"""
+
+
+def startup_mode() -> str:
+    """STARTUP_MODE explícito o, en "auto", según ENVIRONMENT"""
+    if settings.STARTUP_MODE != "auto":
+        return settings.STARTUP_MODE
+    return "production" if settings.ENVIRONMENT == "production" else "development"
+
+
+@contextmanager
+def timed(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[phase] = round((time.perf_counter() - start) * 1000, 2)
+
+
+def expected_alembic_heads() -> List[str]:
+    """
+    Head(s) del código: STARTUP_ALEMBIC_HEAD si se fijó en el build o, si no,
+    las revisiones de alembic/versions que ninguna otra tiene como
+    down_revision. Se leen las asignaciones de cada fichero sin importar
+    alembic ni las migraciones (importar alembic cuesta ~100 ms por worker).
+    """
+    if settings.STARTUP_ALEMBIC_HEAD:
+        return sorted(head.strip() for head in settings.STARTUP_ALEMBIC_HEAD.split(",") if head.strip())
+
+    revisions, parents = set(), set()
+    for path in (BASE_DIR / "alembic" / "versions").glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = REVISION_RE.search(source)
+        down_revision = DOWN_REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(ast.literal_eval(revision.group(1)))
+        down = ast.literal_eval(down_revision.group(1)) if down_revision else None
+        if isinstance(down, str):
+            parents.add(down)
+        elif down:
+            parents.update(down)
+    return sorted(revisions - parents)
+
+
+def check_alembic_head(engine) -> str:
+    """
+    Una consulta: la revisión aplicada en la DB tiene que ser el head del
+    código. Sirve también de prueba de conexión. Lanza SchemaMismatch o
+    DatabaseUnavailable.
+    """
+    expected = expected_alembic_heads()
+    try:
+        conn = engine.connect()
+    except SQLAlchemyError as e:
+        raise DatabaseUnavailable(f"Cannot connect to the database ({e.__class__.__name__})")
+    with conn:
+        try:
+            current = sorted(row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version")))
+        except Exception as e:
+            raise SchemaMismatch(f"Cannot read alembic_version ({e.__class__.__name__}); run `alembic upgrade head`")
+    if current != expected:
+        raise SchemaMismatch(
+            f"Database is at {current or 'no revision'}, code expects {expected}; run `alembic upgrade head`"
+        )
+    return ",".join(current)
+
+
+def prewarm_pool(engine, connections: int) -> int:
+    """Abre `connections` conexiones a la vez y las devuelve al pool"""
+    def connect(_):
+        conn = engine.connect()
+        conn.execute(text("SELECT 1"))
+        return conn
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        opened = list(executor.map(connect, range(connections)))
+    for conn in opened:
+        conn.close()
+    return len(opened)
+
+
+async def prewarm_async_pool(connections: int) -> int:
+    from db.async_session import get_async_engine
+
+    engine = get_async_engine()
+
+    async def connect():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    opened = await asyncio.gather(*[connect() for _ in range(connections)])
+    for conn in opened:
+        await conn.close()
+    return len(opened)
+
+
+def prewarm_caches() -> Dict[str, int]:
+    """Rellena las cachés públicas (páginas activas, planes y bundle por defecto)"""
+    from crud import page_content, service_plan
+    from db.session import SessionLocal
+    from models.page_content import PageContent
+
+    db = SessionLocal()
+    try:
+        page_keys = [row[0] for row in db.query(PageContent.page_key).filter(PageContent.is_active == True).all()]
+        pages = page_content.get_public_many(db, page_keys=page_keys)
+        service_plan.get_public_serialized(db)
+        page_content.get_public_bundle(db, page_keys=["navigation", "footer"])
+    finally:
+        db.close()
+    return {"pages": len(pages)}
+
+
+async def run_production_startup(engine) -> Dict[str, object]:
+    """
+    Comprobación de esquema y precalentado en paralelo (pool sync/async +
+    cachés). Los fallos del precalentado no se propagan: se devuelven en
+    `prewarm_errors` y el worker arranca igual (en frío).
+    """
+    with timed("schema_check"):
+        revision = await run_in_threadpool(check_alembic_head, engine)
+
+    connections = settings.STARTUP_PREWARM_CONNECTIONS or settings.DB_POOL_SIZE
+    if engine.dialect.name == "sqlite":
+        connections = 1
+    tasks = {
+        "pool": run_in_threadpool(prewarm_pool, engine, connections),
+        "caches": run_in_threadpool(prewarm_caches),
+    }
+    if settings.DB_ASYNC_MODE:
+        tasks["async_pool"] = prewarm_async_pool(connections)
+    with timed("prewarm"):
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+
+    errors = {name: f"{result.__class__.__name__}: {result}" for name, result in results.items()
+              if isinstance(result, BaseException)}
+    return {
+        "revision": revision,
+        "connections": 0 if "pool" in errors else results["pool"],
+        "cached_pages": 0 if "caches" in errors else results["caches"]["pages"],
+        "prewarm_errors": errors,
+    }
@@ -4,8 +4,11 @@ CRUD Operations - Operaciones de base de datos
 
 from .crud_user import user
 from .crud_page_content import page_content
+from .crud_page_revision import page_revision
 from .crud_contact import contact_message
+from .crud_contact_stats import contact_stats
 from .crud_plans import service_plan
+from .crud_media import media_file
 
 # For a new basic set of CRUD operations you could just do
 
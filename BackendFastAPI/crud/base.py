@@ -2,11 +2,20 @@
 Base CRUD class con operaciones genéricas
 """
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import asyncio
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
 
+from core.config import settings
+from core.invalidation import invalidation_bus
+from crud.pagination import (
+    InvalidCursor, InvalidListQuery, ListPage, count_query, cursor_values, decode_cursor,
+    encode_cursor, estimate_table_count, keyset_filter
+)
 from db.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -14,6 +23,13 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Listados (ver `list`): filtros por igualdad y columnas ordenables, por
+    # nombre público. Las columnas ordenables no deben admitir NULL.
+    filter_fields: Dict[str, Any] = {}
+    sort_fields: Dict[str, Any] = {}
+    default_sort: str = "-id"
+    max_page_size: int = settings.LIST_MAX_PAGE_SIZE
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object con métodos por defecto para Create, Read, Update, Delete (CRUD).
@@ -23,6 +39,20 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: Un esquema Pydantic (BaseModel) class
         """
         self.model = model
+        self.sort_fields = {"id": model.id, **self.sort_fields}
+
+    def cache_key(self, db_obj: ModelType) -> Any:
+        """Clave con la que se publican las invalidaciones de este modelo"""
+        return db_obj.id
+
+    def publish_change(self, db_obj: ModelType, key: Any = None) -> None:
+        """Publica `(table, key, version)` en el bus tras una escritura"""
+        stamp = getattr(db_obj, "updated_at", None) or getattr(db_obj, "created_at", None)
+        invalidation_bus.publish(
+            self.model.__tablename__,
+            key if key is not None else self.cache_key(db_obj),
+            stamp.isoformat() if stamp else None
+        )
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -32,12 +62,94 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def count(self, db: Session, *, query: Optional[Query] = None) -> int:
+        """COUNT(*) en SQL (de la tabla o de una consulta filtrada)"""
+        return count_query(query if query is not None else db.query(self.model))
+
+    def estimate_count(self, db: Session) -> Tuple[int, bool]:
+        """
+        Total de filas de la tabla sin filtros. En tablas grandes de Postgres usa
+        la estimación del planner; devuelve (total, es_estimación).
+        """
+        estimate = estimate_table_count(db, self.model.__tablename__)
+        if estimate is None:
+            return self.count(db), False
+        return estimate, True
+
+    def apply_filters(self, query: Query, filters: Optional[Dict[str, Any]]) -> Query:
+        """Aplica filtros declarativos (`filter_fields`) a una consulta"""
+        for name, value in (filters or {}).items():
+            if value is None:
+                continue
+            column = self.filter_fields.get(name)
+            if column is None:
+                raise InvalidListQuery(f"Invalid filter: {name}")
+            if isinstance(value, (list, tuple, set)):
+                query = query.filter(column.in_(list(value)))
+            else:
+                query = query.filter(column == value)
+        return query
+
+    def list(
+        self,
+        db: Session,
+        *,
+        query: Optional[Query] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> ListPage:
+        """
+        Listado paginado genérico.
+
+        * `filters`: {nombre: valor} sobre `filter_fields`; None se ignora y una
+          lista/tupla se traduce a IN.
+        * `sort`: uno de `sort_fields`, con prefijo "-" para orden descendente.
+          El id se añade como desempate, así que el orden es siempre total.
+        * `cursor`: next_cursor de la página anterior (keyset, sin OFFSET). Solo
+          es válido con el mismo `sort`; sin cursor se admite `offset`.
+        * `limit`: filas por página, acotado a `max_page_size`.
+
+        Nunca carga más de `limit + 1` filas.
+        """
+        query = self.apply_filters(
+            query if query is not None else db.query(self.model), filters
+        )
+
+        sort = sort or self.default_sort
+        descending = sort.startswith("-")
+        column = self.sort_fields.get(sort.lstrip("-"))
+        if column is None:
+            raise InvalidListQuery(f"Invalid sort field: {sort.lstrip('-')}")
+        order_by = [column] if column is self.model.id else [column, self.model.id]
+
+        if cursor:
+            values = decode_cursor(cursor, len(order_by) + 1)
+            if values[0] != sort:
+                raise InvalidCursor("Cursor does not match sort")
+            after = cursor_values(db, [c.type for c in order_by], values[1:])
+            query = query.filter(keyset_filter(order_by, after, descending))
+        query = query.order_by(*[c.desc() if descending else c.asc() for c in order_by])
+        if not cursor and offset:
+            query = query.offset(offset)
+
+        limit = min(limit or self.max_page_size, self.max_page_size)
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([sort] + [getattr(items[-1], c.key) for c in order_by])
+        return ListPage(items=items, next_cursor=next_cursor)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.publish_change(db_obj)
         return db_obj
 
     def update(
@@ -47,21 +159,75 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        # Solo columnas mapeadas (sin serializar la fila entera para conocerlas)
+        columns = inspect(db_obj).mapper.column_attrs
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in update_data.items():
+            if field in columns:
+                setattr(db_obj, field, value)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.publish_change(db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
+        key = self.cache_key(obj)
         db.delete(obj)
         db.commit()
+        invalidation_bus.publish(self.model.__tablename__, key)
+        return obj
+
+    # Variantes asíncronas (AsyncSession, ver db.async_session)
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).filter(self.model.id == id))
+        return result.scalars().first()
+
+    async def aget_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def acreate(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        await asyncio.to_thread(self.publish_change, db_obj)
+        return db_obj
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        # Solo columnas mapeadas, como en `update`
+        columns = inspect(db_obj).mapper.column_attrs
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            if field in columns:
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        await asyncio.to_thread(self.publish_change, db_obj)
+        return db_obj
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> ModelType:
+        obj = await db.get(self.model, id)
+        key = self.cache_key(obj)
+        await db.delete(obj)
+        await db.commit()
+        await asyncio.to_thread(invalidation_bus.publish, self.model.__tablename__, key)
         return obj
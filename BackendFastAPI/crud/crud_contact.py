@@ -2,25 +2,235 @@
 CRUD operations para ContactMessage
 """
 
-from typing import List, Optional
+import html
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from sqlalchemy import Double, cast, func, insert, literal_column
 from sqlalchemy.orm import Session
 
+from core.invalidation import invalidation_bus
 from crud.base import CRUDBase
+from crud.crud_contact_stats import contact_stats
+from crud.pagination import ListPage, cursor_values, decode_cursor, encode_cursor, keyset_filter
+from crud.search import InvertedIndex, highlight, tokenize
 from models.contact import ContactMessage
 from schemas.contact import ContactMessageCreate, ContactMessageUpdate
 
+# Búsqueda: columna generada tsvector + GIN en Postgres (migración
+# 8a41c0e2f7b9, o models.contact con create_all); el diccionario debe
+# coincidir con el de la columna
+SEARCH_CONFIG = "spanish"
+SEARCH_VECTOR = literal_column("search_vector")
+# Pesos A/B/C de la columna generada, reproducidos en el fallback en memoria
+SEARCH_WEIGHTS = {"name": 1.0, "email": 1.0, "company": 0.4, "subject": 0.4, "message": 0.2}
+# Marcadores de ts_headline: el fragmento se escapa antes de poner <b>...</b>
+HEADLINE_START, HEADLINE_STOP = "\x02", "\x03"
+
+
+class ContactSearchHit(NamedTuple):
+    message: ContactMessage
+    rank: float
+    snippet: str
+
+
+def _search_columns():
+    return [ContactMessage.id, *(getattr(ContactMessage, field) for field in SEARCH_WEIGHTS)]
+
+
+def _load_search_docs(db: Session):
+    return db.query(*_search_columns()).yield_per(1000)
+
+
+def _fetch_search_docs(db: Session, ids: Set[int]):
+    return db.query(*_search_columns()).filter(ContactMessage.id.in_(ids)).all()
+
+
+# Fallback para SQLite; solo se construye si se busca con ese backend
+search_index = InvertedIndex(SEARCH_WEIGHTS, loader=_load_search_docs, fetch=_fetch_search_docs)
+invalidation_bus.subscribe(ContactMessage.__tablename__, search_index.on_event)
+
 class CRUDContactMessage(CRUDBase[ContactMessage, ContactMessageCreate, ContactMessageUpdate]):
+    filter_fields = {
+        "status": ContactMessage.status,
+        "assigned_to_id": ContactMessage.assigned_to_id,
+    }
+    sort_fields = {
+        "created_at": ContactMessage.created_at,
+        "status": ContactMessage.status,
+    }
+    default_sort = "-created_at"
+
+    def get_by_client_id(self, db: Session, *, client_id: str) -> Optional[ContactMessage]:
+        return db.query(ContactMessage).filter(ContactMessage.client_id == client_id).first()
+
+    def create(self, db: Session, *, obj_in: ContactMessageCreate) -> ContactMessage:
+        # Reintento del mismo envío (mismo client_id): devolver el existente
+        if obj_in.client_id is not None:
+            existing = self.get_by_client_id(db, client_id=str(obj_in.client_id))
+            if existing:
+                return existing
+        # Los contadores se confirman en el mismo commit que el mensaje
+        contact_stats.record_created(db, [(None, "new")])
+        return super().create(db, obj_in=obj_in)
+
+    def create_many(self, db: Session, rows: List[Dict[str, Any]]) -> List[Tuple[Any, Any]]:
+        """
+        INSERT multi-fila que omite los client_id ya guardados (reintentos,
+        replays). Devuelve (created_at, status) de las filas realmente
+        insertadas, ya sumadas a los contadores; el commit es del llamante.
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        if dialect_insert is not None:
+            stmt = dialect_insert(ContactMessage).on_conflict_do_nothing(
+                index_elements=["client_id"]
+            ).returning(ContactMessage.created_at, ContactMessage.status)
+            created = [tuple(row) for row in db.execute(stmt, rows).all()]
+        else:
+            existing = {
+                client_id for (client_id,) in db.query(ContactMessage.client_id).filter(
+                    ContactMessage.client_id.in_([row["client_id"] for row in rows])
+                )
+            }
+            rows = [row for row in rows if row["client_id"] not in existing]
+            if rows:
+                db.execute(insert(ContactMessage), rows)
+            created = [(row.get("created_at"), row.get("status")) for row in rows]
+        contact_stats.record_created(db, created)
+        return created
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: ContactMessage,
+        obj_in: Union[ContactMessageUpdate, Dict[str, Any]]
+    ) -> ContactMessage:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if update_data.get("status"):
+            contact_stats.record_status_change(db, db_obj, update_data["status"])
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def remove(self, db: Session, *, id: int) -> ContactMessage:
+        message = db.get(ContactMessage, id)
+        if message is not None:
+            contact_stats.record_deleted(db, message)
+        return super().remove(db, id=id)
+
+    # Sin límite (a diferencia de `list`): devuelven todas las filas, en el
+    # mismo orden que el listado de administración
     def get_by_status(self, db: Session, *, status: str) -> List[ContactMessage]:
-        return db.query(ContactMessage).filter(ContactMessage.status == status).all()
+        return db.query(ContactMessage).filter(ContactMessage.status == status).order_by(
+            ContactMessage.created_at.desc(), ContactMessage.id.desc()
+        ).all()
 
     def get_pending(self, db: Session) -> List[ContactMessage]:
         return db.query(ContactMessage).filter(
             ContactMessage.status.in_(["new", "in_progress"])
-        ).order_by(ContactMessage.created_at.desc()).all()
+        ).order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).all()
+
+    def search(
+        self,
+        db: Session,
+        *,
+        q: str,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> ListPage:
+        """
+        Búsqueda en name, email, company, subject y message, ordenada por
+        relevancia. Devuelve ListPage de ContactSearchHit; el cursor es
+        (rank, id) de la última fila.
+        """
+        limit = min(limit or self.max_page_size, self.max_page_size)
+        after = None
+        if cursor:
+            after = cursor_values(db, [Double(), ContactMessage.id.type], decode_cursor(cursor, 2))
+        if db.get_bind().dialect.name == "postgresql":
+            return self._search_postgres(db, q=q, status=status, after=after, limit=limit)
+        return self._search_memory(db, q=q, status=status, after=after, limit=limit)
+
+    def _search_postgres(self, db: Session, *, q, status, after, limit) -> ListPage:
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        # ts_rank_cd es real (float4): en float8 el valor del cursor compara
+        # exacto con el de la fila y no se pierden los empates de la frontera
+        rank = cast(func.ts_rank_cd(SEARCH_VECTOR, tsquery), Double)
+        query = db.query(ContactMessage, rank).filter(SEARCH_VECTOR.op("@@")(tsquery))
+        if status:
+            query = query.filter(ContactMessage.status == status)
+        if after:
+            query = query.filter(keyset_filter([rank, ContactMessage.id], after, descending=True))
+        rows = query.order_by(rank.desc(), ContactMessage.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][1], rows[-1][0].id])
+
+        # ts_headline es caro: solo para las filas de la página
+        snippets = {}
+        if rows:
+            document = func.concat_ws(" ", ContactMessage.subject, ContactMessage.message)
+            headline = func.ts_headline(
+                SEARCH_CONFIG, document, tsquery,
+                f"StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, MaxFragments=2, MaxWords=25, MinWords=8"
+            )
+            snippets = dict(
+                db.query(ContactMessage.id, headline).filter(
+                    ContactMessage.id.in_([message.id for message, _ in rows])
+                ).all()
+            )
+        items = [
+            ContactSearchHit(message, float(score), _mark_headline(snippets.get(message.id, "")))
+            for message, score in rows
+        ]
+        return ListPage(items=items, next_cursor=next_cursor)
+
+    def _search_memory(self, db: Session, *, q, status, after, limit) -> ListPage:
+        hits = search_index.search(db, q)
+        if after:
+            hits = [hit for hit in hits if hit < (after[0], after[1])]
+        if status and hits:
+            allowed = {
+                message_id for (message_id,) in db.query(ContactMessage.id).filter(
+                    ContactMessage.id.in_([message_id for _, message_id in hits]),
+                    ContactMessage.status == status
+                )
+            }
+            hits = [hit for hit in hits if hit[1] in allowed]
+
+        page = hits[:limit]
+        next_cursor = encode_cursor(list(page[-1])) if len(hits) > limit else None
+        messages = {
+            message.id: message for message in
+            db.query(ContactMessage).filter(ContactMessage.id.in_([message_id for _, message_id in page]))
+        }
+        terms = tokenize(q)
+        items = [
+            ContactSearchHit(
+                messages[message_id], score,
+                highlight(f"{messages[message_id].subject} {messages[message_id].message}", terms)
+            )
+            for score, message_id in page if message_id in messages
+        ]
+        return ListPage(items=items, next_cursor=next_cursor)
 
     def get_recent(self, db: Session, *, limit: int = 10) -> List[ContactMessage]:
         return db.query(ContactMessage).order_by(
             ContactMessage.created_at.desc()
         ).limit(limit).all()
 
+def _mark_headline(fragment: str) -> str:
+    escaped = html.escape(fragment or "")
+    return escaped.replace(HEADLINE_START, "<b>").replace(HEADLINE_STOP, "</b>")
+
 contact_message = CRUDContactMessage(ContactMessage)
@@ -0,0 +1,135 @@
+"""
+Estadísticas de la bandeja de contacto (tabla resumen por día y estado)
+
+Los contadores se actualizan en la misma transacción que la escritura del
+mensaje (create/update/remove del CRUD, ingesta por lotes y replay del
+spool), así que el dashboard lee unas pocas filas en lugar de contar la
+tabla de mensajes. `rebuild` los recalcula desde cero.
+
+Los mensajes sin created_at (filas antiguas con NULL) no cuentan, ni en los
+contadores incrementales ni en `rebuild`: su día no es estable y la tabla
+reconstruida no coincidiría con la mantenida en vivo.
+"""
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from models.contact import ContactMessage, ContactStatsDaily
+
+PENDING_STATUSES = ("new", "in_progress")
+
+# {(día, estado): variación}
+Deltas = Dict[Tuple[date, str], int]
+
+
+def message_day(created_at: Optional[datetime]) -> date:
+    """Día UTC de un mensaje (hoy si aún no tiene fecha: se está creando)"""
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+class ContactStats:
+    def apply(self, db: Session, deltas: Deltas) -> None:
+        """Suma las variaciones con un upsert (sin commit: va con la escritura)"""
+        values = [
+            {"day": day, "status": status, "count": delta}
+            for (day, status), delta in deltas.items() if delta
+        ]
+        if not values:
+            return
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(ContactStatsDaily).values(values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["day", "status"],
+                set_={"count": ContactStatsDaily.count + stmt.excluded.count}
+            ))
+            return
+        for value in values:
+            row = db.get(ContactStatsDaily, (value["day"], value["status"]))
+            if row is None:
+                db.add(ContactStatsDaily(**value))
+            else:
+                row.count += value["count"]
+        db.flush()
+
+    def record_created(self, db: Session, rows: Iterable[Tuple[Optional[datetime], Optional[str]]]) -> None:
+        """Mensajes nuevos: [(created_at, status)]"""
+        self.apply(db, Counter((message_day(created_at), status or "new") for created_at, status in rows))
+
+    def record_status_change(self, db: Session, message: ContactMessage, new_status: str) -> None:
+        if new_status == message.status or message.created_at is None:
+            return
+        day = message_day(message.created_at)
+        self.apply(db, {(day, message.status): -1, (day, new_status): 1})
+
+    def record_deleted(self, db: Session, message: ContactMessage) -> None:
+        if message.created_at is None:
+            return
+        self.apply(db, {(message_day(message.created_at), message.status): -1})
+
+    def rebuild(self, db: Session) -> int:
+        """Recalcula la tabla resumen desde los mensajes; devuelve filas escritas"""
+        if db.get_bind().dialect.name == "postgresql":
+            # Bloquea los upserts concurrentes hasta el commit: los mensajes que
+            # se confirmen después sumarán sobre la tabla ya reconstruida
+            db.execute(text(f"LOCK TABLE {ContactStatsDaily.__tablename__} IN EXCLUSIVE MODE"))
+            day_expr = func.date(func.timezone("UTC", ContactMessage.created_at))
+        else:
+            day_expr = func.date(ContactMessage.created_at)
+        status_expr = func.coalesce(ContactMessage.status, "new")
+        rows = db.query(day_expr, status_expr, func.count()).group_by(
+            day_expr, status_expr
+        ).filter(ContactMessage.created_at.isnot(None)).all()
+
+        db.query(ContactStatsDaily).delete(synchronize_session=False)
+        db.add_all([
+            ContactStatsDaily(
+                day=day if isinstance(day, date) else date.fromisoformat(str(day)),
+                status=status,
+                count=count
+            )
+            for day, status, count in rows if day is not None
+        ])
+        db.commit()
+        return len(rows)
+
+    def summary(self, db: Session, *, days: int = 30) -> Dict[str, Any]:
+        """Totales por estado, pendientes y serie diaria de los últimos `days` días"""
+        by_status = {
+            status: int(total or 0) for status, total in db.query(
+                ContactStatsDaily.status, func.sum(ContactStatsDaily.count)
+            ).group_by(ContactStatsDaily.status).all()
+        }
+
+        since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        per_day: Dict[date, Dict[str, int]] = defaultdict(dict)
+        for day, status, count in db.query(
+            ContactStatsDaily.day, ContactStatsDaily.status, ContactStatsDaily.count
+        ).filter(ContactStatsDaily.day >= since).all():
+            if count:
+                per_day[day][status] = count
+
+        return {
+            "total": sum(by_status.values()),
+            "pending": sum(by_status.get(status, 0) for status in PENDING_STATUSES),
+            "by_status": by_status,
+            "by_day": [
+                {"date": day, "total": sum(counts.values()), "by_status": counts}
+                for day, counts in sorted(per_day.items())
+            ],
+        }
+
+
+contact_stats = ContactStats()
@@ -0,0 +1,38 @@
+"""
+CRUD operations para MediaFile
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from crud.base import CRUDBase
+from models.media import MediaFile
+from schemas.media import MediaFileCreate, MediaFileUpdate
+
+class CRUDMediaFile(CRUDBase[MediaFile, MediaFileCreate, MediaFileUpdate]):
+    filter_fields = {
+        "content_type": MediaFile.content_type,
+    }
+    sort_fields = {
+        "created_at": MediaFile.created_at,
+        "size": MediaFile.size,
+    }
+    default_sort = "-created_at"
+
+    def get_by_sha256(self, db: Session, *, sha256: str) -> Optional[MediaFile]:
+        return db.query(MediaFile).filter(MediaFile.sha256 == sha256).first()
+
+    def get_or_create(self, db: Session, *, obj_in: MediaFileCreate) -> Tuple[MediaFile, bool]:
+        """Registro para el hash (deduplicado); devuelve (media, creado)"""
+        existing = self.get_by_sha256(db, sha256=obj_in.sha256)
+        if existing:
+            return existing, False
+        try:
+            return self.create(db, obj_in=obj_in), True
+        except IntegrityError:
+            # Otra subida del mismo contenido ganó la carrera
+            db.rollback()
+            return self.get_by_sha256(db, sha256=obj_in.sha256), False
+
+media_file = CRUDMediaFile(MediaFile)
@@ -2,14 +2,81 @@
 CRUD operations para PageContent
 """
 
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import cast, delete, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from core.cache import TTLCache
+from core.config import settings
+from core.http_cache import CachedBody, cached_body, make_etag
+from core.invalidation import InvalidationEvent, invalidation_bus
+from core.responses import render_json
 from crud.base import CRUDBase
-from models.page_content import PageContent
-from schemas.page_content import PageContentCreate, PageContentUpdate
+from crud.crud_page_revision import REVISION_FIELDS, page_revision, revision_state
+from crud.json_patch import (
+    PatchConflict, PatchOp, apply_ops, diff_documents, jsonb_expression, reads_earlier_writes
+)
+from crud.crud_plans import service_plan
+from models.page_content import PageContent, PageContentRevision
+from models.plans import ServicePlan
+from schemas.page_content import (
+    PageContentCreate, PageContentUpdate, PageContentResponse, PageContentPatchResult
+)
+
+# Respuestas públicas ya serializadas, por page_key
+public_cache = TTLCache(
+    "page_content_public",
+    maxsize=settings.PAGE_CACHE_MAXSIZE,
+    ttl=settings.PAGE_CACHE_TTL
+)
+
+# Bundles públicos (varias páginas + planes), por combinación solicitada
+bundle_cache = TTLCache(
+    "page_content_bundle",
+    maxsize=64,
+    ttl=settings.PAGE_CACHE_TTL
+)
+
+class VersionConflict(Exception):
+    """La versión de If-Match ya no es la actual"""
+
+    def __init__(self, current_version: int):
+        super().__init__(current_version)
+        self.current_version = current_version
+
+def _invalidate_public(event: InvalidationEvent) -> None:
+    if event.key is None:
+        public_cache.clear()
+    else:
+        public_cache.invalidate(event.key)
+
+# Proyecciones públicas (?fields=), por (page_key, secciones)
+projection_cache = TTLCache(
+    "page_content_projection",
+    maxsize=settings.PAGE_CACHE_MAXSIZE,
+    ttl=settings.PAGE_CACHE_TTL
+)
+
+# Las escrituras CRUD (en este u otro worker) publican en el bus
+invalidation_bus.subscribe(PageContent.__tablename__, _invalidate_public)
+invalidation_bus.subscribe(PageContent.__tablename__, lambda event: bundle_cache.clear())
+invalidation_bus.subscribe(PageContent.__tablename__, lambda event: projection_cache.clear())
+invalidation_bus.subscribe(ServicePlan.__tablename__, lambda event: bundle_cache.clear())
 
 class CRUDPageContent(CRUDBase[PageContent, PageContentCreate, PageContentUpdate]):
+    filter_fields = {
+        "is_active": PageContent.is_active,
+        "page_key": PageContent.page_key,
+    }
+    sort_fields = {
+        "page_key": PageContent.page_key,
+        "created_at": PageContent.created_at,
+    }
+    default_sort = "page_key"
+
     def get_by_page_key(self, db: Session, *, page_key: str) -> Optional[PageContent]:
         return db.query(PageContent).filter(PageContent.page_key == page_key).first()
 
@@ -19,7 +86,412 @@ class CRUDPageContent(CRUDBase[PageContent, PageContentCreate, PageContentUpdate
             PageContent.is_active == True
         ).first()
 
-    def get_all_active(self, db: Session):
-        return db.query(PageContent).filter(PageContent.is_active == True).all()
+    def get_all_active(self, db: Session) -> List[PageContent]:
+        # Todas las páginas activas (sin el límite de `list`)
+        return db.query(PageContent).filter(
+            PageContent.is_active == True
+        ).order_by(PageContent.page_key, PageContent.id).all()
+
+    def create(
+        self,
+        db: Session,
+        *,
+        obj_in: PageContentCreate,
+        author_id: Optional[int] = None
+    ) -> PageContent:
+        db_obj = PageContent(**jsonable_encoder(obj_in))
+        db.add(db_obj)
+        db.flush()
+        # La primera versión del historial es siempre un snapshot
+        page_revision.record(db, page_id=db_obj.id, version=db_obj.version, author_id=author_id)
+        db.commit()
+        db.refresh(db_obj)
+        self.publish_change(db_obj)
+        return db_obj
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: PageContent,
+        obj_in: Union[PageContentUpdate, Dict[str, Any]],
+        author_id: Optional[int] = None
+    ) -> PageContent:
+        """
+        Actualización completa con historial: la revisión se añade en la misma
+        transacción. La versión la sube el ORM (version_id_col), y el UPDATE va
+        condicionado a la versión leída: si un PATCH concurrente escribió antes,
+        el commit lanza StaleDataError.
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        update_data.pop("version", None)
+
+        old_state = revision_state(db_obj)
+        new_state = dict(old_state)
+        new_state.update({field: value for field, value in update_data.items() if field in REVISION_FIELDS})
+        if new_state != old_state:
+            page_revision.record(
+                db, page_id=db_obj.id, version=db_obj.version + 1,
+                old_state=old_state, new_state=new_state, author_id=author_id
+            )
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def remove(self, db: Session, *, id: int) -> PageContent:
+        # El historial se borra con la página (SQLite no aplica ON DELETE CASCADE)
+        db.execute(delete(PageContentRevision).where(PageContentRevision.page_id == id))
+        return super().remove(db, id=id)
+
+    def restore_revision(
+        self,
+        db: Session,
+        *,
+        db_obj: PageContent,
+        version: int,
+        author_id: Optional[int] = None
+    ) -> Optional[PageContent]:
+        """Vuelve al estado de `version` como una versión nueva; None si no está en el historial"""
+        state = page_revision.get_state(db, page_id=db_obj.id, version=version)
+        if state is None:
+            return None
+        return self.update(db, db_obj=db_obj, obj_in=state, author_id=author_id)
+
+    def patch_content(
+        self,
+        db: Session,
+        *,
+        page_key: str,
+        ops: List[PatchOp],
+        expected_version: Optional[int],
+        author_id: Optional[int] = None
+    ) -> Optional[PageContentPatchResult]:
+        """
+        Aplica un parche compilado (ver crud.json_patch) a content_json en un
+        único UPDATE condicionado a la versión (`expected_version`; None = *).
+        En Postgres el documento se modifica con jsonb_set sin salir de la DB;
+        en otros motores, o si una operación lee lo que escribió otra anterior
+        (ver reads_earlier_writes), se parchea en Python y se escribe con la
+        misma guarda.
+
+        Devuelve None si la página no existe. Lanza VersionConflict si la
+        versión no coincide y PatchConflict si el parche no es aplicable.
+        """
+        conditions = [PageContent.page_key == page_key]
+        if expected_version is not None:
+            conditions.append(PageContent.version == expected_version)
+
+        in_database = db.get_bind().dialect.name == "postgresql" and not reads_earlier_writes(ops)
+        if in_database:
+            from sqlalchemy.dialects.postgresql import JSONB
+
+            document = func.coalesce(PageContent.content_json, cast(literal("{}"), JSONB))
+            new_document, patch_conditions = jsonb_expression(document, ops)
+            conditions.extend(patch_conditions)
+        else:
+            row = db.query(PageContent.content_json, PageContent.version).filter(
+                PageContent.page_key == page_key
+            ).first()
+            if row is None:
+                return None
+            if expected_version is not None and row.version != expected_version:
+                raise VersionConflict(row.version)
+            new_document = apply_ops(row.content_json or {}, ops)
+            # La guarda de versión sigue valiendo entre la lectura y el UPDATE
+            conditions = [PageContent.page_key == page_key, PageContent.version == row.version]
+
+        statement = update(PageContent).values(content_json=new_document, version=PageContent.version + 1)
+        returning = [PageContent.id, PageContent.version, PageContent.updated_at]
+        if in_database:
+            # Documento anterior bloqueado en la misma sentencia: el delta del
+            # historial es el diff real entre lo que había y lo que quedó
+            previous = select(PageContent.id, PageContent.content_json).where(
+                PageContent.page_key == page_key
+            ).with_for_update().cte("previous")
+            conditions.append(PageContent.id == previous.c.id)
+            returning += [previous.c.content_json.label("previous_json"), PageContent.content_json]
+        result = db.execute(
+            statement.where(*conditions).returning(*returning).execution_options(synchronize_session=False)
+        ).first()
+
+        if result is None:
+            db.rollback()
+            current = db.query(PageContent.version).filter(PageContent.page_key == page_key).scalar()
+            if current is None:
+                return None
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(current)
+            if not in_database:
+                # Otra escritura entre la lectura y el UPDATE
+                raise VersionConflict(current)
+            raise PatchConflict("Patch preconditions failed")
+
+        if in_database:
+            delta = diff_documents(result.previous_json, result.content_json, ["content_json"])
+        else:
+            # apply_ops produjo el documento: el propio parche es el delta, con
+            # las rutas relativas al estado versionado
+            delta = [
+                PatchOp(
+                    op.kind, ["content_json"] + list(op.path), op.value,
+                    ["content_json"] + list(op.from_path) if op.from_path is not None else None
+                )
+                for op in ops
+            ]
+        page_revision.record(db, page_id=result.id, version=result.version, ops=delta, author_id=author_id)
+        db.commit()
+        invalidation_bus.publish(
+            PageContent.__tablename__,
+            page_key,
+            result.updated_at.isoformat() if result.updated_at else None
+        )
+        return PageContentPatchResult(page_key=page_key, version=result.version, updated_at=result.updated_at)
+
+    def page_version(
+        self, id: int, version: Optional[int], updated_at: Optional[datetime], created_at: Optional[datetime]
+    ) -> Tuple[str, Optional[datetime]]:
+        """
+        ETag y Last-Modified de una página. El ETag lleva la versión: dos
+        escrituras en el mismo segundo comparten updated_at pero no versión.
+        """
+        last_modified = updated_at or created_at
+        return make_etag("page", id, version, last_modified.isoformat() if last_modified else None), last_modified
+
+    def get_public_version(self, db: Session, *, page_key: str) -> Optional[Tuple[str, Optional[datetime]]]:
+        """Consulta ligera de versión (sin cargar content_json)"""
+        row = db.query(
+            PageContent.id, PageContent.version, PageContent.updated_at, PageContent.created_at
+        ).filter(
+            PageContent.page_key == page_key,
+            PageContent.is_active == True
+        ).first()
+        if row is None:
+            return None
+        return self.page_version(row.id, row.version, row.updated_at, row.created_at)
+
+    def get_public_cached(self, *, page_key: str) -> Optional[CachedBody]:
+        """Respuesta pública desde la caché del worker, sin tocar la DB"""
+        return public_cache.get(page_key)
+
+    def get_public_serialized(self, db: Session, *, page_key: str) -> Optional[CachedBody]:
+        """Respuesta pública serializada (JSON + validadores) usando la caché del worker"""
+        cached = public_cache.get(page_key)
+        if cached is not None:
+            return cached
+
+        generation = public_cache.generation
+        content = self.get_active_by_page_key(db, page_key=page_key)
+        if not content:
+            return None
+
+        entry = self._serialize_public(content)
+        public_cache.set(page_key, entry, generation=generation)
+        return entry
+
+    def get_public_many(self, db: Session, *, page_keys: List[str]) -> Dict[str, CachedBody]:
+        """Varias páginas públicas; las que no están en caché se cargan en una sola consulta"""
+        entries: Dict[str, CachedBody] = {}
+        missing = []
+        for page_key in page_keys:
+            cached = public_cache.get(page_key)
+            if cached is not None:
+                entries[page_key] = cached
+            else:
+                missing.append(page_key)
+
+        if missing:
+            generation = public_cache.generation
+            contents = db.query(PageContent).filter(
+                PageContent.page_key.in_(missing),
+                PageContent.is_active == True
+            ).all()
+            for content in contents:
+                entry = self._serialize_public(content)
+                public_cache.set(content.page_key, entry, generation=generation)
+                entries[content.page_key] = entry
+        return entries
+
+    def get_public_bundle(
+        self, db: Session, *, page_keys: List[str], include_plans: bool = False
+    ) -> CachedBody:
+        """
+        Bundle público `{"pages": {...}, "plans": [...]}` precomputado como bytes.
+        Se compone a partir de los cuerpos ya serializados de cada recurso y su
+        ETag combina los ETags de todos los componentes.
+        """
+        cache_key = (tuple(page_keys), include_plans)
+        cached = bundle_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        generation = bundle_cache.generation
+        pages = self.get_public_many(db, page_keys=page_keys)
+        plans = service_plan.get_public_serialized(db) if include_plans else None
+        entry = self._compose_bundle(page_keys, pages, plans)
+        bundle_cache.set(cache_key, entry, generation=generation)
+        return entry
+
+    def projection_etag(self, etag: str, fields: Tuple[str, ...]) -> str:
+        return make_etag("fields", etag, *fields)
+
+    def _projection_query(self, dialect_name: str, page_key: str, fields: Tuple[str, ...]):
+        """
+        SELECT de la página con content_json reducido a las secciones pedidas.
+        En Postgres la proyección se hace en la DB (jsonb_each + jsonb_object_agg),
+        así que solo viajan y se decodifican esas secciones.
+        """
+        content = PageContent.content_json
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import JSONB
+
+            sections = func.jsonb_each(PageContent.content_json).table_valued("key", "value")
+            content = func.coalesce(
+                select(func.jsonb_object_agg(sections.c.key, sections.c.value, type_=JSONB))
+                .where(sections.c.key.in_(fields))
+                .scalar_subquery(),
+                cast(literal("{}"), JSONB),
+                type_=JSONB
+            )
+        return select(
+            PageContent.id, PageContent.page_key, PageContent.title,
+            content.label("content_json"),
+            PageContent.meta_title, PageContent.meta_description, PageContent.meta_keywords,
+            PageContent.is_active, PageContent.version, PageContent.created_at, PageContent.updated_at
+        ).filter(
+            PageContent.page_key == page_key,
+            PageContent.is_active == True
+        )
+
+    def _serialize_projection(self, row: Any, fields: Tuple[str, ...]) -> CachedBody:
+        etag, last_modified = self.page_version(row.id, row.version, row.updated_at, row.created_at)
+        data = PageContentResponse.model_validate(row)
+        # En motores sin proyección en SQL se filtra aquí (en Postgres ya viene filtrado)
+        data.content_json = {key: value for key, value in data.content_json.items() if key in fields}
+        return cached_body(render_json(data), self.projection_etag(etag, fields), last_modified)
+
+    def get_public_projection(
+        self, db: Session, *, page_key: str, fields: Tuple[str, ...]
+    ) -> Optional[CachedBody]:
+        """Página pública con solo las secciones `fields` de content_json"""
+        cache_key = (page_key, fields)
+        cached = projection_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        generation = projection_cache.generation
+        row = db.execute(self._projection_query(db.get_bind().dialect.name, page_key, fields)).first()
+        if row is None:
+            return None
+        entry = self._serialize_projection(row, fields)
+        projection_cache.set(cache_key, entry, generation=generation)
+        return entry
+
+    # Variantes asíncronas de las lecturas públicas (DB_ASYNC_MODE)
+    async def aget_public_projection(
+        self, db: AsyncSession, *, page_key: str, fields: Tuple[str, ...]
+    ) -> Optional[CachedBody]:
+        cache_key = (page_key, fields)
+        cached = projection_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        generation = projection_cache.generation
+        result = await db.execute(self._projection_query(db.bind.dialect.name, page_key, fields))
+        row = result.first()
+        if row is None:
+            return None
+        entry = self._serialize_projection(row, fields)
+        projection_cache.set(cache_key, entry, generation=generation)
+        return entry
+
+    async def aget_public_version(
+        self, db: AsyncSession, *, page_key: str
+    ) -> Optional[Tuple[str, Optional[datetime]]]:
+        result = await db.execute(
+            select(
+                PageContent.id, PageContent.version, PageContent.updated_at, PageContent.created_at
+            ).filter(
+                PageContent.page_key == page_key,
+                PageContent.is_active == True
+            )
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return self.page_version(row.id, row.version, row.updated_at, row.created_at)
+
+    async def aget_public_serialized(self, db: AsyncSession, *, page_key: str) -> Optional[CachedBody]:
+        entries = await self.aget_public_many(db, page_keys=[page_key])
+        return entries.get(page_key)
+
+    async def aget_public_many(self, db: AsyncSession, *, page_keys: List[str]) -> Dict[str, CachedBody]:
+        entries: Dict[str, CachedBody] = {}
+        missing = []
+        for page_key in page_keys:
+            cached = public_cache.get(page_key)
+            if cached is not None:
+                entries[page_key] = cached
+            else:
+                missing.append(page_key)
+
+        if missing:
+            generation = public_cache.generation
+            result = await db.execute(
+                select(PageContent).filter(
+                    PageContent.page_key.in_(missing),
+                    PageContent.is_active == True
+                )
+            )
+            for content in result.scalars().all():
+                entry = self._serialize_public(content)
+                public_cache.set(content.page_key, entry, generation=generation)
+                entries[content.page_key] = entry
+        return entries
+
+    async def aget_public_bundle(
+        self, db: AsyncSession, *, page_keys: List[str], include_plans: bool = False
+    ) -> CachedBody:
+        cache_key = (tuple(page_keys), include_plans)
+        cached = bundle_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        generation = bundle_cache.generation
+        pages = await self.aget_public_many(db, page_keys=page_keys)
+        plans = await service_plan.aget_public_serialized(db) if include_plans else None
+        entry = self._compose_bundle(page_keys, pages, plans)
+        bundle_cache.set(cache_key, entry, generation=generation)
+        return entry
+
+    def _compose_bundle(
+        self, page_keys: List[str], pages: Dict[str, CachedBody], plans: Optional[CachedBody]
+    ) -> CachedBody:
+        found = [page_key for page_key in page_keys if page_key in pages]
+        versions = [pages[page_key].etag for page_key in found]
+
+        parts = [b'{"pages":{']
+        parts.append(b",".join(render_json(page_key) + b":" + pages[page_key].body for page_key in found))
+        parts.append(b'}')
+        if plans is not None:
+            parts.extend([b',"plans":', plans.body])
+            versions.append(plans.etag)
+        parts.append(b'}')
+
+        return cached_body(
+            b"".join(parts),
+            make_etag("bundle", *page_keys, plans is not None, *versions)
+        )
+
+    def _serialize_public(self, content: PageContent) -> CachedBody:
+        etag, last_modified = self.page_version(content.id, content.version, content.updated_at, content.created_at)
+        return cached_body(
+            render_json(PageContentResponse.model_validate(content)),
+            etag,
+            last_modified
+        )
+
+    def cache_key(self, db_obj: PageContent) -> str:
+        return db_obj.page_key
 
 page_content = CRUDPageContent(PageContent)
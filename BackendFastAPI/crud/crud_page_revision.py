@@ -0,0 +1,198 @@
+"""
+Historial de versiones de PageContent (snapshots + deltas)
+
+Cada escritura de una página añade una fila con su nueva versión, en la misma
+transacción que la escritura. Cada PAGE_REVISION_SNAPSHOT_EVERY versiones (o
+si el delta no compensa) se guarda el estado completo; en medio solo las
+operaciones de parche respecto a la versión anterior (ver crud.json_patch).
+Reconstruir una versión cuesta una consulta: el último snapshot anterior y
+los deltas hasta ella. La lectura de la versión actual no pasa por aquí.
+
+`compact` aplica la retención: descarta lo que queda fuera de las últimas
+PAGE_REVISION_KEEP versiones y de los últimos PAGE_REVISION_KEEP_DAYS días,
+convirtiendo antes en snapshot la versión más antigua que se conserva.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from crud.base import CRUDBase
+from crud.json_patch import PatchOp, apply_ops, diff_documents, ops_from_data, ops_to_data
+from models.page_content import PageContent, PageContentRevision
+
+# Campos versionados de la página
+REVISION_FIELDS = ("title", "content_json", "meta_title", "meta_description", "meta_keywords", "is_active")
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+# Clave del advisory lock de Postgres para que compacte un solo worker
+COMPACTION_LOCK_ID = 0x5245_5649  # "REVI"
+
+
+def revision_state(page: Any) -> Dict[str, Any]:
+    """Estado versionado de una página (objeto ORM o fila)"""
+    return {field: getattr(page, field) for field in REVISION_FIELDS}
+
+
+def _size(data: Any) -> int:
+    return len(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+class CRUDPageRevision(CRUDBase[PageContentRevision, Any, Any]):
+    filter_fields = {
+        "page_id": PageContentRevision.page_id,
+        "kind": PageContentRevision.kind,
+    }
+    sort_fields = {
+        "version": PageContentRevision.version,
+    }
+    default_sort = "-version"
+
+    def _chain_head(self, db: Session, page_id: int) -> Optional[Any]:
+        """(última versión, último snapshot) registrados para la página"""
+        return db.query(
+            func.max(PageContentRevision.version).label("version"),
+            func.max(PageContentRevision.version).filter(
+                PageContentRevision.kind == SNAPSHOT
+            ).label("snapshot_version")
+        ).filter(PageContentRevision.page_id == page_id).one()
+
+    def record(
+        self,
+        db: Session,
+        *,
+        page_id: int,
+        version: int,
+        old_state: Optional[Dict[str, Any]] = None,
+        new_state: Optional[Dict[str, Any]] = None,
+        ops: Optional[Sequence[PatchOp]] = None,
+        author_id: Optional[int] = None
+    ) -> PageContentRevision:
+        """
+        Añade (sin commit) la revisión `version`. El delta sale de `ops` o del
+        diff entre `old_state` y `new_state`; si toca snapshot y no se pasa
+        `new_state`, se lee el estado de la fila (ya actualizada en la transacción).
+        """
+        head = self._chain_head(db, page_id)
+        needs_snapshot = (
+            head.version != version - 1
+            or head.snapshot_version is None
+            or version - head.snapshot_version >= settings.PAGE_REVISION_SNAPSHOT_EVERY
+        )
+
+        delta = None
+        if not needs_snapshot:
+            if ops is None:
+                ops = diff_documents(old_state, new_state)
+            # Las comprobaciones del parche no forman parte del cambio
+            delta = ops_to_data([op for op in ops if op.kind not in ("test", "exists")])
+            if new_state is not None and _size(delta) >= _size(new_state) // 2:
+                needs_snapshot = True
+
+        if needs_snapshot:
+            if new_state is None:
+                page = db.query(*[getattr(PageContent, field) for field in REVISION_FIELDS]).filter(
+                    PageContent.id == page_id
+                ).one()
+                new_state = revision_state(page)
+            kind, data = SNAPSHOT, new_state
+        else:
+            kind, data = DELTA, delta
+
+        revision = PageContentRevision(
+            page_id=page_id, version=version, kind=kind, data=data,
+            size=_size(data), author_id=author_id
+        )
+        db.add(revision)
+        return revision
+
+    def get_state(self, db: Session, *, page_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """Estado de la página en `version`: último snapshot + deltas, en una consulta"""
+        base = select(func.max(PageContentRevision.version)).where(
+            PageContentRevision.page_id == page_id,
+            PageContentRevision.kind == SNAPSHOT,
+            PageContentRevision.version <= version
+        ).scalar_subquery()
+        revisions = db.query(PageContentRevision).filter(
+            PageContentRevision.page_id == page_id,
+            PageContentRevision.version >= base,
+            PageContentRevision.version <= version
+        ).order_by(PageContentRevision.version).all()
+
+        if not revisions or revisions[0].kind != SNAPSHOT or revisions[-1].version != version:
+            return None
+        state = revisions[0].data
+        for revision in revisions[1:]:
+            state = apply_ops(state, ops_from_data(revision.data))
+        return state
+
+    def compact(self, db: Session, *, page_id: int) -> int:
+        """Retención de una página (sin commit); devuelve las revisiones eliminadas"""
+        head = self._chain_head(db, page_id)
+        if head.version is None:
+            return 0
+        keep_from = head.version - settings.PAGE_REVISION_KEEP + 1
+        if settings.PAGE_REVISION_KEEP_DAYS > 0:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=settings.PAGE_REVISION_KEEP_DAYS)
+            recent = db.query(func.min(PageContentRevision.version)).filter(
+                PageContentRevision.page_id == page_id,
+                PageContentRevision.created_at >= cutoff
+            ).scalar()
+            if recent is not None:
+                keep_from = min(keep_from, recent)
+
+        oldest = db.query(func.min(PageContentRevision.version)).filter(
+            PageContentRevision.page_id == page_id
+        ).scalar()
+        if keep_from <= oldest:
+            return 0
+
+        # La primera versión que se conserva pasa a ser snapshot
+        first_kept = db.query(PageContentRevision).filter(
+            PageContentRevision.page_id == page_id,
+            PageContentRevision.version >= keep_from
+        ).order_by(PageContentRevision.version).first()
+        if first_kept.kind != SNAPSHOT:
+            state = self.get_state(db, page_id=page_id, version=first_kept.version)
+            if state is None:
+                return 0
+            first_kept.kind = SNAPSHOT
+            first_kept.data = state
+            first_kept.size = _size(state)
+
+        removed = db.execute(
+            delete(PageContentRevision).where(
+                PageContentRevision.page_id == page_id,
+                PageContentRevision.version < first_kept.version
+            )
+        ).rowcount
+        return removed
+
+    def compact_all(self, db: Session) -> Dict[str, int]:
+        """
+        Retención de todas las páginas en una transacción. En Postgres un
+        advisory lock de transacción deja compactar a un solo worker a la vez.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            locked = db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": COMPACTION_LOCK_ID}
+            ).scalar()
+            if not locked:
+                db.rollback()
+                return {"pages": 0, "removed": 0, "skipped": True}
+        try:
+            page_ids = [row[0] for row in db.query(PageContentRevision.page_id).distinct().all()]
+            removed = sum(self.compact(db, page_id=page_id) for page_id in page_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return {"pages": len(page_ids), "removed": removed, "skipped": False}
+
+page_revision = CRUDPageRevision(PageContentRevision)
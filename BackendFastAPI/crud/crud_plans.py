@@ -3,16 +3,45 @@ CRUD operations para ServicePlan
 """
 
 from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from slugify import slugify
 
+from core.cache import TTLCache
+from core.config import settings
+from core.http_cache import CachedBody, cached_body, etag_for_body
+from core.invalidation import invalidation_bus
+from core.responses import render_json
 from crud.base import CRUDBase
 from models.plans import ServicePlan
-from schemas.plans import ServicePlanCreate, ServicePlanUpdate
+from schemas.plans import ServicePlanCreate, ServicePlanUpdate, ServicePlanResponse
+
+# Lista pública de planes ya serializada (una única entrada)
+PUBLIC_PLANS_KEY = "active"
+public_cache = TTLCache(
+    "service_plans_public",
+    maxsize=1,
+    ttl=settings.PAGE_CACHE_TTL
+)
+
+# Cualquier cambio en un plan puede alterar la lista completa
+invalidation_bus.subscribe(ServicePlan.__tablename__, lambda event: public_cache.clear())
 
 class CRUDServicePlan(CRUDBase[ServicePlan, ServicePlanCreate, ServicePlanUpdate]):
+    filter_fields = {
+        "is_active": ServicePlan.is_active,
+        "is_popular": ServicePlan.is_popular,
+    }
+    sort_fields = {
+        "display_order": ServicePlan.display_order,
+        "name": ServicePlan.name,
+        "created_at": ServicePlan.created_at,
+    }
+    default_sort = "display_order"
+
     def create(self, db: Session, *, obj_in: ServicePlanCreate) -> ServicePlan:
-        # Generar slug automáticamente
+        # Generar slug automáticamente (import diferido: no hace falta en el arranque)
+        from slugify import slugify
         slug = slugify(obj_in.name)
         
         # Crear objeto con slug
@@ -23,12 +52,47 @@ class CRUDServicePlan(CRUDBase[ServicePlan, ServicePlanCreate, ServicePlanUpdate
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.publish_change(db_obj)
         return db_obj
 
     def get_active_plans(self, db: Session) -> List[ServicePlan]:
+        # Todos los activos (sin el límite de `list`); el id desempata el orden
         return db.query(ServicePlan).filter(
             ServicePlan.is_active == True
-        ).order_by(ServicePlan.display_order).all()
+        ).order_by(ServicePlan.display_order, ServicePlan.id).all()
+
+    def get_public_serialized(self, db: Session) -> CachedBody:
+        """Lista pública serializada; el ETag es el hash del contenido"""
+        cached = public_cache.get(PUBLIC_PLANS_KEY)
+        if cached is not None:
+            return cached
+
+        generation = public_cache.generation
+        entry = self._serialize_public(self.get_active_plans(db))
+        public_cache.set(PUBLIC_PLANS_KEY, entry, generation=generation)
+        return entry
+
+    async def aget_public_serialized(self, db: AsyncSession) -> CachedBody:
+        """Variante asíncrona de get_public_serialized (DB_ASYNC_MODE)"""
+        cached = public_cache.get(PUBLIC_PLANS_KEY)
+        if cached is not None:
+            return cached
+
+        generation = public_cache.generation
+        # Mismo orden que get_active_plans: el ETag es el hash del cuerpo
+        result = await db.execute(
+            select(ServicePlan).filter(
+                ServicePlan.is_active == True
+            ).order_by(ServicePlan.display_order, ServicePlan.id)
+        )
+        entry = self._serialize_public(result.scalars().all())
+        public_cache.set(PUBLIC_PLANS_KEY, entry, generation=generation)
+        return entry
+
+    def _serialize_public(self, plans: List[ServicePlan]) -> CachedBody:
+        body = render_json([ServicePlanResponse.model_validate(plan) for plan in plans])
+        # Sin Last-Modified: borrar un plan no cambia el máximo de updated_at
+        return cached_body(body, etag_for_body(body))
 
     def get_by_slug(self, db: Session, *, slug: str) -> ServicePlan:
         return db.query(ServicePlan).filter(ServicePlan.slug == slug).first()
@@ -3,7 +3,8 @@ CRUD operations para User
 """
 
 from typing import Any, Dict, Optional, Union
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Query, Session
 
 from crud.base import CRUDBase
 from models.user import User
@@ -11,12 +12,42 @@ from schemas.user import UserCreate, UserUpdate
 from security.core import get_password_hash, verify_password
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    filter_fields = {
+        "role": User.role,
+        "is_active": User.is_active,
+    }
+    sort_fields = {
+        "date_joined": User.date_joined,
+        "username": User.username,
+        "email": User.email,
+    }
+    default_sort = "-date_joined"
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
     def get_by_username(self, db: Session, *, username: str) -> Optional[User]:
         return db.query(User).filter(User.username == username).first()
 
+    def search_query(self, db: Session, *, search: str = "") -> Query:
+        """
+        Usuarios que coinciden con `search`. La búsqueda es por prefijo (sin
+        distinguir mayúsculas) para poder usar los índices sobre lower(columna).
+        """
+        query = db.query(User)
+        if search:
+            term = search.strip().lower()
+            for char in ("\\", "%", "_"):
+                term = term.replace(char, "\\" + char)
+            term += "%"
+            query = query.filter(or_(
+                func.lower(User.username).like(term, escape="\\"),
+                func.lower(User.email).like(term, escape="\\"),
+                func.lower(User.first_name).like(term, escape="\\"),
+                func.lower(User.last_name).like(term, escape="\\"),
+            ))
+        return query
+
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
@@ -31,6 +62,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.publish_change(db_obj)
         return db_obj
 
     def update(
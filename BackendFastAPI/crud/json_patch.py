@@ -0,0 +1,391 @@
+"""
+Parches parciales de documentos JSON: RFC 6902 (JSON Patch) y RFC 7396 (merge patch)
+
+Los parches se compilan a una lista de operaciones primitivas (`PatchOp`) que
+se pueden ejecutar de dos formas:
+
+* `jsonb_expression`: una única expresión SQL de Postgres (jsonb_set,
+  jsonb_insert, #-) más las condiciones del WHERE, de modo que el UPDATE
+  reescribe el documento en la DB sin leerlo ni enviarlo entero.
+* `apply_ops`: en Python sobre el documento ya cargado (SQLite y otros).
+
+En la expresión SQL las lecturas (precondiciones `test` / existencia de la
+ruta, origen de move/copy, "ensure") se evalúan sobre el documento
+almacenado antes del parche. Solo equivale a aplicar las operaciones en
+orden (RFC 6902) si ninguna lee una ruta que haya escrito una anterior:
+`reads_earlier_writes` lo detecta y esos parches van por `apply_ops`.
+Un segmento numérico en `add` se trata como índice de array. Las escrituras
+en SQL validan el contenedor padre igual que `apply_ops` (índice dentro del
+array, padre objeto o array): si no, la condición falla y el parche da el
+mismo PatchConflict en los dos caminos.
+"""
+
+import copy
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+# Índice "fuera de rango" para que jsonb_set añada al final del array
+APPEND_INDEX = "2147483647"
+
+
+class InvalidPatch(ValueError):
+    """Documento de parche mal formado"""
+
+
+class PatchConflict(Exception):
+    """El parche no se puede aplicar al estado actual del documento"""
+
+
+class PatchOp(NamedTuple):
+    """
+    Operación primitiva:
+    * "set":    escribe `value` en `path` (crea la clave o sustituye)
+    * "insert": inserta `value` en el array antes de `path` ("-" = al final)
+    * "remove": elimina `path`
+    * "ensure": si `path` no es un objeto, lo sustituye por {} (merge patch)
+    * "copy":   escribe en `path` el valor de `from_path`
+    * "test":   exige que `path` valga `value`
+    * "exists": exige que `path` exista
+    """
+    kind: str
+    path: List[str]
+    value: Any = None
+    from_path: Optional[List[str]] = None
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """JSON Pointer (RFC 6901) -> lista de segmentos"""
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise InvalidPatch(f"Invalid JSON pointer: {pointer!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def _is_index(segment: str) -> bool:
+    return segment == "-" or (segment.isdigit() and (segment == "0" or not segment.startswith("0")))
+
+
+def compile_json_patch(operations: Any, base: Sequence[str] = ()) -> List[PatchOp]:
+    """RFC 6902 -> operaciones primitivas (rutas relativas a `base`)"""
+    if not isinstance(operations, list) or not operations:
+        raise InvalidPatch("JSON Patch must be a non-empty array of operations")
+
+    base = list(base)
+    ops: List[PatchOp] = []
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise InvalidPatch("Each operation needs 'op' and 'path'")
+        kind = operation["op"]
+        path = base + parse_pointer(operation["path"])
+        if kind in ("add", "replace", "test") and "value" not in operation:
+            raise InvalidPatch(f"'{kind}' operation needs 'value'")
+        if kind in ("move", "copy") and "from" not in operation:
+            raise InvalidPatch(f"'{kind}' operation needs 'from'")
+        if not path and kind in ("remove", "move"):
+            raise InvalidPatch(f"Cannot {kind} the document root")
+
+        if kind == "add":
+            if len(path) > 1:
+                ops.append(PatchOp("exists", path[:-1]))
+            if path and _is_index(path[-1]):
+                ops.append(PatchOp("insert", path, operation["value"]))
+            else:
+                ops.append(PatchOp("set", path, operation["value"]))
+        elif kind == "replace":
+            ops.append(PatchOp("exists", path))
+            ops.append(PatchOp("set", path, operation["value"]))
+        elif kind == "remove":
+            ops.append(PatchOp("exists", path))
+            ops.append(PatchOp("remove", path))
+        elif kind == "test":
+            ops.append(PatchOp("test", path, operation["value"]))
+        elif kind in ("move", "copy"):
+            from_path = base + parse_pointer(operation["from"])
+            if kind == "move" and path[:len(from_path)] == from_path:
+                raise InvalidPatch("Cannot move a value into one of its children")
+            ops.append(PatchOp("exists", from_path))
+            ops.append(PatchOp("copy", path, from_path=from_path))
+            if kind == "move":
+                ops.append(PatchOp("remove", from_path))
+        else:
+            raise InvalidPatch(f"Unsupported operation: {kind!r}")
+    return ops
+
+
+def compile_merge_patch(patch: Any, base: Sequence[str] = ()) -> List[PatchOp]:
+    """RFC 7396 aplicado en la sección `base` -> operaciones primitivas"""
+    base = list(base)
+    if not isinstance(patch, dict):
+        # Un merge patch que no es un objeto sustituye el destino entero
+        return [PatchOp("set", base, patch)]
+
+    # La sección y sus ancestros tienen que ser objetos (se crean si faltan)
+    ops = [PatchOp("ensure", base[:i]) for i in range(len(base) + 1)]
+    _merge_ops(patch, base, ops)
+    return ops
+
+
+def _merge_ops(patch: Dict[str, Any], path: List[str], ops: List[PatchOp]) -> None:
+    for key, value in patch.items():
+        child = path + [key]
+        if value is None:
+            ops.append(PatchOp("remove", child))
+        elif isinstance(value, dict):
+            # "ensure" antes de tocar el subárbol: así solo lee el valor original
+            ops.append(PatchOp("ensure", child))
+            _merge_ops(value, child, ops)
+        else:
+            ops.append(PatchOp("set", child, value))
+
+
+def diff_documents(old: Any, new: Any, path: Sequence[str] = ()) -> List[PatchOp]:
+    """
+    Operaciones que transforman `old` en `new`: recorre objetos clave a clave
+    y arrays de igual longitud posición a posición; el resto se sustituye.
+    """
+    path = list(path)
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [PatchOp("remove", path + [key]) for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                ops.extend(diff_documents(old[key], value, path + [key]))
+            else:
+                ops.append(PatchOp("set", path + [key], value))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(diff_documents(old_item, new_item, path + [str(index)]))
+        return ops
+    return [PatchOp("set", path, new)]
+
+
+def ops_to_data(ops: Sequence[PatchOp]) -> List[list]:
+    """Forma compacta y serializable en JSON: [kind, path, value?, from?]"""
+    data = []
+    for op in ops:
+        item = [op.kind, list(op.path)]
+        if op.from_path is not None:
+            item.extend([op.value, list(op.from_path)])
+        elif op.kind in ("set", "insert", "test"):
+            item.append(op.value)
+        data.append(item)
+    return data
+
+
+def ops_from_data(data: Sequence[list]) -> List[PatchOp]:
+    return [
+        PatchOp(item[0], item[1], item[2] if len(item) > 2 else None, item[3] if len(item) > 3 else None)
+        for item in data
+    ]
+
+
+# Ejecución en Python
+
+def _resolve(document: Any, path: Sequence[str]) -> Any:
+    node = document
+    for segment in path:
+        if isinstance(node, dict) and segment in node:
+            node = node[segment]
+        elif isinstance(node, list) and segment.isdigit() and int(segment) < len(node):
+            node = node[int(segment)]
+        else:
+            raise PatchConflict(f"Path not found: /{'/'.join(path)}")
+    return node
+
+
+def _parent(document: Any, path: Sequence[str]) -> Any:
+    parent = _resolve(document, path[:-1])
+    if not isinstance(parent, (dict, list)):
+        raise PatchConflict(f"Parent of /{'/'.join(path)} is not a container")
+    return parent
+
+
+def _write(document: Any, path: Sequence[str], value: Any, *, insert: bool = False) -> Any:
+    if not path:
+        return value
+    parent = _parent(document, path)
+    key = path[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+        return document
+    if key == "-":
+        parent.append(value)
+        return document
+    if not key.isdigit() or int(key) > len(parent) - (0 if insert else 1):
+        raise PatchConflict(f"Invalid array index: /{'/'.join(path)}")
+    if insert:
+        parent.insert(int(key), value)
+    else:
+        parent[int(key)] = value
+    return document
+
+
+def apply_ops(document: Any, ops: Sequence[PatchOp]) -> Any:
+    """Aplica las operaciones a una copia de `document` y la devuelve"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        if op.kind == "set":
+            document = _write(document, op.path, copy.deepcopy(op.value))
+        elif op.kind == "insert":
+            document = _write(document, op.path, copy.deepcopy(op.value), insert=True)
+        elif op.kind == "remove":
+            parent = _parent(document, op.path)
+            try:
+                if isinstance(parent, dict):
+                    del parent[op.path[-1]]
+                else:
+                    del parent[int(op.path[-1])]
+            except (KeyError, IndexError, ValueError):
+                # Merge patch: borrar una clave que no existe no es un error
+                pass
+        elif op.kind == "ensure":
+            try:
+                current = _resolve(document, op.path)
+            except PatchConflict:
+                current = None
+            if not isinstance(current, dict):
+                document = _write(document, op.path, {})
+        elif op.kind == "copy":
+            document = _write(document, op.path, copy.deepcopy(_resolve(document, op.from_path)))
+        elif op.kind == "test":
+            if _resolve(document, op.path) != op.value:
+                raise PatchConflict(f"Test failed: /{'/'.join(op.path)}")
+        elif op.kind == "exists":
+            _resolve(document, op.path)
+    return document
+
+
+# Compilación a SQL de Postgres
+
+def _overlaps(a: Sequence[str], b: Sequence[str]) -> bool:
+    """Una ruta contiene a la otra (o son la misma)"""
+    n = min(len(a), len(b))
+    return list(a[:n]) == list(b[:n])
+
+
+def reads_earlier_writes(ops: Sequence[PatchOp]) -> bool:
+    """
+    True si alguna operación lee una ruta escrita por una anterior, de modo
+    que `jsonb_expression` (que lee el documento almacenado) no daría el
+    mismo resultado que aplicarlas en orden. Insertar o borrar por índice
+    desplaza el resto del array: cuenta como escritura del array entero.
+    "ensure" no cuenta como escritura: conserva el objeto o lo sustituye por
+    {}, y en ambos casos las lecturas bajo esa ruta coinciden. Cada escritura
+    lee además el tipo y la longitud de su padre (ver `jsonb_expression`).
+    """
+    written: List[Sequence[str]] = []
+    for op in ops:
+        reads = {
+            "test": op.path, "exists": op.path, "ensure": op.path, "copy": op.from_path
+        }.get(op.kind)
+        if reads is not None and any(_overlaps(reads, path) for path in written):
+            return True
+        if op.kind in ("set", "insert", "copy") and op.path:
+            # La escritura comprueba el tipo (y la longitud) del padre
+            parent = list(op.path[:-1])
+            if any(parent[:len(path)] == list(path) for path in written if len(path) <= len(parent)):
+                return True
+        if op.kind in ("set", "copy"):
+            appends = op.path and op.path[-1] == "-"
+            written.append(op.path[:-1] if appends else op.path)
+        elif op.kind in ("insert", "remove"):
+            shifts = op.path and _is_index(op.path[-1])
+            written.append(op.path[:-1] if shifts else op.path)
+    return False
+
+
+def jsonb_expression(document, ops: Sequence[PatchOp]):
+    """
+    (Postgres) Expresión JSONB con el documento parcheado y lista de
+    condiciones para el WHERE. `document` es la columna ya como JSONB.
+    Solo para parches con `reads_earlier_writes(ops)` falso.
+    """
+    from sqlalchemy import Text, case, cast, false, func, literal, true
+    from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+    def path_param(path: Sequence[str]):
+        return literal(list(path), ARRAY(Text))
+
+    def json_param(value: Any):
+        return cast(literal(json.dumps(value, ensure_ascii=False)), JSONB)
+
+    def stored(path: Sequence[str]):
+        return document.op("#>", return_type=JSONB)(path_param(path))
+
+    expression = document
+    conditions = []
+    # Rutas que un "ensure" anterior dejó como objeto (merge patch)
+    ensured = set()
+
+    def write(expression, path: Sequence[str], value, *, insert: bool = False):
+        """
+        jsonb_set / jsonb_insert con las reglas de `_write`: en un objeto la
+        clave se crea o sustituye; en un array "-" añade al final y un índice
+        tiene que estar dentro del array (hasta len para insertar). Si no, la
+        condición del WHERE falla (jsonb_insert añadiría al final en silencio
+        o fallaría con una clave existente).
+        """
+        if tuple(path[:-1]) in ensured:
+            return func.jsonb_set(expression, path_param(path), value, True)
+
+        parent = stored(path[:-1]) if len(path) > 1 else document
+        parent_type = func.jsonb_typeof(parent)
+        is_object = parent_type == "object"
+        key = path[-1]
+        target = path_param(path)
+        if key == "-":
+            array_valid = true()
+            target = case((is_object, target), else_=path_param(list(path[:-1]) + [APPEND_INDEX]))
+        elif key.isdigit():
+            length = func.jsonb_array_length(
+                case((parent_type == "array", parent), else_=cast(literal("[]"), JSONB))
+            )
+            index = literal(int(key))
+            array_valid = index <= length if insert else index < length
+        else:
+            array_valid = false()
+        conditions.append(case((is_object, true()), (parent_type == "array", array_valid), else_=false()))
+
+        if not insert or key == "-":
+            return func.jsonb_set(expression, target, value, True)
+        # En un objeto add sustituye la clave, pero jsonb_insert solo crea
+        # claves nuevas: se borra antes (#- con ruta vacía no cambia nada)
+        no_path = cast(path_param([]), ARRAY(Text))
+        cleared = expression.op("#-", return_type=JSONB)(case((is_object, target), else_=no_path))
+        return func.jsonb_insert(cleared, target, value)
+
+    for op in ops:
+        if op.kind in ("set", "copy", "remove"):
+            # Sobrescribir una ruta anula los "ensure" de ella y de su subárbol
+            ensured = {path for path in ensured if list(path[:len(op.path)]) != list(op.path)}
+        if op.kind == "set":
+            if op.path:
+                expression = write(expression, op.path, json_param(op.value))
+            else:
+                expression = json_param(op.value)
+        elif op.kind == "insert":
+            expression = write(expression, op.path, json_param(op.value), insert=True)
+        elif op.kind == "remove":
+            expression = expression.op("#-", return_type=JSONB)(path_param(op.path))
+        elif op.kind == "ensure":
+            current = stored(op.path) if op.path else document
+            value = case(
+                (func.jsonb_typeof(current) == "object", current),
+                else_=cast(literal("{}"), JSONB)
+            )
+            if op.path:
+                expression = func.jsonb_set(expression, path_param(op.path), value, True)
+            else:
+                expression = value
+            ensured.add(tuple(op.path))
+        elif op.kind == "copy":
+            expression = write(expression, op.path, stored(op.from_path))
+        elif op.kind == "test":
+            conditions.append(stored(op.path) == json_param(op.value))
+        elif op.kind == "exists":
+            conditions.append(stored(op.path).isnot(None))
+    return expression, conditions
@@ -0,0 +1,120 @@
+"""
+Utilidades de paginación: COUNT eficiente y cursores keyset
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import String, and_, func, literal, or_, select, text
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.types import TypeEngine
+
+from core.config import settings
+
+
+class InvalidListQuery(ValueError):
+    """Filtro, orden o cursor no permitido en un listado"""
+
+
+class InvalidCursor(InvalidListQuery):
+    """Cursor de paginación mal formado"""
+
+
+class ListPage(NamedTuple):
+    """Resultado de CRUDBase.list: filas de la página y cursor de la siguiente"""
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Serializa los valores de la última fila en un token opaco (base64url)"""
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != size:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) and "dt" in value else value
+            for value in payload
+        ]
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def cursor_values(db: Session, types: Sequence[TypeEngine], values: Sequence[Any]) -> List[Any]:
+    """
+    Comprueba los valores decodificados del cursor contra el tipo de cada
+    columna del orden (un cursor manipulado no llega a la DB) y los prepara
+    para compararlos con lo que guarda la columna.
+
+    SQLite guarda los DateTime como texto y compara como texto: las filas con
+    server_default (CURRENT_TIMESTAMP) quedan como "YYYY-MM-DD HH:MM:SS",
+    pero el tipo DateTime enlazaría "...HH:MM:SS.000000", que ordena detrás,
+    y la fila frontera se repetiría en cada página.
+    """
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    prepared = []
+    for type_, value in zip(types, values):
+        try:
+            expected = type_.python_type
+        except NotImplementedError:
+            expected = object
+        if expected is float:
+            expected = (int, float)
+        if value is None or isinstance(value, bool) or not isinstance(value, expected):
+            raise InvalidCursor("Invalid cursor")
+        if sqlite and isinstance(value, datetime) and not value.microsecond:
+            value = literal(value.replace(tzinfo=None).isoformat(sep=" "), String)
+        prepared.append(value)
+    return prepared
+
+
+def keyset_filter(columns: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """
+    Condición "fila posterior al cursor" para un orden por varias columnas:
+    (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        after = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+
+def count_query(query: Query) -> int:
+    """
+    COUNT(*) en SQL sobre la consulta (sin cargar filas ni ORDER BY). Cuenta
+    sobre una subconsulta: con `with_entities(func.count())` la consulta sin
+    filtros se queda sin FROM y devuelve siempre 1.
+    """
+    subquery = query.order_by(None).subquery()
+    return query.session.execute(select(func.count()).select_from(subquery)).scalar() or 0
+
+
+def estimate_table_count(db: Session, table_name: str) -> Optional[int]:
+    """Estimación del planner de Postgres (pg_class.reltuples); None si no aplica"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+        {"table": table_name}
+    ).scalar()
+    if estimate is None or estimate < settings.COUNT_ESTIMATE_THRESHOLD:
+        # Tablas pequeñas (o sin ANALYZE): el COUNT exacto es barato
+        return None
+    return int(estimate)
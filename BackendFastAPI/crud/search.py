@@ -0,0 +1,150 @@
+"""
+Búsqueda de texto en memoria (fallback para SQLite)
+
+En Postgres la búsqueda usa la columna generada `search_vector` (tsvector) y
+su índice GIN. Con SQLite (desarrollo, tests) se usa este índice invertido en
+memoria, con el mismo contrato: todos los términos deben aparecer (AND),
+ranking por pesos de campo y fragmentos con las coincidencias marcadas con
+<b>...</b>.
+"""
+
+import html
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.invalidation import InvalidationEvent
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+SNIPPET_RADIUS = 60
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos ("Información" -> "informacion")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(normalize(text or ""))
+
+
+def highlight(text: str, terms: Iterable[str], *, radius: int = SNIPPET_RADIUS) -> str:
+    """Fragmento alrededor de la primera coincidencia, con <b>...</b>"""
+    text = text or ""
+    terms = [term for term in terms if term]
+    if not terms:
+        return html.escape(text[: radius * 2])
+    # `normalize` conserva la longitud para el alfabeto latino habitual, así
+    # que las posiciones del texto normalizado sirven sobre el original
+    folded = normalize(text)
+    if len(folded) != len(text):
+        folded = text.lower()
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b")
+    match = pattern.search(folded)
+    if match is None:
+        return html.escape(text[: radius * 2])
+
+    start = max(match.start() - radius, 0)
+    end = min(match.end() + radius, len(text))
+    parts, last = [], start
+    for found in pattern.finditer(folded, start, end):
+        parts.append(html.escape(text[last:found.start()]))
+        parts.append(f"<b>{html.escape(text[found.start():found.end()])}</b>")
+        last = found.end()
+    parts.append(html.escape(text[last:end]))
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+class InvertedIndex:
+    """
+    Índice invertido término -> {doc_id: puntuación} con pesos por campo.
+
+    Se construye de forma perezosa con `loader(db)` (todas las filas) y se
+    mantiene con eventos del bus de invalidación: una clave marca ese
+    documento para recargarlo con `fetch(db, ids)`, un evento sin clave fuerza
+    la reconstrucción completa.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, float],
+        *,
+        loader: Callable[[Any], Iterable[Any]],
+        fetch: Callable[[Any, Set[int]], Iterable[Any]]
+    ):
+        self.weights = weights
+        self._loader = loader
+        self._fetch = fetch
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._built = False
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def on_event(self, event: InvalidationEvent) -> None:
+        with self._lock:
+            if event.key is None:
+                self._built = False
+            else:
+                self._dirty.add(int(event.key))
+
+    def _add(self, doc: Any) -> None:
+        scores: Dict[str, float] = defaultdict(float)
+        for field, weight in self.weights.items():
+            for term in tokenize(getattr(doc, field, "")):
+                scores[term] += weight
+        for term, score in scores.items():
+            self._postings[term][doc.id] = score
+        self._doc_terms[doc.id] = set(scores)
+
+    def _remove(self, doc_id: int) -> None:
+        for term in self._doc_terms.pop(doc_id, set()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def _refresh(self, db: Any) -> None:
+        # Llamado con _lock
+        if not self._built:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._dirty.clear()
+            for doc in self._loader(db):
+                self._add(doc)
+            self._built = True
+        elif self._dirty:
+            dirty, self._dirty = self._dirty, set()
+            for doc_id in dirty:
+                self._remove(doc_id)
+            for doc in self._fetch(db, dirty):
+                self._add(doc)
+
+    def search(self, db: Any, query: str) -> List[Tuple[float, int]]:
+        """[(rank, doc_id)] ordenado por rank desc, id desc"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            self._refresh(db)
+            result: Optional[Dict[int, float]] = None
+            for term in terms:
+                matches = self._postings.get(term, {})
+                if result is None:
+                    result = dict(matches)
+                else:
+                    result = {
+                        doc_id: score + matches[doc_id]
+                        for doc_id, score in result.items() if doc_id in matches
+                    }
+                if not result:
+                    return []
+        hits = [(round(score / len(terms), 6), doc_id) for doc_id, score in result.items()]
+        hits.sort(reverse=True)
+        return hits
@@ -0,0 +1,75 @@
+"""
+Configuración de sesión asíncrona de base de datos (SQLAlchemy asyncio)
+
+Se activa con DB_ASYNC_MODE=true; el engine se crea al primer uso para no
+requerir asyncpg/aiosqlite cuando se trabaja en modo síncrono.
+"""
+
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from core.config import settings
+from core.metrics import instrument_engine
+from core.query_guard import guard_enabled, guard_engine
+from db.session import engine_options
+
+# Drivers asíncronos por dialecto
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def to_async_url(database_url: str) -> str:
+    """postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        options = engine_options(settings.DATABASE_URL)
+        if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+            }
+        _async_engine = create_async_engine(to_async_url(settings.DATABASE_URL), **options)
+        if settings.METRICS_ENABLED:
+            instrument_engine(_async_engine.sync_engine, "async")
+        if guard_enabled():
+            guard_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+# Dependency para obtener sesión asíncrona de DB
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency para inyectar sesión asíncrona de base de datos"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Cierra el pool asíncrono (shutdown)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
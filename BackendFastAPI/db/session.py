@@ -1,19 +1,89 @@
 """
 Configuración de sesión de base de datos
+
+Único punto de creación del engine (y de su pool de conexiones) del proceso.
+El tamaño del pool se configura por worker: el total de conexiones contra
+Postgres es `workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)`.
 """
 
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from core.config import settings
+from core.metrics import DB_BUCKETS, Histogram, family, instrument_engine, registry
+from core.query_guard import guard_enabled, guard_engine
 
-# Crear engine de base de datos
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=False,           # Desactivar logs SQL verbosos
-    pool_pre_ping=True,   # Verificar conexiones
-    pool_recycle=300      # Reciclar conexiones cada 5 min
+pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", (), DB_BUCKETS
 )
 
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide el tiempo de espera al obtener una conexión"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_checkout_wait_seconds.observe(waited)
+            with self._wait_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def engine_options(database_url: str) -> dict:
+    """Opciones de pool comunes a los engines síncrono y asíncrono"""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        # SQLite usa su pool por defecto (sin límites de tamaño)
+        return {"echo": False}
+    return {
+        "echo": False,                               # Desactivar logs SQL verbosos
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # Verificar conexiones
+    }
+
+
+def create_db_engine(database_url: str = settings.DATABASE_URL):
+    """Crea el engine síncrono con el pool y timeouts configurados"""
+    options = engine_options(database_url)
+    if make_url(database_url).get_backend_name() == "postgresql":
+        options["poolclass"] = InstrumentedQueuePool
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            }
+    return create_engine(database_url, **options)
+
+
+# Crear engine de base de datos (uno por proceso)
+engine = create_db_engine()
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+if guard_enabled():
+    guard_engine(engine)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -30,10 +100,52 @@ def get_db():
 def test_connection():
     """Prueba la conexión a la base de datos"""
     try:
-        from sqlalchemy import text
         with engine.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             return True
     except Exception as e:
         print(f"❌ Error de conexión a DB: {e}")
         return False
+
+def get_pool_stats() -> dict:
+    """Estado del pool de conexiones de este worker"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "max_connections": pool.size() + max(pool._max_overflow, 0),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "checkout_timeouts": pool.timeouts,
+            "wait_total_ms": round(pool.wait_total * 1000, 3),
+            "wait_avg_ms": round(pool.wait_total * 1000 / pool.checkouts, 3) if pool.checkouts else 0.0,
+            "wait_max_ms": round(pool.wait_max * 1000, 3),
+        })
+    return stats
+
+
+def _pool_families() -> dict:
+    stats = get_pool_stats()
+    families = {}
+    if "checked_out" in stats:
+        families["db_pool_checked_out"] = family(
+            "gauge", "Conexiones del pool en uso", (), [((), stats["checked_out"])]
+        )
+        families["db_pool_max_connections"] = family(
+            "gauge", "Conexiones máximas del pool (size + overflow)", (), [((), stats["max_connections"])]
+        )
+    if "checkout_timeouts" in stats:
+        families["db_pool_checkout_timeouts_total"] = family(
+            "counter", "Checkouts que agotaron DB_POOL_TIMEOUT", (), [((), stats["checkout_timeouts"])]
+        )
+    return families
+
+
+registry.register_collector(_pool_families)
@@ -0,0 +1,10 @@
+"""
+Tipos de columna compartidos por los modelos
+"""
+
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Documento JSON: JSONB en Postgres (binario, indexable con GIN, sin re-parsear
+# en cada acceso) y JSON en el resto (SQLite)
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
@@ -0,0 +1,56 @@
+"""
+Script para exportar el contenido público del CMS a ficheros estáticos (CDN / edge)
+
+Solo reescribe las páginas / planes / bundle que cambiaron desde el último
+export y publica el manifiesto nuevo de forma atómica (ver services.static_export).
+
+Uso:
+    python export_static.py
+    python export_static.py --force
+    python export_static.py --dir /srv/edge/cms
+"""
+
+import argparse
+import sys
+
+from core.config import settings
+from db.session import SessionLocal
+from services.static_export import StaticExporter, static_exporter
+
+def export_static(force: bool = False, root: str = None) -> int:
+    """Exporta el contenido público y publica la release nueva"""
+    exporter = static_exporter
+    if root:
+        exporter = StaticExporter(
+            root=root,
+            keep_releases=settings.STATIC_EXPORT_KEEP_RELEASES,
+            bundle_keys=static_exporter.bundle_keys
+        )
+
+    db = SessionLocal()
+    try:
+        result = exporter.export(db, force=force)
+    except Exception as e:
+        print(f"[ERROR] Error exportando el contenido: {e}")
+        return 1
+    finally:
+        db.close()
+
+    if result.get("skipped"):
+        print(f"[INFO] Otro proceso está exportando en {exporter.root}; no se hace nada")
+    elif result["published"]:
+        print(f"[OK] Release {result['release']} publicada en {exporter.root / 'manifest.json'}")
+        for name in result["written"]:
+            print(f"[INFO] Escrito: {name}")
+        for name in result["removed"]:
+            print(f"[INFO] Eliminado: {name}")
+    else:
+        print(f"[OK] Sin cambios desde la release {result['release']}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportación estática del contenido público")
+    parser.add_argument("--force", action="store_true", help="Reescribir todos los ficheros")
+    parser.add_argument("--dir", help=f"Directorio de salida (por defecto {settings.STATIC_EXPORT_DIR})")
+    args = parser.parse_args()
+    sys.exit(export_static(force=args.force, root=args.dir))
@@ -3,51 +3,123 @@ FastAPI Backend para Web Empresa
 Estructura estándar de FastAPI con versionado de API
 """
 
-from fastapi import FastAPI
+import time
+IMPORT_STARTED = time.perf_counter()  # Cold start del worker (ver core.startup)
+
+from fastapi import FastAPI, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import uvicorn
+import secrets
 import sys
 
 # Importar configuración y database
 from core.config import settings
-from db.session import engine, test_connection
+from db.session import engine, get_pool_stats, test_connection
 from db.base import Base
+from core.compression import CompressionMiddleware
+from core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from core.query_guard import QueryGuardMiddleware, guard_enabled
+from core.invalidation import invalidation_bus
+from core.responses import USE_ORJSON, FastJSONResponse
+from core.startup import (
+    DatabaseUnavailable, SchemaMismatch, run_production_startup, startup_mode, startup_timings, timed
+)
+from db.async_session import dispose_async_engine
+from security.hashing import password_hasher
+from services.contact_ingestion import contact_ingestor
+from services.contact_spool import contact_spool
+from services.media.thumbnails import thumbnailer
+from services.revision_compaction import revision_compactor
+from services.static_export import static_exporter
 
 # Importar API router
 from api.v1.api import api_router
+from api.v1.endpoints import media
 
 # Importar todos los modelos para que SQLAlchemy los reconozca
 import models.user
 import models.page_content
 import models.contact
 import models.plans
+import models.media
+
+startup_timings["imports"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 2)
 
 # Crear tablas al iniciar
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    boot_started = time.perf_counter()
+    mode = startup_mode()
     try:
-        print("🔄 Starting FastAPI Backend...")
+        print(f"🔄 Starting FastAPI Backend ({mode})...")
         print(f"🐍 Python Environment: {sys.executable}")
         print(f"🌐 Server URL: http://localhost:8000")
         print(f"📖 API Documentation: http://localhost:8000/docs")
         print(f"🗄️ Database URL: {settings.DATABASE_URL}")
         
-        # Test database connection
-        if test_connection():
-            print("✅ Database Connection - OK")
+        if mode == "production":
+            # Esquema gestionado por Alembic: una consulta + precalentado en paralelo
+            warmup = await run_production_startup(engine)
+            print(f"✅ Database Schema (alembic {warmup['revision']}) - OK")
+            for task, error in warmup["prewarm_errors"].items():
+                # Best-effort: el worker sirve igual, con el pool/caché en frío
+                print(f"⚠️ Prewarm {task} failed: {error}")
+            if not warmup["prewarm_errors"]:
+                print(f"✅ Prewarm ({warmup['connections']} connections, {warmup['cached_pages']} pages cached) - OK")
         else:
-            print("❌ Database Connection - FAILED")
-            
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database Tables - OK")
-        print("🚀 FastAPI Backend - READY")
+            # Test database connection
+            with timed("connection_test"):
+                connected = test_connection()
+            if connected:
+                print("✅ Database Connection - OK")
+            else:
+                print("❌ Database Connection - FAILED")
+                
+            with timed("create_all"):
+                Base.metadata.create_all(bind=engine)
+            print("✅ Database Tables - OK")
+        
+        if settings.METRICS_ENABLED:
+            metrics_registry.start()
+        
+        # Suscripción a invalidaciones de caché de otros workers
+        invalidation_bus.start()
+        print(f"✅ Cache Invalidation Bus ({settings.INVALIDATION_BACKEND}) - OK")
+        
+        if settings.CONTACT_INGEST_MODE == "buffered":
+            contact_ingestor.start()
+            print("✅ Contact Ingestion (buffered) - OK")
+        elif settings.CONTACT_INGEST_MODE == "spool":
+            contact_spool.start()
+            print(f"✅ Contact Spool ({settings.CONTACT_SPOOL_DIR}) - OK")
+        if settings.PAGE_REVISION_COMPACT_INTERVAL > 0:
+            revision_compactor.start()
+            print(f"✅ Revision Compaction (every {settings.PAGE_REVISION_COMPACT_INTERVAL:g}s) - OK")
+        print(f"✅ JSON Renderer ({'orjson' if USE_ORJSON else 'stdlib'}) - OK")
+        startup_timings["lifespan"] = round((time.perf_counter() - boot_started) * 1000, 2)
+        print(f"🚀 FastAPI Backend - READY ({startup_timings['lifespan']:.0f} ms)")
         print("=" * 50)
+    except (SchemaMismatch, DatabaseUnavailable) as e:
+        # El worker no arranca contra un esquema distinto del que espera el código
+        # ni sin DB
+        print(f"❌ Startup failed: {e}")
+        raise
     except Exception as e:
         print(f"❌ Startup failed: {e}")
     yield
     # Shutdown
+    # Volcar los mensajes de contacto pendientes antes de cerrar el pool
+    await contact_ingestor.stop()
+    await revision_compactor.stop()
+    await static_exporter.stop()
+    await run_in_threadpool(contact_spool.stop)
+    invalidation_bus.stop()
+    await dispose_async_engine()
+    password_hasher.shutdown()
+    thumbnailer.shutdown()
+    metrics_registry.stop()
     print("👋 FastAPI Backend stopped")
 
 # Crear aplicación FastAPI
@@ -57,6 +129,7 @@ app = FastAPI(
     version="3.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -69,8 +142,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/brotli (las respuestas públicas cacheadas ya llegan comprimidas)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Presupuesto de sentencias SQL y detector de N+1 (solo depuración / CI)
+if guard_enabled():
+    app.add_middleware(
+        QueryGuardMiddleware,
+        mode=settings.QUERY_GUARD_MODE,
+        repeat_threshold=settings.QUERY_GUARD_REPEAT_THRESHOLD,
+        default_budget=settings.QUERY_GUARD_DEFAULT_BUDGET
+    )
+
+# Métricas por ruta (el más externo: mide también la compresión)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir API router con versionado
 app.include_router(api_router, prefix="/api/v1")
+# Media fuera del prefijo versionado: sus URLs quedan guardadas en el contenido
+app.include_router(media.router, prefix="/api/media", tags=["media"])
 
 @app.get("/")
 async def root():
@@ -87,6 +179,25 @@ async def root():
 async def health_check():
     return {"status": "healthy", "database": "connected"}
 
+@app.get("/health/db-pool")
+async def db_pool_stats():
+    """Estado del pool de conexiones de este worker"""
+    return get_pool_stats()
+
+@app.get("/health/startup")
+async def startup_stats():
+    """Tiempos de arranque de este worker por fase (ms)"""
+    return {"mode": startup_mode(), "timings": startup_timings}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(authorization: str = Header(None)):
+        """Métricas en formato Prometheus (agregadas entre workers con METRICS_MULTIPROC_DIR)"""
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if settings.METRICS_TOKEN and not secrets.compare_digest(authorization or "", expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+        return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Endpoint de compatibilidad para el frontend
 @app.get("/api/public/homepage/")
 async def get_homepage_content():
@@ -102,6 +213,8 @@ async def get_homepage_content():
     }
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("🚀 Starting Web Empresa FastAPI Server...")
     print(f"🐍 Python: {sys.version}")
     print(f"📁 Working Directory: {sys.path[0]}")
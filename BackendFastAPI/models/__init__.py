@@ -3,15 +3,19 @@ Modelos SQLAlchemy para Web Empresa
 """
 
 from .user import User, UserRole, Permission
-from .page_content import PageContent
-from .contact import ContactMessage
+from .page_content import PageContent, PageContentRevision
+from .contact import ContactMessage, ContactStatsDaily
 from .plans import ServicePlan
+from .media import MediaFile
 
 __all__ = [
     "User",
     "UserRole", 
     "Permission",
     "PageContent",
+    "PageContentRevision",
     "ContactMessage",
-    "ServicePlan"
+    "ContactStatsDaily",
+    "ServicePlan",
+    "MediaFile"
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@
 Modelo de mensajes de contacto
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Index, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db.base import Base
@@ -13,6 +13,9 @@ class ContactMessage(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     
+    # UUID generado por el cliente (idempotencia de reintentos y del spool)
+    client_id = Column(String(36), unique=True, nullable=True)
+    
     # Información del contacto
     name = Column(String(100), nullable=False)
     email = Column(String(254), nullable=False)
@@ -39,6 +42,18 @@ class ContactMessage(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Listado admin (ORDER BY created_at DESC, id DESC), con y sin estado
+        Index("ix_contactmessage_created_at_id", "created_at", "id"),
+        Index("ix_contactmessage_status_created_at_id", "status", "created_at", "id"),
+        # Bandeja de pendientes (get_pending): índice parcial, solo filas abiertas
+        Index(
+            "ix_contactmessage_pending_created_at_id", "created_at", "id",
+            postgresql_where=status.in_(["new", "in_progress"]),
+            sqlite_where=status.in_(["new", "in_progress"]),
+        ),
+    )
+    
     def __repr__(self):
         return f"<ContactMessage {self.name} - {self.subject}>"
     
@@ -57,3 +72,43 @@ class ContactMessage(Base):
     def is_pending(self):
         """Verifica si el mensaje está pendiente"""
         return self.status in ["new", "in_progress"]
+
+
+# Búsqueda de texto (solo Postgres): columna generada tsvector + índice GIN.
+# No se declara como Column para que el ORM no la cargue ni exista en SQLite;
+# con Alembic la crea la migración 8a41c0e2f7b9 y estos DDL cubren las bases
+# creadas con create_all. Debe coincidir con crud.crud_contact.SEARCH_CONFIG
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('spanish', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(company, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(subject, '')), 'B') ||
+    setweight(to_tsvector('spanish', coalesce(message, '')), 'C')
+"""
+
+event.listen(
+    ContactMessage.__table__, "after_create",
+    DDL(
+        f"ALTER TABLE {ContactMessage.__tablename__} ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+    ).execute_if(dialect="postgresql")
+)
+event.listen(
+    ContactMessage.__table__, "after_create",
+    DDL(
+        f"CREATE INDEX ix_{ContactMessage.__tablename__}_search_vector "
+        f"ON {ContactMessage.__tablename__} USING GIN (search_vector)"
+    ).execute_if(dialect="postgresql")
+)
+
+
+class ContactStatsDaily(Base):
+    """Contador de mensajes por día (UTC) y estado, mantenido incrementalmente"""
+    __tablename__ = "website_content_contactstats"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ContactStatsDaily {self.day} {self.status}={self.count}>"
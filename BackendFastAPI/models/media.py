@@ -0,0 +1,33 @@
+"""
+Modelo de ficheros de media (imágenes subidas desde el CMS)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy.sql import func
+from db.base import Base
+
+class MediaFile(Base):
+    """Fichero subido; el contenido se guarda una vez por SHA-256"""
+    __tablename__ = "website_media_file"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+
+    # Metadatos del fichero original
+    filename = Column(String(255), default="")
+    content_type = Column(String(100), nullable=False)
+    size = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+
+    # Derivados generados: {"thumb": {"key": ..., "width": ..., "height": ...}}
+    derivatives = Column(JSON, default=dict)
+
+    uploaded_by_id = Column(Integer, ForeignKey("auth_user.id"), nullable=True)
+
+    # Fechas
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MediaFile {self.sha256[:12]} {self.filename}>"
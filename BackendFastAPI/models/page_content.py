@@ -2,9 +2,10 @@
 Modelo para contenido de páginas editables
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from db.base import Base
+from db.types import JSONDocument
 
 class PageContent(Base):
     """Modelo para contenido editable de páginas"""
@@ -14,8 +15,8 @@ class PageContent(Base):
     page_key = Column(String(100), unique=True, index=True, nullable=False)  # 'homepage', 'about', 'history'
     title = Column(String(200), nullable=False)
     
-    # Contenido estructurado como JSON
-    content_json = Column(JSON, default={})
+    # Contenido estructurado como JSON (JSONB en Postgres)
+    content_json = Column(JSONDocument, default={})
     
     # Meta información
     meta_title = Column(String(200), default="")
@@ -25,9 +26,48 @@ class PageContent(Base):
     # Estado
     is_active = Column(Boolean, default=True, index=True)
     
+    # Versión para concurrencia optimista (If-Match en PATCH); sube en cada escritura.
+    # Como version_id_col, los UPDATE del ORM llevan `WHERE version = <leída>`
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Fechas
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Consultas por contenido (@>) sobre content_json; solo Postgres
+        Index(
+            "ix_website_page_content_content_json", content_json,
+            postgresql_using="gin", postgresql_ops={"content_json": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    __mapper_args__ = {"version_id_col": version}
+    
     def __repr__(self):
         return f"<PageContent {self.page_key}: {self.title}>"
+
+
+class PageContentRevision(Base):
+    """
+    Historial de versiones de una página: snapshots completos periódicos y,
+    entre ellos, deltas (operaciones de parche respecto a la versión anterior)
+    """
+    __tablename__ = "website_page_content_revision"
+    
+    id = Column(Integer, primary_key=True)
+    page_id = Column(Integer, ForeignKey("website_page_content.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    kind = Column(String(10), nullable=False)  # 'snapshot' | 'delta'
+    data = Column(JSONDocument, nullable=False)
+    size = Column(Integer, nullable=False, default=0)  # Bytes de `data` serializado
+    author_id = Column(Integer, ForeignKey("auth_user.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Reconstrucción y listado: (page_id, version) en orden
+        UniqueConstraint("page_id", "version", name="uq_page_content_revision_page_version"),
+    )
+    
+    def __repr__(self):
+        return f"<PageContentRevision page={self.page_id} v{self.version} {self.kind}>"
@@ -2,9 +2,10 @@
 Modelo de planes de servicio
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, DECIMAL, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, DECIMAL, Index
 from sqlalchemy.sql import func
 from db.base import Base
+from db.types import JSONDocument
 
 class ServicePlan(Base):
     """Modelo de plan de servicio"""
@@ -26,8 +27,8 @@ class ServicePlan(Base):
     storage_gb = Column(Integer, default=1)
     api_requests_limit = Column(Integer, default=1000)
     
-    # Características (lista JSON)
-    features = Column(JSON, default=list)
+    # Características (lista JSON; JSONB en Postgres)
+    features = Column(JSONDocument, default=list)
     
     # Configuración visual
     color_primary = Column(String(7), default="#3B82F6")    # Azul por defecto
@@ -42,6 +43,17 @@ class ServicePlan(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Planes activos en orden de visualización (get_active_plans)
+        Index(
+            "ix_serviceplan_active_display_order_id", "display_order", "id",
+            postgresql_where=is_active == True,
+            sqlite_where=is_active == True,
+        ),
+        # Planes por característica (features ? '...'); solo Postgres
+        Index("ix_serviceplan_features", features, postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
     def __repr__(self):
         return f"<ServicePlan {self.name}>"
     
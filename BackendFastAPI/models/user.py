@@ -2,7 +2,7 @@
 Modelo de Usuario para autenticación
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db.base import Base
@@ -31,7 +31,7 @@ class User(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(150), unique=True, index=True, nullable=False)
-    email = Column(String(254), nullable=False)
+    email = Column(String(254), nullable=False, index=True)
     first_name = Column(String(150), default="")
     last_name = Column(String(150), default="")
     
@@ -44,12 +44,18 @@ class User(Base):
     is_superuser = Column(Boolean, default=False)
     
     # Rol del usuario
-    role = Column(SQLEnum(UserRole), default=UserRole.VIEWER, nullable=False)
+    role = Column(SQLEnum(UserRole), default=UserRole.VIEWER, nullable=False, index=True)
     
     # Fechas
     date_joined = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
     
+    __table_args__ = (
+        # Orden y cursor del listado de usuarios (date_joined, id)
+        Index("ix_auth_user_date_joined_id", "date_joined", "id"),
+        # Los índices lower(...) para la búsqueda por prefijo se crean en la
+        # migración 3c9e5a7b1d20 (solo Postgres, con varchar_pattern_ops)
+    )
     
     def __repr__(self):
         return f"<User {self.username}>"
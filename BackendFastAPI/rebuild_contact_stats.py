@@ -0,0 +1,28 @@
+"""
+Script para reconstruir la tabla resumen de estadísticas de contacto
+"""
+
+from db.session import SessionLocal, engine
+from db.base import Base
+import models.contact
+from crud.crud_contact_stats import contact_stats
+
+def rebuild_stats():
+    """Recalcula los contadores por día y estado desde los mensajes"""
+    # Crear tablas si no existen
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        rows = contact_stats.rebuild(db)
+        summary = contact_stats.summary(db, days=1)
+        print(f"[OK] Estadísticas reconstruidas: {rows} filas (día, estado)")
+        print(f"[INFO] Total mensajes: {summary['total']} - Pendientes: {summary['pending']}")
+    except Exception as e:
+        print(f"[ERROR] Error reconstruyendo estadísticas: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_stats()
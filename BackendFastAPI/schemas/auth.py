@@ -20,3 +20,4 @@ class TokenData(BaseModel):
     """Datos decodificados del token"""
     username: Optional[str] = None
     user_id: Optional[int] = None
+    exp: Optional[int] = None  # Expiración (timestamp UNIX)
@@ -5,8 +5,10 @@ Esquemas para mensajes de contacto
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
 
 class ContactMessageCreate(BaseModel):
+    client_id: Optional[UUID] = None
     name: str
     email: EmailStr
     phone: Optional[str] = ""
@@ -20,6 +22,7 @@ class ContactMessageUpdate(BaseModel):
 
 class ContactMessageResponse(BaseModel):
     id: int
+    client_id: Optional[str] = None
     name: str
     email: str
     phone: str
@@ -35,3 +38,7 @@ class ContactMessageResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class ContactMessageSearchResult(ContactMessageResponse):
+    rank: float
+    snippet: str  # Fragmento con las coincidencias entre <b>...</b> (HTML escapado)
@@ -0,0 +1,34 @@
+"""
+Esquemas para ficheros de media
+"""
+
+from pydantic import BaseModel, HttpUrl
+from typing import Dict, Optional
+from datetime import datetime
+
+class MediaFileCreate(BaseModel):
+    sha256: str
+    filename: str = ""
+    content_type: str
+    size: int
+    uploaded_by_id: Optional[int] = None
+
+class MediaFileUpdate(BaseModel):
+    filename: Optional[str] = None
+
+class MediaFromUrl(BaseModel):
+    url: HttpUrl
+    filename: Optional[str] = None
+
+class MediaFileResponse(BaseModel):
+    id: int
+    sha256: str
+    filename: str
+    content_type: str
+    size: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    url: str
+    thumbnails: Dict[str, str] = {}  # nombre -> URL (se generan en segundo plano)
+    created_at: datetime
+    deduplicated: bool = False
@@ -6,6 +6,12 @@ from pydantic import BaseModel, validator
 from typing import Optional, Dict, Any
 from datetime import datetime
 
+# Páginas gestionables desde el CMS
+ALLOWED_PAGE_KEYS = [
+    'homepage', 'about', 'history', 'clients', 'pricing', 'contact',
+    'footer', 'navigation'
+]
+
 class PageContentBase(BaseModel):
     page_key: str
     title: str
@@ -18,12 +24,8 @@ class PageContentBase(BaseModel):
 class PageContentCreate(PageContentBase):
     @validator('page_key')
     def validate_page_key(cls, v):
-        allowed_keys = [
-            'homepage', 'about', 'history', 'clients', 'pricing', 'contact',
-            'footer', 'navigation'
-        ]
-        if v not in allowed_keys:
-            raise ValueError(f'page_key must be one of: {allowed_keys}')
+        if v not in ALLOWED_PAGE_KEYS:
+            raise ValueError(f'page_key must be one of: {ALLOWED_PAGE_KEYS}')
         return v
 
 class PageContentUpdate(BaseModel):
@@ -36,8 +38,37 @@ class PageContentUpdate(BaseModel):
 
 class PageContentResponse(PageContentBase):
     id: int
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class PageContentPatchResult(BaseModel):
+    """Respuesta de PATCH: solo la nueva versión (el cliente ya tiene el contenido)"""
+    page_key: str
+    version: int
+    updated_at: Optional[datetime] = None
+
+class PageContentRevisionResponse(BaseModel):
+    """Entrada del historial (sin el contenido; ver PageContentRevisionState)"""
+    version: int
+    kind: str
+    size: int
+    author_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class PageContentRevisionState(BaseModel):
+    """Estado de una página reconstruido en una versión del historial"""
+    page_key: str
+    version: int
+    title: str
+    content_json: Dict[str, Any] = {}
+    meta_title: Optional[str] = ""
+    meta_description: Optional[str] = ""
+    meta_keywords: Optional[str] = ""
+    is_active: bool = True
@@ -72,3 +72,5 @@ class UserListResponse(BaseModel):
     total: int
     page: int
     per_page: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
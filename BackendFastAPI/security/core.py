@@ -20,7 +20,7 @@ security = HTTPBearer()
 
 def get_password_hash(password: str) -> str:
     """Hashea una contraseña usando bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica una contraseña contra su hash"""
@@ -54,17 +54,20 @@ def verify_token(token: str) -> TokenData:
         if username is None or user_id is None:
             raise credentials_exception
             
-        token_data = TokenData(username=username, user_id=user_id)
+        token_data = TokenData(username=username, user_id=user_id, exp=payload.get("exp"))
         return token_data
     except JWTError:
         raise credentials_exception
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Autentica usuario con username/email y password"""
-    # Buscar por username O email (para compatibilidad)
-    user = db.query(User).filter(
+def get_user_for_login(db: Session, username: str) -> Optional[User]:
+    """Busca el usuario por username O email (para compatibilidad)"""
+    return db.query(User).filter(
         (User.username == username) | (User.email == username)
     ).first()
+
+def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    """Autentica usuario con username/email y password"""
+    user = get_user_for_login(db, username)
     if not user:
         return None
     if not verify_password(password, user.password_hash):
@@ -9,13 +9,19 @@ from sqlalchemy.orm import Session
 from db.session import get_db
 from models.user import User
 from .core import security, verify_token
+from .token_cache import UserSnapshot, token_cache
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Dependency para obtener usuario actual desde token"""
+) -> UserSnapshot:
+    """Dependency para obtener usuario actual desde token (cacheado por token)"""
     token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+    
+    generation = token_cache.generation
     token_data = verify_token(token)
     
     user = db.query(User).filter(User.id == token_data.user_id).first()
@@ -24,9 +30,12 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
+    
+    snapshot = UserSnapshot.from_user(user)
+    token_cache.set(token, snapshot, expires_at=token_data.exp, generation=generation)
+    return snapshot
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     """Dependency para usuario activo"""
     if not current_user.is_active:
         raise HTTPException(
@@ -35,7 +44,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         )
     return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+def get_current_admin_user(current_user: UserSnapshot = Depends(get_current_active_user)) -> UserSnapshot:
     """Dependency para usuario administrador"""
     if not current_user.is_admin:
         raise HTTPException(
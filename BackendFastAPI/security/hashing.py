@@ -0,0 +1,122 @@
+"""
+Hashing de contraseñas (bcrypt) fuera del hilo de la petición
+
+Las operaciones bcrypt se ejecutan en un executor dedicado y acotado (hilos o
+procesos según PASSWORD_HASH_EXECUTOR) para que una ráfaga de logins no
+ocupe el threadpool del resto de endpoints. Si hay demasiadas operaciones
+pendientes se rechaza la petición (backpressure) en lugar de encolar sin
+límite.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+
+from core.config import settings
+from core.metrics import HASH_BUCKETS, Counter, Histogram
+
+password_hash_seconds = Histogram(
+    "password_hash_seconds", "Duración de bcrypt en el executor", ("op",), HASH_BUCKETS
+)
+password_hash_queue_seconds = Histogram(
+    "password_hash_queue_seconds", "Espera hasta obtener hueco en el executor de bcrypt", ("op",)
+)
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total", "Operaciones bcrypt rechazadas por backpressure", ("op",)
+)
+
+
+class PasswordHasherBusy(Exception):
+    """No hay capacidad para otra operación de hashing en este momento"""
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Factor de coste de un hash bcrypt (`$2b$12$...` -> 12)"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Executor acotado para bcrypt con límite de operaciones pendientes"""
+
+    def __init__(
+        self,
+        *,
+        rounds: int,
+        workers: int,
+        executor_kind: str = "thread",
+        max_pending: int = 16,
+        queue_timeout: float = 2.0
+    ):
+        self.rounds = rounds
+        self.workers = workers
+        self.executor_kind = executor_kind
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, op: str, fn: Callable, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            password_hash_rejected_total.inc(op)
+            raise PasswordHasherBusy()
+        acquired = time.perf_counter()
+        password_hash_queue_seconds.observe(acquired - start, op)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            password_hash_seconds.observe(time.perf_counter() - acquired, op)
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hashpw, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run("verify", _checkpw, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True si el hash se generó con un coste distinto al configurado"""
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    executor_kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT
+)
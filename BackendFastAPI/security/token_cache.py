@@ -0,0 +1,118 @@
+"""
+Caché de tokens verificados para `get_current_user`
+
+Guarda, por digest del token, una instantánea inmutable del usuario ya
+autenticado, de modo que las peticiones autenticadas repetidas no necesitan
+decodificar el JWT ni consultar la DB. Las entradas expiran con el token y se
+invalidan cuando el usuario cambia (eventos de `auth_user` en el bus).
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from core.cache import TTLCache
+from core.config import settings
+from core.invalidation import InvalidationEvent, invalidation_bus
+from models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Copia desacoplada de la sesión con los campos que usan auth y UserResponse"""
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    full_name: str
+    role: UserRole
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    is_admin: bool
+    date_joined: Optional[datetime]
+    last_login: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name or "",
+            last_name=user.last_name or "",
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            is_staff=user.is_staff,
+            is_superuser=user.is_superuser,
+            is_admin=user.is_admin,
+            date_joined=user.date_joined,
+            last_login=user.last_login,
+        )
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """TTLCache de tokens con índice por usuario para poder invalidarlos"""
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._cache = TTLCache("auth_tokens", maxsize=maxsize, ttl=ttl)
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        return self._cache.get(token_digest(token))
+
+    @property
+    def generation(self) -> int:
+        return self._cache.generation
+
+    def set(
+        self,
+        token: str,
+        user: UserSnapshot,
+        *,
+        expires_at: Optional[int] = None,
+        generation: Optional[int] = None
+    ) -> None:
+        ttl = self._cache.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        digest = token_digest(token)
+        self._cache.set(digest, user, ttl=ttl, generation=generation)
+        with self._lock:
+            self._by_user.setdefault(user.id, set()).add(digest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            digests = self._by_user.pop(user_id, set())
+        for digest in digests:
+            self._cache.invalidate(digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_user.clear()
+        self._cache.clear()
+
+
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+
+def _invalidate_user(event: InvalidationEvent) -> None:
+    if event.key is None:
+        token_cache.clear()
+    else:
+        token_cache.invalidate_user(int(event.key))
+
+# Actualizar, activar/desactivar o borrar un usuario publica en el bus
+invalidation_bus.subscribe(User.__tablename__, _invalidate_user)
@@ -0,0 +1,3 @@
+"""
+Servicios de aplicación (procesos en segundo plano del backend)
+"""
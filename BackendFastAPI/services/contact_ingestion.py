@@ -0,0 +1,144 @@
+"""
+Ingesta write-behind de mensajes del formulario de contacto público
+
+Con CONTACT_INGEST_MODE=buffered el endpoint público valida el mensaje, lo
+encola y responde 202. Una tarea en segundo plano agrupa los mensajes y los
+escribe con un único `INSERT ... RETURNING` multi-fila por lote (los
+client_id ya guardados se omiten y se cuentan como duplicados), cuando el
+lote alcanza CONTACT_INGEST_BATCH_SIZE o pasan CONTACT_INGEST_FLUSH_INTERVAL
+segundos. Si la cola está llena (o el servicio no está arrancado) el
+endpoint escribe en síncrono como en el modo "sync".
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.invalidation import invalidation_bus
+from crud import contact_message as crud_contact
+from db.session import SessionLocal
+from models.contact import ContactMessage
+from schemas.contact import ContactMessageCreate
+
+
+class ContactIngestor:
+    """Cola acotada + tarea de volcado por lotes"""
+
+    def __init__(self, *, queue_size: int, batch_size: int, flush_interval: float):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.accepted = 0
+        self.written = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    def start(self) -> None:
+        """Arranca la tarea de volcado (en el event loop de la app)"""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Deja de aceptar mensajes y vacía la cola antes de salir"""
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def submit(self, message: ContactMessageCreate) -> bool:
+        """Encola el mensaje; False si hay que escribirlo en síncrono"""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(message.model_dump(mode="json"))
+        except asyncio.QueueFull:
+            return False
+        self.accepted += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "accepted": self.accepted,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await asyncio.to_thread(self._write_batch, batch)
+
+    async def _collect(self) -> List[Dict[str, Any]]:
+        """Espera el primer mensaje y completa el lote hasta tamaño o plazo"""
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                if deadline is not None or self._stopping:
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            created = crud_contact.create_many(db, batch)
+            db.commit()
+            # Solo cuentan las filas realmente insertadas (no los duplicados)
+            self.written += len(created)
+            self.duplicates += len(batch) - len(created)
+            self.batches += 1
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Contact batch insert failed ({len(batch)} messages): {e}")
+            # Reintentar fila a fila para no perder el lote por un único mensaje
+            for data in batch:
+                try:
+                    created = crud_contact.create_many(db, [data])
+                    db.commit()
+                    self.written += len(created)
+                    self.duplicates += 1 - len(created)
+                except Exception as row_error:
+                    db.rollback()
+                    self.failed += 1
+                    print(f"❌ Contact message lost: {row_error}")
+        finally:
+            db.close()
+        # Un evento por lote (sin clave): "cambiaron varios mensajes"
+        invalidation_bus.publish(ContactMessage.__tablename__, None)
+
+
+contact_ingestor = ContactIngestor(
+    queue_size=settings.CONTACT_INGEST_QUEUE_SIZE,
+    batch_size=settings.CONTACT_INGEST_BATCH_SIZE,
+    flush_interval=settings.CONTACT_INGEST_FLUSH_INTERVAL
+)
@@ -0,0 +1,482 @@
+"""
+Spool local y durable para mensajes del formulario de contacto
+
+Con CONTACT_INGEST_MODE=spool cada envío se escribe primero en un log local
+append-only (segmentos `NNNNNNNNNNNN.seg`) y se responde 202 en cuanto el
+registro está en disco, sin esperar a Postgres. Un hilo replayer lee los
+segmentos desde el último checkpoint y los inserta por lotes en
+`website_content_contactmessage` con `ON CONFLICT (client_id) DO NOTHING`, de
+modo que reintentos y replays repetidos tras un fallo son idempotentes.
+
+Formato de registro: cabecera `>II` (longitud, crc32) + JSON. Un registro
+incompleto al final del segmento activo (corte de luz a mitad de escritura)
+se descarta al abrir el spool.
+
+Las escrituras concurrentes comparten fsync (group commit): quien llega al
+fsync sincroniza todo lo escrito hasta ese momento y los demás ya no
+necesitan el suyo.
+
+Con varios workers cada proceso escribe en su propio directorio
+`CONTACT_SPOOL_DIR/worker-N`, reclamado con un flock sobre `worker-N/.lock`
+que se mantiene mientras el worker vive. El replayer de cada worker revisa
+además los directorios cuyo lock no tiene nadie (workers caídos o que ya no
+existen tras reducir --workers) y los vacía hacia la DB.
+
+Un registro corrupto dentro de un segmento sellado no se puede reintentar:
+el segmento se renombra a `.seg.corrupt` (se conserva para revisarlo a mano)
+y el replay sigue con el siguiente.
+"""
+
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.invalidation import invalidation_bus
+from crud import contact_message as crud_contact
+from db.session import SessionLocal
+from models.contact import ContactMessage
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, un solo worker por spool
+    fcntl = None
+
+HEADER = struct.Struct(">II")
+SEGMENT_SUFFIX = ".seg"
+CORRUPT_SUFFIX = ".corrupt"
+CHECKPOINT_FILE = "checkpoint.json"
+LOCK_FILE = ".lock"
+SLOT_PREFIX = "worker-"
+ORPHAN_SCAN_INTERVAL = 30.0  # Segundos entre búsquedas de directorios huérfanos
+
+# (segmento, offset): posición en el spool
+Position = Tuple[int, int]
+
+
+class CorruptRecord(Exception):
+    """Registro truncado o con CRC incorrecto"""
+
+
+def _segment_name(seq: int) -> str:
+    return f"{seq:012d}{SEGMENT_SUFFIX}"
+
+
+def _try_lock(directory: Path):
+    """Abre `<dir>/.lock` y lo bloquea sin esperar; None si lo tiene otro proceso"""
+    directory.mkdir(parents=True, exist_ok=True)
+    lock_file = open(directory / LOCK_FILE, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def encode_record(data: Dict[str, Any]) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: Path, start: int = 0, end: Optional[int] = None, limit: Optional[int] = None):
+    """Genera (registro, offset_siguiente) desde `start` hasta `end` (o EOF)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        count = 0
+        while (end is None or offset < end) and (limit is None or count < limit):
+            header = f.read(HEADER.size)
+            if not header:
+                return
+            if len(header) < HEADER.size:
+                raise CorruptRecord(f"{path.name}@{offset}")
+            length, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                raise CorruptRecord(f"{path.name}@{offset}")
+            offset += HEADER.size + length
+            count += 1
+            yield json.loads(payload), offset
+
+
+class ContactSpool:
+    """Log append-only por segmentos + hilo replayer hacia la DB"""
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        segment_bytes: int,
+        replay_batch: int,
+        replay_interval: float
+    ):
+        self.root = Path(root)
+        # Directorio propio (worker-N), fijado al abrir
+        self.directory: Optional[Path] = None
+        self._lock_file = None
+        self.segment_bytes = segment_bytes
+        self.replay_batch = replay_batch
+        self.replay_interval = replay_interval
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._segment = 0
+        self._offset = 0
+        self._durable: Position = (0, 0)
+        self._checkpoint: Position = (0, 0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_orphan_scan = 0.0
+        # Métricas
+        self.appended = 0
+        self.replayed = 0
+        self.duplicates = 0
+        self.pending = 0
+        self.adopted = 0
+        self.quarantined = 0
+        self.oldest_pending_at: Optional[float] = None
+        self.last_replay_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    # Apertura / recuperación
+    def open(self) -> None:
+        if self._lock_file is None:
+            self.directory, self._lock_file = self._claim_slot()
+        self._checkpoint = self._load_checkpoint()
+        segments = self._segments()
+        self._segment = segments[-1] if segments else max(self._checkpoint[0], 1)
+        path = self._path(self._segment)
+        self._offset = self._recover(path) if path.exists() else 0
+        self._file = open(path, "ab")
+        self._durable = (self._segment, self._offset)
+        first = segments[0] if segments else self._segment
+        if self._checkpoint[0] < first:
+            self._checkpoint = (first, 0)
+        self.pending, self.oldest_pending_at = self._scan_pending()
+
+    def _claim_slot(self) -> Tuple[Path, Any]:
+        """Primer worker-N libre (su lock lo libera el SO si el proceso muere)"""
+        if fcntl is None:
+            directory = self.root / f"{SLOT_PREFIX}0"
+            return directory, _try_lock(directory)
+        for slot in itertools.count():
+            directory = self.root / f"{SLOT_PREFIX}{slot}"
+            lock_file = _try_lock(directory)
+            if lock_file is not None:
+                return directory, lock_file
+
+    def _recover(self, path: Path) -> int:
+        """Trunca el segmento activo tras el último registro válido"""
+        offset = 0
+        try:
+            for _, offset in read_records(path):
+                pass
+        except CorruptRecord:
+            print(f"⚠️ Contact spool: truncating torn record in {path.name} at {offset}")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+        return offset
+
+    def _scan_pending(self) -> Tuple[int, Optional[float]]:
+        count, oldest = 0, None
+        position = self._checkpoint
+        for seq in self._segments():
+            if seq < position[0]:
+                continue
+            start = position[1] if seq == position[0] else 0
+            try:
+                for record, _ in read_records(self._path(seq), start):
+                    count += 1
+                    if oldest is None:
+                        oldest = record.get("received_at")
+            except CorruptRecord:
+                continue  # El replayer lo pone en cuarentena al llegar
+        return count, oldest
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(path.stem) for path in self.directory.glob(f"*{SEGMENT_SUFFIX}") if path.stem.isdigit()
+        )
+
+    def _path(self, seq: int) -> Path:
+        return self.directory / _segment_name(seq)
+
+    # Escritura
+    def append(self, data: Dict[str, Any]) -> None:
+        """Escribe el registro y vuelve cuando está sincronizado en disco"""
+        data = {**data, "received_at": time.time()}
+        record = encode_record(data)
+        with self._write_lock:
+            # Dentro del lock: stop() puede cerrar el fichero en cualquier momento
+            if self._file is None:
+                raise RuntimeError("Contact spool is not open")
+            if self._offset and self._offset + len(record) > self.segment_bytes:
+                self._rotate()
+            self._file.write(record)
+            self._file.flush()
+            self._offset += len(record)
+            position = (self._segment, self._offset)
+            self.appended += 1
+            self.pending += 1
+            if self.oldest_pending_at is None:
+                self.oldest_pending_at = data["received_at"]
+        self._sync(position)
+        self._wake.set()
+
+    def _rotate(self) -> None:
+        # Llamado con _write_lock: el segmento sellado queda sincronizado
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._durable = max(self._durable, (self._segment, self._offset))
+        self._segment += 1
+        self._offset = 0
+        self._file = open(self._path(self._segment), "ab")
+
+    def _sync(self, position: Position) -> None:
+        with self._sync_lock:
+            if self._durable >= position:
+                return  # Otro hilo ya sincronizó este registro
+            with self._write_lock:
+                if self._file is None:
+                    return  # stop() sincronizó y cerró el segmento
+                target = (self._segment, self._offset)
+                fd = os.dup(self._file.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._write_lock:
+                self._durable = max(self._durable, target)
+
+    # Replay hacia la DB
+    def start(self) -> None:
+        if not self.is_open:
+            self.open()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="contact-spool-replayer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Para el replayer (con un último intento de replay) y cierra el segmento"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        with self._write_lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._durable = max(self._durable, (self._segment, self._offset))
+            if self._lock_file is not None:
+                # Cerrar el fichero libera el flock: el directorio queda adoptable
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _run(self) -> None:
+        backoff = self.replay_interval
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                while self.replay_once():
+                    pass
+                if not stopping and time.monotonic() >= self._next_orphan_scan:
+                    self._next_orphan_scan = time.monotonic() + ORPHAN_SCAN_INTERVAL
+                    self.adopt_orphans()
+                self.last_error = None
+                backoff = self.replay_interval
+            except Exception as e:
+                # DB caída o lenta: los registros siguen en disco, reintentar luego
+                self.last_error = str(e)
+                print(f"⚠️ Contact spool replay failed: {e}")
+                backoff = min(backoff * 2, 30.0)
+            if stopping:
+                return
+            self._wake.wait(backoff)
+            self._wake.clear()
+
+    def replay_once(self) -> bool:
+        """Inserta el siguiente lote pendiente; False si no quedaba nada"""
+        durable = self._durable
+        seq, start = self._checkpoint
+        if (seq, start) >= durable:
+            return False
+
+        end = durable[1] if seq == durable[0] else None
+        batch, position, corrupt = [], (seq, start), False
+        try:
+            for record, offset in read_records(self._path(seq), start, end, self.replay_batch):
+                batch.append(record)
+                position = (seq, offset)
+        except CorruptRecord:
+            if seq == durable[0]:
+                raise  # Segmento activo: no se puede saltar lo que aún se escribe
+            corrupt = True
+
+        if batch:
+            inserted = self._insert(batch)
+            self.replayed += inserted
+            self.duplicates += len(batch) - inserted
+            self.last_replay_at = time.time()
+
+        if corrupt:
+            # Lo válido anterior ya está insertado; el resto del segmento se aparta
+            self._quarantine(seq, position[1])
+            self._save_checkpoint((seq + 1, 0))
+            with self._write_lock:
+                self.pending, self.oldest_pending_at = self._scan_pending()
+            return True
+
+        if not batch and seq < durable[0]:
+            # Segmento sellado y consumido: pasar al siguiente y borrarlo
+            position = (seq + 1, 0)
+        self._save_checkpoint(position)
+        if position[0] > seq:
+            self._path(seq).unlink(missing_ok=True)
+
+        with self._write_lock:
+            self.pending = max(self.pending - len(batch), 0)
+            if self.pending == 0:
+                self.oldest_pending_at = None
+        if batch and self.pending:
+            self.oldest_pending_at = self._peek_received_at(position)
+        return True
+
+    def _quarantine(self, seq: int, offset: int) -> None:
+        path = self._path(seq)
+        target = path.with_name(path.name + CORRUPT_SUFFIX)
+        os.replace(path, target)
+        self.quarantined += 1
+        self.last_error = f"Corrupt record in {path.name} after offset {offset}"
+        print(f"⚠️ Contact spool: corrupt record in sealed segment, moved to {target}")
+
+    def adopt_orphans(self) -> int:
+        """
+        Vacía hacia la DB los directorios de spool sin dueño: worker-N cuyo
+        flock está libre y el directorio raíz (formato anterior, un solo
+        proceso). Devuelve los registros insertados.
+        """
+        if fcntl is None:
+            return 0
+        candidates = [self.root, *sorted(self.root.glob(f"{SLOT_PREFIX}*"))]
+        inserted = 0
+        for directory in candidates:
+            if directory == self.directory or not directory.is_dir():
+                continue
+            if not any(directory.glob(f"*{SEGMENT_SUFFIX}")):
+                continue
+            lock_file = _try_lock(directory)
+            if lock_file is None:
+                continue  # Worker vivo
+            orphan = ContactSpool(
+                str(self.root),
+                segment_bytes=self.segment_bytes,
+                replay_batch=self.replay_batch,
+                replay_interval=self.replay_interval
+            )
+            orphan.directory, orphan._lock_file = directory, lock_file
+            try:
+                orphan.open()
+                while orphan.replay_once():
+                    pass
+            finally:
+                orphan.stop()
+            if orphan.replayed:
+                print(f"📥 Contact spool: adopted {orphan.replayed} records from {directory.name}")
+            inserted += orphan.replayed
+            self.quarantined += orphan.quarantined
+        self.adopted += inserted
+        return inserted
+
+    def _peek_received_at(self, position: Position) -> Optional[float]:
+        seq, offset = position
+        path = self._path(seq)
+        if not path.exists():
+            return self.oldest_pending_at
+        for record, _ in read_records(path, offset, limit=1):
+            return record.get("received_at")
+        return self.oldest_pending_at
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> int:
+        rows = []
+        for record in batch:
+            row = {key: value for key, value in record.items() if key != "received_at"}
+            # Conservar la hora de envío, no la del replay
+            row["created_at"] = datetime.fromtimestamp(record["received_at"], tz=timezone.utc)
+            rows.append(row)
+
+        db = SessionLocal()
+        try:
+            # Solo cuentan las filas realmente insertadas (no los duplicados)
+            inserted = len(crud_contact.create_many(db, rows))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if inserted:
+            invalidation_bus.publish(ContactMessage.__tablename__, None)
+        return inserted
+
+    # Checkpoint
+    def _load_checkpoint(self) -> Position:
+        try:
+            data = json.loads((self.directory / CHECKPOINT_FILE).read_text())
+            return int(data["segment"]), int(data["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return (0, 0)
+
+    def _save_checkpoint(self, position: Position) -> None:
+        tmp = self.directory / f"{CHECKPOINT_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": position[0], "offset": position[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.directory / CHECKPOINT_FILE)
+        self._checkpoint = position
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "open": self.is_open,
+            "directory": str(self.directory) if self.directory else None,
+            "replayer_running": self._thread is not None,
+            "depth": self.pending,
+            "replay_lag_seconds": round(now - self.oldest_pending_at, 3) if self.oldest_pending_at else 0.0,
+            "segments": len(self._segments()) if self.directory and self.directory.exists() else 0,
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "duplicates": self.duplicates,
+            "adopted": self.adopted,
+            "quarantined": self.quarantined,
+            "last_replay_at": self.last_replay_at,
+            "last_error": self.last_error,
+        }
+
+
+contact_spool = ContactSpool(
+    settings.CONTACT_SPOOL_DIR,
+    segment_bytes=settings.CONTACT_SPOOL_SEGMENT_BYTES,
+    replay_batch=settings.CONTACT_SPOOL_REPLAY_BATCH,
+    replay_interval=settings.CONTACT_SPOOL_REPLAY_INTERVAL
+)
@@ -0,0 +1,4 @@
+"""
+Subsistema de media: almacenamiento direccionado por contenido, subidas en
+streaming y generación de miniaturas
+"""
@@ -0,0 +1,187 @@
+"""
+Backends de almacenamiento de media
+
+Las claves son direccionadas por contenido (`originals/ab/cd/<sha256>`), así
+que un objeto nunca cambia una vez escrito: `put_file` no reescribe lo que ya
+existe y las URLs se pueden cachear como inmutables.
+
+* `LocalStorage`: sistema de ficheros (MEDIA_ROOT), servido por /api/media/files.
+* `S3Storage`: S3 o compatible (MinIO, localstack...) vía boto3, que solo se
+  importa si se usa este backend.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, Optional
+
+from core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def original_key(sha256: str) -> str:
+    return f"originals/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def derivative_key(sha256: str, name: str, extension: str) -> str:
+    return f"derivatives/{sha256[:2]}/{sha256[2:4]}/{sha256}/{name}.{extension}"
+
+
+class MediaStorage:
+    """Interfaz común de los backends"""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        """Guarda el fichero local `path` bajo `key` (no-op si ya existe)"""
+        raise NotImplementedError
+
+    def open_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def download_to(self, key: str, path: str) -> None:
+        with open(path, "wb") as f:
+            for chunk in self.open_chunks(key):
+                f.write(chunk)
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalStorage(MediaStorage):
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError("Invalid media key")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        target = self.path(key)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        shutil.copyfile(path, tmp)
+        # Publicación atómica: nunca se sirve un fichero a medio escribir
+        os.replace(tmp, target)
+
+    def open_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class S3Storage(MediaStorage):
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        public_url: Optional[str] = None
+    ):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = (public_url or "").rstrip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        if self.exists(key):
+            return
+        # upload_file hace multipart por partes para ficheros grandes
+        self.client.upload_file(
+            path, self.bucket, self._key(key),
+            ExtraArgs={
+                "ContentType": content_type,
+                "CacheControl": "public, max-age=31536000, immutable",
+            }
+        )
+
+    def open_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{self._key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(key)}, ExpiresIn=3600
+        )
+
+
+def create_media_storage() -> MediaStorage:
+    """Backend según MEDIA_STORAGE_BACKEND"""
+    if settings.MEDIA_STORAGE_BACKEND == "s3":
+        return S3Storage(
+            settings.MEDIA_S3_BUCKET,
+            prefix=settings.MEDIA_S3_PREFIX,
+            endpoint_url=settings.MEDIA_S3_ENDPOINT_URL,
+            region=settings.MEDIA_S3_REGION,
+            access_key=settings.MEDIA_S3_ACCESS_KEY,
+            secret_key=settings.MEDIA_S3_SECRET_KEY,
+            public_url=settings.MEDIA_S3_PUBLIC_URL
+        )
+    return LocalStorage(settings.MEDIA_ROOT, settings.MEDIA_BASE_URL)
+
+
+_media_storage: Optional[MediaStorage] = None
+
+
+def get_media_storage() -> MediaStorage:
+    """Backend del proceso, creado al primer uso (boto3 solo si hace falta)"""
+    global _media_storage
+    if _media_storage is None:
+        _media_storage = create_media_storage()
+    return _media_storage
@@ -0,0 +1,89 @@
+"""
+Generación de miniaturas y derivados en un pool de procesos
+
+Decodificar y redimensionar imágenes es CPU pura (y Pillow no libera el GIL
+en todo el proceso), así que se hace en procesos aparte para no frenar el
+event loop ni el threadpool de las peticiones. Pillow solo se importa dentro
+de los procesos del pool.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from core.config import settings
+
+# Límite de píxeles para rechazar "decompression bombs"
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+def parse_sizes(spec: str) -> Dict[str, int]:
+    """"thumb:200,medium:800" -> {"thumb": 200, "medium": 800}"""
+    sizes = {}
+    for item in spec.split(","):
+        name, _, size = item.strip().partition(":")
+        if name and size.isdigit():
+            sizes[name] = int(size)
+    return sizes
+
+
+def render_derivatives(src_path: str, out_dir: str, sizes: Dict[str, int], image_format: str) -> Dict[str, Any]:
+    """
+    (En el proceso del pool) Lee la imagen original y escribe un derivado por
+    tamaño en `out_dir`. Devuelve dimensiones del original y de cada derivado.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    with Image.open(src_path) as original:
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "P", "PA") else "RGB")
+
+        derivatives = {}
+        for name, max_side in sizes.items():
+            derivative = image.copy()
+            # Nunca se amplía: si el original es más pequeño se recodifica tal cual
+            derivative.thumbnail((max_side, max_side), Image.LANCZOS)
+            path = os.path.join(out_dir, f"{name}.{image_format}")
+            if image_format in ("jpeg", "jpg") and derivative.mode == "RGBA":
+                derivative = derivative.convert("RGB")
+            derivative.save(path, format=image_format.upper(), quality=82, optimize=True)
+            derivatives[name] = {"path": path, "width": derivative.width, "height": derivative.height}
+
+    return {"width": width, "height": height, "derivatives": derivatives}
+
+
+class Thumbnailer:
+    """ProcessPoolExecutor perezoso para `render_derivatives`"""
+
+    def __init__(self, *, workers: int, sizes: Dict[str, int], image_format: str):
+        self.workers = workers
+        self.sizes = sizes
+        self.image_format = image_format
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def render(self, src_path: str, out_dir: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), render_derivatives, src_path, out_dir, self.sizes, self.image_format
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+thumbnailer = Thumbnailer(
+    workers=settings.MEDIA_THUMBNAIL_WORKERS,
+    sizes=parse_sizes(settings.MEDIA_THUMBNAIL_SIZES),
+    image_format=settings.MEDIA_THUMBNAIL_FORMAT.lower()
+)
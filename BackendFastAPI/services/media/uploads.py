@@ -0,0 +1,260 @@
+"""
+Recepción de subidas en streaming y pipeline de derivados
+
+El cuerpo se lee por trozos (MEDIA_CHUNK_SIZE), se escribe a un fichero
+temporal y se va calculando el SHA-256 sobre la marcha: nunca se tiene el
+fichero completo en memoria. Con el hash se deduplica antes de subir nada
+al backend de almacenamiento.
+
+Las subidas multipart se parsean también en streaming (`MultipartFile`,
+python-multipart sobre request.stream()) en lugar de `request.form()`, que
+volcaría el cuerpo entero a otro temporal antes de poder aplicar
+MEDIA_MAX_UPLOAD_BYTES.
+"""
+
+import hashlib
+import ipaddress
+import os
+import shutil
+import socket
+import tempfile
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+from core.config import settings
+from crud import media_file as crud_media
+from db.session import SessionLocal
+from services.media.storage import derivative_key, get_media_storage, original_key
+from services.media.thumbnails import thumbnailer
+
+# Tipos aceptados, detectados por la firma del fichero (no por el nombre)
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+SNIFF_BYTES = 16
+# Cabeceras de las partes y campos pequeños que acompañan al fichero
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """El fichero supera MEDIA_MAX_UPLOAD_BYTES"""
+
+
+class UnsupportedMediaType(Exception):
+    """El contenido no es un tipo de imagen admitido"""
+
+
+class InvalidMultipart(ValueError):
+    """Cuerpo multipart mal formado o sin el campo del fichero"""
+
+
+class ReceivedUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    content_type: str
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def media_tmp_dir() -> str:
+    path = os.path.join(settings.MEDIA_ROOT, "tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+async def receive_stream(chunks: AsyncIterator[bytes], *, max_bytes: int = settings.MEDIA_MAX_UPLOAD_BYTES) -> ReceivedUpload:
+    """Vuelca `chunks` a un temporal calculando hash y tamaño"""
+    hasher = hashlib.sha256()
+    size = 0
+    head = b""
+    fd, path = tempfile.mkstemp(dir=media_tmp_dir(), suffix=".upload")
+    try:
+        # aclosing: al abortar (UploadTooLarge) el origen se cierra ya, no al recolectarlo
+        async with aclosing(chunks):
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge()
+                    if len(head) < SNIFF_BYTES:
+                        head += chunk[:SNIFF_BYTES - len(head)]
+                    hasher.update(chunk)
+                    await run_in_threadpool(f.write, chunk)
+
+        content_type = sniff_content_type(head)
+        if content_type is None:
+            raise UnsupportedMediaType()
+        return ReceivedUpload(path=path, sha256=hasher.hexdigest(), size=size, content_type=content_type)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+
+class MultipartFile:
+    """
+    Campo de fichero de un cuerpo multipart/form-data, leído en streaming:
+    `chunks()` entrega los bytes del campo según llegan y deja en `filename`
+    el nombre que envió el cliente. El resto de partes se descartan.
+    """
+
+    def __init__(self, content_type: str, stream: AsyncIterator[bytes], field: str = "file"):
+        _, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise InvalidMultipart("Missing multipart boundary")
+        self.stream = stream
+        self.field = field.encode("latin-1")
+        self.filename: Optional[str] = None
+        self._found = False
+        self._in_field = False
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+        self._pending: List[bytes] = []
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Solo el primer campo con ese nombre
+        self._in_field = not self._found and options.get(b"name") == self.field
+        if self._in_field:
+            self._found = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_field:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        self._in_field = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        async with aclosing(self.stream):
+            async for data in self.stream:
+                try:
+                    self._parser.write(data)
+                except MultipartParseError:
+                    raise InvalidMultipart("Invalid multipart body")
+                if self._pending:
+                    chunk, self._pending = b"".join(self._pending), []
+                    yield chunk
+        if not self._found:
+            raise InvalidMultipart("Missing file field")
+
+
+def check_public_url(url: str) -> None:
+    """Solo http(s) hacia direcciones públicas (evita SSRF a la red interna)"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("Only http(s) URLs are allowed")
+    for info in socket.getaddrinfo(parsed.hostname, parsed.port or None):
+        address = ipaddress.ip_address(info[4][0])
+        if not address.is_global:
+            raise ValueError("URL resolves to a non-public address")
+
+
+def fetch_url_chunks(url: str, chunk_size: int = settings.MEDIA_CHUNK_SIZE) -> Iterator[bytes]:
+    """(Bloqueante) descarga `url` por trozos"""
+    check_public_url(url)
+
+    import requests
+    with requests.get(url, stream=True, timeout=(5, 30), allow_redirects=False) as response:
+        response.raise_for_status()
+        yield from response.iter_content(chunk_size)
+
+
+async def iter_url(url: str) -> AsyncIterator[bytes]:
+    iterator = await run_in_threadpool(fetch_url_chunks, url)
+    sentinel = object()
+    try:
+        while True:
+            chunk = await run_in_threadpool(next, iterator, sentinel)
+            if chunk is sentinel:
+                return
+            yield chunk
+    finally:
+        # Si el receptor aborta (UploadTooLarge) se cierra la respuesta de requests
+        await run_in_threadpool(iterator.close)
+
+
+def store_original(upload: ReceivedUpload) -> None:
+    """(Bloqueante) sube el original al backend si aún no existe"""
+    get_media_storage().put_file(original_key(upload.sha256), upload.path, upload.content_type)
+
+
+async def generate_derivatives(media_id: int, upload: ReceivedUpload) -> None:
+    """
+    Tarea en segundo plano tras la subida: miniaturas en el pool de procesos,
+    subida de los derivados y registro de dimensiones en la DB.
+    """
+    storage = get_media_storage()
+    out_dir = tempfile.mkdtemp(dir=media_tmp_dir(), prefix="derivatives-")
+    try:
+        result = await thumbnailer.render(upload.path, out_dir)
+        derivatives = {}
+        for name, info in result["derivatives"].items():
+            key = derivative_key(upload.sha256, name, thumbnailer.image_format)
+            await run_in_threadpool(
+                storage.put_file, key, info["path"], f"image/{thumbnailer.image_format}"
+            )
+            derivatives[name] = {"key": key, "width": info["width"], "height": info["height"]}
+        await run_in_threadpool(
+            _save_derivatives, media_id, result["width"], result["height"], derivatives
+        )
+    except Exception as e:
+        print(f"⚠️ Media derivatives failed for {upload.sha256[:12]}: {e}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        if os.path.exists(upload.path):
+            os.unlink(upload.path)
+
+
+def _save_derivatives(media_id: int, width: int, height: int, derivatives: dict) -> None:
+    db = SessionLocal()
+    try:
+        media = crud_media.get(db, id=media_id)
+        if media is not None:
+            crud_media.update(
+                db, db_obj=media,
+                obj_in={"width": width, "height": height, "derivatives": derivatives}
+            )
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+"""
+Retención periódica del historial de versiones de páginas
+
+Cada PAGE_REVISION_COMPACT_INTERVAL segundos una tarea en segundo plano
+ejecuta `page_revision.compact_all` en un hilo (la compactación es síncrona).
+Con varios workers en Postgres, el advisory lock de compact_all hace que solo
+uno compacte en cada vuelta; el resto la salta.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from core.config import settings
+from crud import page_revision
+from db.session import SessionLocal
+
+
+class RevisionCompactor:
+    """Tarea periódica de compactación"""
+
+    def __init__(self, *, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.removed = 0
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Arranca la tarea (en el event loop de la app); no hace nada con intervalo 0"""
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"⚠️ Revision compaction failed: {e}")
+
+    def run_once(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            result = page_revision.compact_all(db)
+        finally:
+            db.close()
+        self.runs += 1
+        self.removed += result["removed"]
+        self.last_result = result
+        if result["removed"]:
+            print(f"🧹 Revision compaction: {result['removed']} revisions removed ({result['pages']} pages)")
+        return result
+
+
+revision_compactor = RevisionCompactor(interval=settings.PAGE_REVISION_COMPACT_INTERVAL)
@@ -0,0 +1,311 @@
+"""
+Exportación estática del contenido público para servirlo desde CDN / edge
+
+Renderiza las páginas activas, el bundle de navegación/footer (+ planes) y la
+lista pública de planes con los mismos bytes y ETags que la API, y los deja en
+STATIC_EXPORT_DIR:
+
+    files/<nombre>.<hash>.json[.gz|.br]   cuerpos inmutables (nombre = contenido)
+    releases/<release>.json               manifiestos versionados
+    manifest.json                         manifiesto publicado
+
+El manifiesto asocia cada ruta pública de la API con su fichero, ETag,
+Last-Modified y variantes precomprimidas. Publicar es sustituir manifest.json
+con os.replace: el edge ve la versión anterior completa o la nueva completa.
+
+La regeneración es incremental: cada recurso lleva un marcador de versión
+(updated_at de la página, resumen de la tabla de planes) y solo se vuelven a
+renderizar y escribir los que cambiaron. Si nada cambió no se publica release.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.http_cache import CachedBody, make_etag
+from crud import page_content as crud_page_content, service_plan
+from db.session import SessionLocal
+from models.page_content import PageContent
+from models.plans import ServicePlan
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo el lock del proceso
+    fcntl = None
+
+API_PREFIX = "/api/v1"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+PLANS = "plans"
+BUNDLE = "bundle"
+
+
+def _page_name(page_key: str) -> str:
+    return f"pages/{page_key}"
+
+
+class StaticExporter:
+    """Exportación incremental + tarea de fondo lanzada desde la API de admin"""
+
+    def __init__(self, *, root: str, keep_releases: int, bundle_keys: List[str]):
+        self.root = Path(root)
+        self.keep_releases = max(keep_releases, 1)
+        self.bundle_keys = bundle_keys
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending_force: Optional[bool] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    # Manifiesto
+
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifiesto publicado; None si aún no hay export (o no es legible)"""
+        try:
+            manifest = json.loads((self.root / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format") != MANIFEST_FORMAT:
+            return None
+        return manifest
+
+    def _write_atomic(self, relative: str, data: bytes) -> None:
+        target = self.root / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+
+    def _entry_files(self, entry: Dict[str, Any]) -> List[str]:
+        return [entry["path"], *entry.get("encodings", {}).values()]
+
+    def _files_exist(self, entry: Dict[str, Any]) -> bool:
+        return all((self.root / path).is_file() for path in self._entry_files(entry))
+
+    # Versiones y render
+
+    def _markers(self, db: Session) -> Dict[str, Tuple[str, str]]:
+        """{nombre: (ruta pública, marcador de versión)} sin cargar contenido"""
+        markers: Dict[str, Tuple[str, str]] = {}
+        pages = db.query(
+            PageContent.page_key, PageContent.id, PageContent.version, PageContent.updated_at,
+            PageContent.created_at
+        ).filter(PageContent.is_active == True).all()
+        for page in pages:
+            etag, _ = crud_page_content.page_version(page.id, page.version, page.updated_at, page.created_at)
+            markers[_page_name(page.page_key)] = (f"{API_PREFIX}/page-content/public/{page.page_key}/", etag)
+
+        # Altas, bajas y cambios de cualquier plan alteran count / sum / max
+        plans = db.query(
+            func.count(ServicePlan.id), func.sum(ServicePlan.id),
+            func.max(ServicePlan.updated_at), func.max(ServicePlan.created_at)
+        ).one()
+        markers[PLANS] = (f"{API_PREFIX}/plans/public/", make_etag(PLANS, *plans))
+
+        bundle_keys = [key for key in self.bundle_keys if _page_name(key) in markers]
+        markers[BUNDLE] = (
+            f"{API_PREFIX}/page-content/public/bundle/?keys={','.join(self.bundle_keys)}&plans=true",
+            make_etag(BUNDLE, *bundle_keys, *[markers[_page_name(key)][1] for key in bundle_keys], markers[PLANS][1])
+        )
+        return markers
+
+    def _render(self, db: Session, names: List[str]) -> Dict[str, CachedBody]:
+        """Cuerpos serializados (los mismos que sirve la API) de los recursos indicados"""
+        bodies: Dict[str, CachedBody] = {}
+        page_keys = [name.split("/", 1)[1] for name in names if name.startswith("pages/")]
+        if page_keys:
+            for page_key, entry in crud_page_content.get_public_many(db, page_keys=page_keys).items():
+                bodies[_page_name(page_key)] = entry
+        if PLANS in names:
+            bodies[PLANS] = service_plan.get_public_serialized(db)
+        if BUNDLE in names:
+            bodies[BUNDLE] = crud_page_content.get_public_bundle(
+                db, page_keys=self.bundle_keys, include_plans=True
+            )
+        return bodies
+
+    def _write_entry(self, name: str, route: str, marker: str, body: CachedBody) -> Dict[str, Any]:
+        digest = hashlib.sha256(body.body).hexdigest()[:16]
+        path = f"files/{name}.{digest}.json"
+        files = {path: body.body}
+        encodings = {}
+        for encoding, data in (body.encoded or {}).items():
+            encodings[encoding] = path + ENCODING_SUFFIXES[encoding]
+            files[encodings[encoding]] = data
+        for relative, data in files.items():
+            # Direccionado por contenido: si ya existe es idéntico
+            if not (self.root / relative).is_file():
+                self._write_atomic(relative, data)
+        return {
+            "route": route,
+            "marker": marker,
+            "path": path,
+            "etag": body.etag,
+            "last_modified": body.last_modified.isoformat() if body.last_modified else None,
+            "size": len(body.body),
+            "content_type": "application/json",
+            "encodings": encodings,
+        }
+
+    # Export
+
+    def export(self, db: Session, *, force: bool = False) -> Dict[str, Any]:
+        """
+        Regenera lo que cambió desde el último manifiesto y publica una release
+        nueva. Con `force` se reescribe todo. Si otro proceso está exportando
+        sobre el mismo directorio, devuelve `skipped`.
+        """
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / ".lock", "w") as lock_file:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        return {"skipped": True}
+                return self._export(db, force=force)
+
+    def _export(self, db: Session, *, force: bool) -> Dict[str, Any]:
+        previous = self.load_manifest()
+        previous_entries = previous["entries"] if previous else {}
+        markers = self._markers(db)
+
+        stale = [
+            name for name, (route, marker) in markers.items()
+            if force
+            or name not in previous_entries
+            or previous_entries[name]["marker"] != marker
+            or not self._files_exist(previous_entries[name])
+        ]
+        removed = sorted(set(previous_entries) - set(markers))
+        if previous and not stale and not removed:
+            return {"release": previous["release"], "published": False, "written": [], "removed": []}
+
+        bodies = self._render(db, stale)
+        entries: Dict[str, Dict[str, Any]] = {}
+        for name, (route, marker) in markers.items():
+            if name not in stale:
+                entries[name] = previous_entries[name]
+            elif name in bodies:
+                if name.startswith("pages/"):
+                    # El ETag del cuerpo es la versión realmente escrita
+                    marker = bodies[name].etag
+                entries[name] = self._write_entry(name, route, marker, bodies[name])
+
+        release = self._publish(entries)
+        self._prune()
+        return {"release": release, "published": True, "written": sorted(stale), "removed": removed}
+
+    def _publish(self, entries: Dict[str, Dict[str, Any]]) -> str:
+        now = datetime.now(timezone.utc)
+        release = now.strftime("%Y%m%dT%H%M%S%fZ")
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "release": release,
+            "generated_at": now.isoformat(),
+            "entries": dict(sorted(entries.items())),
+        }
+        data = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+        self._write_atomic(f"releases/{release}.json", data)
+        # Publicación: el edge pasa de la release anterior a esta de una vez
+        self._write_atomic(MANIFEST_NAME, data)
+        return release
+
+    def _prune(self) -> None:
+        """Borra releases antiguas y los ficheros que ya no referencia ninguna conservada"""
+        releases = sorted((self.root / "releases").glob("*.json"))
+        for old in releases[:-self.keep_releases]:
+            old.unlink(missing_ok=True)
+
+        referenced = set()
+        for path in releases[-self.keep_releases:]:
+            try:
+                manifest = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            for entry in manifest.get("entries", {}).values():
+                referenced.update(self._entry_files(entry))
+
+        files_root = self.root / "files"
+        for path in files_root.rglob("*"):
+            if path.is_file() and not path.name.startswith(".") \
+                    and path.relative_to(self.root).as_posix() not in referenced:
+                path.unlink(missing_ok=True)
+
+    # Tarea de fondo (admin)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def trigger(self, *, force: bool = False) -> str:
+        """
+        Lanza un export en segundo plano. Si ya hay uno en curso se encola otro
+        (uno solo, que recoge todos los cambios pendientes) al terminar.
+        """
+        if self.running:
+            self._pending_force = bool(self._pending_force) or force
+            return "queued"
+        self._task = asyncio.get_running_loop().create_task(self._run(force))
+        return "started"
+
+    async def stop(self) -> None:
+        """Espera al export en curso (no se interrumpe a medias)"""
+        self._pending_force = None
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, force: bool) -> None:
+        while True:
+            self._pending_force = None
+            try:
+                self.last_result = await asyncio.to_thread(self.run_once, force=force)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Static export failed: {e}")
+            if self._pending_force is None:
+                return
+            force = self._pending_force
+
+    def run_once(self, *, force: bool = False) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            result = self.export(db, force=force)
+        finally:
+            db.close()
+        if result.get("published"):
+            print(f"📦 Static export {result['release']}: {len(result['written'])} written, {len(result['removed'])} removed")
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        manifest = self.load_manifest()
+        return {
+            "running": self.running,
+            "release": manifest["release"] if manifest else None,
+            "entries": len(manifest["entries"]) if manifest else 0,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+static_exporter = StaticExporter(
+    root=settings.STATIC_EXPORT_DIR,
+    keep_releases=settings.STATIC_EXPORT_KEEP_RELEASES,
+    bundle_keys=[key.strip() for key in settings.STATIC_EXPORT_BUNDLE_KEYS.split(",") if key.strip()]
+)